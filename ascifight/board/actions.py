@@ -1,10 +1,9 @@
-from pydantic import ValidationError
-import toml
 import structlog
 
 import random
 
 
+import ascifight.config as config
 import ascifight.board.data as data
 import ascifight.board.computations as computations
 
@@ -13,11 +12,12 @@ class BoardActions:
     def __init__(
         self,
         game_board_data: data.BoardData,
+        rng: random.Random,
     ):
         self._logger = structlog.get_logger()
         self.board_data: data.BoardData = game_board_data
-        with open("config.toml", mode="r") as fp:
-            self.config = toml.load(fp)
+        self.rng = rng
+        self.config = config.config
 
     def calc_target_coordinates(
         self,
@@ -68,21 +68,21 @@ class BoardActions:
         attacked = False
         team_that_killed = None
         if not actor.attack:
-            self._logger.warning(f"{actor} can not attack.")
+            self._logger.warning("%s can not attack.", actor)
         else:
             target_coordinates = self.calc_target_coordinates(actor, direction)
             target = self.board_data.coordinates_actors.get(target_coordinates)
             if target is None:
                 self._logger.warning(
-                    f"No target on target coordinates {target_coordinates}."
+                    "No target on target coordinates %s.", target_coordinates
                 )
             else:
-                attack_successful = random.random() < actor.attack
+                attack_successful = self.rng.random() < actor.attack
                 attacked = True
                 if not attack_successful:
-                    self._logger.info(f"{actor} attacked and missed {target}.")
+                    self._logger.info("%s attacked and missed %s.", actor, target)
                 else:
-                    self._logger.info(f"{actor} attacked and hit {target}.")
+                    self._logger.info("%s attacked and hit %s.", actor, target)
                     self._respawn(target)
                     team_that_killed = actor.team
         return attacked, team_that_killed
@@ -90,49 +90,45 @@ class BoardActions:
     def build(self, actor: data.Actor, direction: 'computations.Directions') -> bool:
         built = False
         if not actor.build:
-            self._logger.warning(f"{actor} can not build.")
+            self._logger.warning("%s can not build.", actor)
         else:
             target_coordinates = self.calc_target_coordinates(actor, direction)
-            illegal_target = (
-                self.board_data.coordinates_actors.get(target_coordinates)
-                or self.board_data.coordinates_bases.get(target_coordinates)
-                or self.board_data.coordinates_flags.get(target_coordinates)
-                or target_coordinates in self.board_data.walls_coordinates
-            )
+            illegal_target = not self.board_data.is_empty(target_coordinates)
             if illegal_target:
                 self._logger.warning("Target field is either not empty.")
             else:
-                build_successful = random.random() < actor.build
+                build_successful = self.rng.random() < actor.build
                 built = True
                 if not build_successful:
                     self._logger.info("Building did not work.")
                 else:
                     self._logger.info(
-                        f"{actor} successfully built a wall at {target_coordinates}."
+                        "%s successfully built a wall at %s.", actor, target_coordinates
                     )
-                    self.board_data.walls_coordinates.add(target_coordinates)
+                    self.board_data.add_wall(target_coordinates)
         return built
 
     def destroy(self, actor: data.Actor, direction: 'computations.Directions') -> bool:
         destroyed = False
         if not actor.destroy:
-            self._logger.warning(f"{actor} can not destroy.")
+            self._logger.warning("%s can not destroy.", actor)
         else:
             target_coordinates = self.calc_target_coordinates(actor, direction)
             target = target_coordinates in self.board_data.walls_coordinates
             if not target:
                 self._logger.warning("Target field does not contain a wall.")
             else:
-                destroy_successful = random.random() < actor.destroy
+                destroy_successful = self.rng.random() < actor.destroy
                 destroyed = True
                 if not destroy_successful:
                     self._logger.info("Destruction did not work.")
                 else:
                     self._logger.info(
-                        f"{actor} successfully destroyed a wall at "
-                        " {target_coordinates}."
+                        "%s successfully destroyed a wall at %s.",
+                        actor,
+                        target_coordinates,
                     )
-                    self.board_data.walls_coordinates.add(target_coordinates)
+                    self.board_data.remove_wall(target_coordinates)
         return destroyed
 
     def grabput_flag(
@@ -141,7 +137,7 @@ class BoardActions:
         team_that_captured = None
         target_coordinates = self.calc_target_coordinates(actor, direction)
 
-        grab_successful = random.random() < actor.grab
+        grab_successful = self.rng.random() < actor.grab
         target_actor = self.board_data.coordinates_actors.get(target_coordinates)
         already_grabbed = False
         flag: data.Flag | None
@@ -152,22 +148,26 @@ class BoardActions:
             if target_actor is not None:
                 if not target_actor.grab:
                     self._logger.warning(
-                        f"{actor} can not hand the flag to actor {target_actor}. "
-                        " Can not have the flag."
+                        "%s can not hand the flag to actor %s. "
+                        " Can not have the flag.",
+                        actor,
+                        target_actor,
                     )
 
                 elif target_actor.flag is not None:
                     self._logger.warning(
-                        f"{actor} can not hand the flag to actor {target_actor}. "
-                        "Target already has a flag."
+                        "%s can not hand the flag to actor %s. "
+                        "Target already has a flag.",
+                        actor,
+                        target_actor,
                     )
 
                 else:
-                    self.board_data.flags_coordinates[flag] = target_coordinates
+                    self.board_data.place_flag(flag, target_coordinates)
                     actor.flag = None
                     target_actor.flag = flag
                     already_grabbed = True
-                    self._logger.info(f"{actor} handed the flag to {target_actor}.")
+                    self._logger.info("%s handed the flag to %s.", actor, target_actor)
                     team_that_captured = self._check_flag_return_conditions(
                         target_actor
                     )
@@ -175,43 +175,52 @@ class BoardActions:
             # no target actor, means empty field, wall or base (even a flag???)
             else:
                 if target_coordinates in self.board_data.walls_coordinates:
-                    self._logger.warning(f"{actor} can not hand the flag to a wall.")
+                    self._logger.warning("%s can not hand the flag to a wall.", actor)
 
                 # the flag was put on the field (maybe a base)
                 else:
-                    self.board_data.flags_coordinates[flag] = target_coordinates
+                    self.board_data.place_flag(flag, target_coordinates)
                     actor.flag = None
                     already_grabbed = True
                     self._logger.info(
-                        f"{actor} put the flag to coordinates {target_coordinates}."
+                        "%s put the flag to coordinates %s.", actor, target_coordinates
                     )
                     team_that_captured = self._check_capture_conditions(flag)
 
         # the actor does not have the flag
         else:
-            flag = self.board_data.coordinates_flags.get(target_coordinates)
+            flags = self.board_data.flags_at(target_coordinates)
+            # a flag carried by the target actor is grabbed first
+            if target_actor is not None and target_actor.flag is not None:
+                flag = target_actor.flag
+            else:
+                flag = flags[0] if flags else None
             if flag is None:
-                self._logger.warning(f"No flag at coordinates {target_coordinates}.")
+                self._logger.warning("No flag at coordinates %s.", target_coordinates)
             else:
                 if grab_successful:
-                    self.board_data.flags_coordinates[
-                        flag
-                    ] = self.board_data.actors_coordinates[actor]
+                    self.board_data.place_flag(
+                        flag, self.board_data.actors_coordinates[actor]
+                    )
                     actor.flag = flag
                     already_grabbed = True
 
                     # and remove it from the target actor if there is one
-                    if target_actor is not None:
+                    if target_actor is not None and target_actor.flag == flag:
                         target_actor.flag = None
                         self._logger.info(
-                            f"{actor} grabbed the flag of {flag.team} from "
-                            "{target_actor}."
+                            "%s grabbed the flag of %s from %s.",
+                            actor,
+                            flag.team,
+                            target_actor,
                         )
                     else:
-                        self._logger.info(f"{actor} grabbed the flag of {flag.team}.")
+                        self._logger.info(
+                            "%s grabbed the flag of %s.", actor, flag.team
+                        )
                     team_that_captured = self._check_flag_return_conditions(actor=actor)
                 else:
-                    self._logger.info(f"{actor} grabbed and missed the flag.")
+                    self._logger.info("%s grabbed and missed the flag.", actor)
 
         return already_grabbed, team_that_captured
 
@@ -245,7 +254,7 @@ class BoardActions:
                     == self.board_data.bases_coordinates[data.Base(team=scoring_team)]
                 ) or (not self.config["game"]["home_flag_required"]):
                     self._logger.info(
-                        f"{scoring_team} captured {flag_to_capture.team} flag!"
+                        "%s captured %s flag!", scoring_team, flag_to_capture.team
                     )
                     team_that_captured = scoring_team
                     # return the flag to the base it belongs to
@@ -256,67 +265,56 @@ class BoardActions:
 
     def _respawn(self, actor: data.Actor) -> None:
         base_coordinates = self.board_data.bases_coordinates[data.Base(team=actor.team)]
-        possible_spawn_points = []
-        for x in range(base_coordinates.x - 2, base_coordinates.x + 3):
-            for y in range(base_coordinates.y - 2, base_coordinates.y + 3):
-                try:
-                    possible_spawn_points.append(data.Coordinates(x=x, y=y))
-                # ignore impossible positions
-                except ValidationError:
-                    pass
-        actor_positions = list(self.board_data.actors_coordinates.values())
-        flag_positions = list(self.board_data.flags_coordinates.values())
-        base_positions = list(self.board_data.bases_coordinates.values())
-        walls_positions = list(self.board_data.walls_coordinates)
-        forbidden_positions = set(
-            flag_positions + actor_positions + base_positions + walls_positions
+        possible_spawn_points = computations.get_grid(
+            self.board_data.map_size
+        ).window(
+            range(base_coordinates.x - 2, base_coordinates.x + 3),
+            range(base_coordinates.y - 2, base_coordinates.y + 3),
         )
-        self._place_actor_in_area(actor, possible_spawn_points, forbidden_positions)
+        allowed_positions = [
+            coordinates
+            for coordinates in possible_spawn_points
+            if self.board_data.is_empty(coordinates)
+        ]
+        self._place_actor_in_area(actor, allowed_positions)
 
     def _return_flag_to_base(self, flag: data.Flag) -> None:
-        self.board_data.flags_coordinates[flag] = self.board_data.bases_coordinates[
-            data.Base(team=flag.team)
-        ]
+        self.board_data.place_flag(
+            flag, self.board_data.bases_coordinates[data.Base(team=flag.team)]
+        )
 
     def _check_flag_return_conditions(self, actor: data.Actor) -> data.Team | None:
         team_that_captured = None
         coordinates = self.board_data.actors_coordinates[actor]
-        if coordinates in self.board_data.flags_coordinates.values():
-            flag = self.board_data.coordinates_flags[coordinates]
+        # copy, returning a flag to its base changes the flags at the coordinates
+        for flag in list(self.board_data.flags_at(coordinates)):
             # if flag is own flag, return it to base
             if flag.team == actor.team:
                 self._return_flag_to_base(flag)
                 team_that_captured = self._check_capture_conditions()
-                if actor.flag:
+                if actor.flag == flag:
                     actor.flag = None
         return team_that_captured
 
     def _place_actor_in_area(
         self,
         actor: data.Actor,
-        possible_spawn_points: list[data.Coordinates],
-        forbidden_positions: set[data.Coordinates],
+        allowed_positions: list[data.Coordinates],
     ) -> None:
-        allowed_positions = set(possible_spawn_points) - set(forbidden_positions)
-        target_coordinates = random.choice(list(allowed_positions))
+        target_coordinates = self.rng.choice(allowed_positions)
         if actor.flag is not None:
-            self._logger.info(f"{actor} dropped flag {actor.flag}.")
+            self._logger.info("%s dropped flag %s.", actor, actor.flag)
             actor.flag = None
-        self.board_data.actors_coordinates[actor] = target_coordinates
-        self._logger.info(f"{actor} respawned to coordinates {target_coordinates}.")
+        self.board_data.place_actor(actor, target_coordinates)
+        self._logger.info("%s respawned to coordinates %s.", actor, target_coordinates)
 
     def _get_area_positions(
         self, center: data.Coordinates, distance: int
     ) -> list[data.Coordinates]:
-        positions: list[data.Coordinates] = []
-        for x in range(center.x - distance, center.x + distance):
-            for y in range(center.y - distance, center.y + distance):
-                try:
-                    positions.append(data.Coordinates(x=x, y=y))
-                    # ignore forbidden space out of bounds
-                except ValidationError:
-                    pass
-        return positions
+        return computations.get_grid(self.board_data.map_size).window(
+            range(center.x - distance, center.x + distance),
+            range(center.y - distance, center.y + distance),
+        )
 
     def _try_put_actor(
         self, actor: data.Actor, new_coordinates: data.Coordinates
@@ -326,22 +324,24 @@ class BoardActions:
 
         if coordinates == new_coordinates:
             self._logger.warning(
-                f"{actor} did not move. Target field is out of bounds."
+                "%s did not move. Target field is out of bounds.", actor
             )
         elif self.board_data.coordinates_actors.get(new_coordinates) is not None:
-            self._logger.warning(f"{actor} did not move. Target field is occupied.")
+            self._logger.warning("%s did not move. Target field is occupied.", actor)
         elif self.board_data.coordinates_bases.get(new_coordinates) is not None:
-            self._logger.warning(f"{actor} did not move. Target field is abase.")
+            self._logger.warning("%s did not move. Target field is abase.", actor)
         elif new_coordinates in self.board_data.walls_coordinates:
-            self._logger.warning(f"{actor} did not move. Target field is a wall.")
+            self._logger.warning("%s did not move. Target field is a wall.", actor)
         else:
-            self.board_data.actors_coordinates[actor] = new_coordinates
+            self.board_data.place_actor(actor, new_coordinates)
             moved = True
             # move flag if actor has it
             if actor.flag is not None:
                 flag = actor.flag
-                self.board_data.flags_coordinates[flag] = new_coordinates
+                self.board_data.place_flag(flag, new_coordinates)
 
-            self._logger.info(f"{actor} moved from {coordinates} to {new_coordinates}")
+            self._logger.info(
+                "%s moved from %s to %s", actor, coordinates, new_coordinates
+            )
 
         return moved
@@ -1,8 +1,8 @@
 import enum
+import functools
 from itertools import chain
 
 import ascifight.board.data as data
-import ascifight.globals as globals
 
 
 class Directions(str, enum.Enum):
@@ -12,22 +12,80 @@ class Directions(str, enum.Enum):
     up = "up"
 
 
+class Grid:
+    """All coordinates of a map, created once and shared by everybody using a map
+    of this size, and the target coordinates of every field in every direction."""
+
+    def __init__(self, map_size: int) -> None:
+        self.map_size = map_size
+        # bounds are known here, no need to validate every single field
+        self.coordinates: list[data.Coordinates] = [
+            data.Coordinates.model_construct(x=x, y=y)
+            for y in range(map_size)
+            for x in range(map_size)
+        ]
+        self.neighbours: dict[Directions, list[data.Coordinates]] = {
+            direction: [
+                self._calc_neighbour(coordinates, direction)
+                for coordinates in self.coordinates
+            ]
+            for direction in Directions
+        }
+
+    def index(self, coordinates: data.Coordinates) -> int:
+        return coordinates.y * self.map_size + coordinates.x
+
+    def get(self, x: int, y: int) -> data.Coordinates | None:
+        if 0 <= x < self.map_size and 0 <= y < self.map_size:
+            return self.coordinates[y * self.map_size + x]
+        return None
+
+    def at(self, x: int, y: int) -> data.Coordinates:
+        """The coordinates of a position known to be on the map."""
+        return self.coordinates[y * self.map_size + x]
+
+    def neighbour(
+        self, coordinates: data.Coordinates, direction: Directions
+    ) -> data.Coordinates:
+        return self.neighbours[direction][self.index(coordinates)]
+
+    def window(self, x_range: range, y_range: range) -> list[data.Coordinates]:
+        """All coordinates inside the ranges, ignoring positions out of bounds."""
+        return [
+            self.coordinates[y * self.map_size + x]
+            for x in x_range
+            if 0 <= x < self.map_size
+            for y in y_range
+            if 0 <= y < self.map_size
+        ]
+
+    def _calc_neighbour(
+        self, coordinates: data.Coordinates, direction: Directions
+    ) -> data.Coordinates:
+        x, y = coordinates.x, coordinates.y
+        match direction:
+            case Directions.right:
+                x = min(x + 1, self.map_size - 1)
+            case Directions.left:
+                x = max(x - 1, 0)
+            case Directions.up:
+                y = min(y + 1, self.map_size - 1)
+            case Directions.down:
+                y = max(y - 1, 0)
+        return self.coordinates[y * self.map_size + x]
+
+
+@functools.cache
+def get_grid(map_size: int) -> Grid:
+    return Grid(map_size)
+
+
 def calc_target_coordinates(
     coordinates: data.Coordinates,
     direction: Directions,
     map_size: int,
 ) -> data.Coordinates:
-    new_coordinates = data.Coordinates(x=coordinates.x, y=coordinates.y)
-    match direction:
-        case direction.right:
-            new_coordinates.x = min(coordinates.x + 1, map_size - 1)
-        case direction.left:
-            new_coordinates.x = max(coordinates.x - 1, 0)
-        case direction.up:
-            new_coordinates.y = min(coordinates.y + 1, map_size - 1)
-        case direction.down:
-            new_coordinates.y = max(coordinates.y - 1, 0)
-    return new_coordinates
+    return get_grid(map_size).neighbour(coordinates, direction)
 
 
 def calc_target_coordinate_direction(
@@ -79,13 +137,20 @@ def distance_vector(
     return x, y
 
 
-def nearest_enemy_coordinates(actor: data.Actor) -> data.Coordinates:
-    board = globals.my_game.board
+def nearest_enemy_coordinates(
+    board: data.BoardData, actor: data.Actor
+) -> data.Coordinates:
+    actor_coordinates = board.actors_coordinates[actor]
+    if board.layers is not None:
+        nearest = board.layers.nearest(
+            actor_coordinates, board.layers.enemy_actors(actor.team)
+        )
+        if nearest is not None:
+            return nearest
     all_actors = board.actors_of_team
     enemy_actors = chain.from_iterable(
         [actors for team, actors in all_actors.items() if team != actor.team.name]
     )
-    actor_coordinates = board.actors_coordinates[actor]
     result = []
     for enemy_actor in enemy_actors:
         enemy_coordinates = board.actors_coordinates[enemy_actor]
@@ -94,14 +159,22 @@ def nearest_enemy_coordinates(actor: data.Actor) -> data.Coordinates:
             enemy_coordinates,
         )
         result.append((dist, enemy_coordinates))
-    result.sort(key=lambda x: x[0])
+    # ties go to the lowest y and then x, the same as with board layers
+    result.sort(key=lambda x: (x[0], x[1].y, x[1].x))
     return result[0][1]
 
 
-def nearest_enemy_flag_coordinates(actor: data.Actor) -> data.Coordinates:
-    board = globals.my_game.board
-    flags = board.flags_coordinates
+def nearest_enemy_flag_coordinates(
+    board: data.BoardData, actor: data.Actor
+) -> data.Coordinates:
     actor_coordinates = board.actors_coordinates[actor]
+    if board.layers is not None:
+        nearest = board.layers.nearest(
+            actor_coordinates, board.layers.enemy_flags(actor.team)
+        )
+        if nearest is not None:
+            return nearest
+    flags = board.flags_coordinates
     result = []
     for flag, coordinates in flags.items():
         if flag.team != actor.team:
@@ -110,5 +183,5 @@ def nearest_enemy_flag_coordinates(actor: data.Actor) -> data.Coordinates:
                 coordinates,
             )
             result.append((dist, coordinates))
-    result.sort(key=lambda x: x[0])
+    result.sort(key=lambda x: (x[0], x[1].y, x[1].x))
     return result[0][1]
@@ -3,12 +3,15 @@ import sys
 import itertools
 import typing
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import structlog
 
 import ascifight.config as config
 import ascifight.util as util
 
+if typing.TYPE_CHECKING:
+    import ascifight.board.layers as layers
+
 
 class Team(BaseModel):
     name: str
@@ -26,6 +29,9 @@ class Team(BaseModel):
 
 
 class Coordinates(BaseModel):
+    # instances are shared between all users of a map, see computations.Grid
+    model_config = ConfigDict(frozen=True)
+
     x: int = Field(
         description="X coordinate is decreased by the 'left' and increased by the"
         " 'right' direction.",
@@ -43,7 +49,7 @@ class Coordinates(BaseModel):
         return f"({self.x}/{self.y})"
 
     def __eq__(self, another):
-        return (
+        return self is another or (
             hasattr(another, "x")
             and self.x == another.x
             and hasattr(another, "y")
@@ -166,6 +172,10 @@ class Wall(BoardObject):
     pass
 
 
+# how an empty field looks in the text image of the board
+empty_cell = "___"
+
+
 class BoardData:
     def __init__(
         self,
@@ -193,6 +203,13 @@ class BoardData:
         self.bases_coordinates: dict[Base, Coordinates] = {}
         self.walls_coordinates: set[Coordinates] = set()
 
+        # cell indexed occupancy, kept in sync by the place/wall methods below
+        self._coordinates_actors: dict[Coordinates, Actor] = {}
+        self._coordinates_flags: dict[Coordinates, list[Flag]] = {}
+        self._coordinates_bases: dict[Coordinates, Base] = {}
+        # optional array backed view, see layers.attach
+        self.layers: "layers.BoardLayers | None" = None
+
     @property
     def actors_of_team(self) -> dict[str, list[Actor]]:
         actors_of_team: dict[str, list[Actor]] = {}
@@ -205,16 +222,71 @@ class BoardData:
 
     @property
     def coordinates_actors(self) -> dict[Coordinates, Actor]:
-        return {v: k for k, v in self.actors_coordinates.items()}
+        return self._coordinates_actors
 
     @property
-    def coordinates_flags(self) -> dict[Coordinates, Flag]:
-        # TODO: multiple flags can be in a position! this code does not notice that
-        return {v: k for k, v in self.flags_coordinates.items()}
+    def coordinates_flags(self) -> dict[Coordinates, list[Flag]]:
+        # multiple flags can be in a position, e.g. carried onto a base
+        return self._coordinates_flags
 
     @property
     def coordinates_bases(self) -> dict[Coordinates, Base]:
-        return {v: k for k, v in self.bases_coordinates.items()}
+        return self._coordinates_bases
+
+    def flags_at(self, coordinates: Coordinates) -> list[Flag]:
+        return self._coordinates_flags.get(coordinates, [])
+
+    def is_empty(self, coordinates: Coordinates) -> bool:
+        return not (
+            coordinates in self._coordinates_actors
+            or coordinates in self._coordinates_flags
+            or coordinates in self._coordinates_bases
+            or coordinates in self.walls_coordinates
+        )
+
+    def place_actor(self, actor: Actor, coordinates: Coordinates) -> None:
+        old_coordinates = self.actors_coordinates.get(actor)
+        if old_coordinates is not None:
+            del self._coordinates_actors[old_coordinates]
+        self.actors_coordinates[actor] = coordinates
+        self._coordinates_actors[coordinates] = actor
+        if self.layers is not None:
+            self.layers.place_actor(actor, old_coordinates, coordinates)
+
+    def place_flag(self, flag: Flag, coordinates: Coordinates) -> None:
+        old_coordinates = self.flags_coordinates.get(flag)
+        if old_coordinates is not None:
+            flags = self._coordinates_flags[old_coordinates]
+            flags.remove(flag)
+            if not flags:
+                del self._coordinates_flags[old_coordinates]
+        self.flags_coordinates[flag] = coordinates
+        self._coordinates_flags.setdefault(coordinates, []).append(flag)
+        if self.layers is not None:
+            self.layers.place_flag(flag, old_coordinates, coordinates)
+
+    def place_base(self, base: Base, coordinates: Coordinates) -> None:
+        old_coordinates = self.bases_coordinates.get(base)
+        # setting up the board places bases again, maybe where another one was
+        if (
+            old_coordinates is not None
+            and self._coordinates_bases.get(old_coordinates) == base
+        ):
+            del self._coordinates_bases[old_coordinates]
+        self.bases_coordinates[base] = coordinates
+        self._coordinates_bases[coordinates] = base
+        if self.layers is not None:
+            self.layers.place_base(base, old_coordinates, coordinates)
+
+    def add_wall(self, coordinates: Coordinates) -> None:
+        self.walls_coordinates.add(coordinates)
+        if self.layers is not None:
+            self.layers.add_wall(coordinates)
+
+    def remove_wall(self, coordinates: Coordinates) -> None:
+        self.walls_coordinates.discard(coordinates)
+        if self.layers is not None:
+            self.layers.remove_wall(coordinates)
 
     def board_objects_coordinates(self, board_object: BoardObject) -> Coordinates:
         match board_object:
@@ -236,33 +308,46 @@ class BoardData:
     def get_all_objects(self, coordinates: Coordinates) -> list[BoardObject]:
         base = self.coordinates_bases.get(coordinates)
         actor = self.coordinates_actors.get(coordinates)
-        flags = self.coordinates_flags.get(coordinates)
+        flags = self.flags_at(coordinates)
         wall = Wall() if coordinates in self.walls_coordinates else None
-        objects = [base, actor, flags, wall]
+        objects = [base, actor, *flags, wall]
         return [i for i in objects if i is not None]
 
-    def image(self) -> str:
-        field = [["___" for _ in range(self.map_size)] for _ in range(self.map_size)]
-
-        for i, base in enumerate(self.bases_coordinates.values()):
-            field[base.y][
-                base.x
-            ] = f" {util.colors[i]}{util.base_icon}{util.colors['revert']} "
+    def cells(self) -> dict[tuple[int, int], str]:
+        """The text of every field that is not empty, three characters wide
+        without the color codes."""
+        cells: dict[tuple[int, int], str] = {}
+        for base, coordinates in self.bases_coordinates.items():
+            color = util.colors[base.team.number]
+            cells[
+                (coordinates.x, coordinates.y)
+            ] = f" {color}{util.base_icon}{util.colors['revert']} "
         for actor, coordinates in self.actors_coordinates.items():
             char = actor.__class__.__name__[0].upper()
             number = actor.ident
             color = util.colors[actor.team.number]
-            field[coordinates.y][
-                coordinates.x
+            cells[
+                (coordinates.x, coordinates.y)
             ] = f"{color}{char}{number}{util.colors['revert']} "
         for flag, coordinates in self.flags_coordinates.items():
             color = util.colors[flag.team.number]
-            before = field[coordinates.y][coordinates.x]
-            field[coordinates.y][coordinates.x] = (
-                before[:-2] + f" {color}{util.flag_icon}{util.colors['revert']}"
+            before = cells.get((coordinates.x, coordinates.y), empty_cell)
+            # the flag replaces the trailing space, cutting two characters off
+            # a colored field would break its color codes
+            before = before[:-1] if before.endswith(" ") else before[:-2] + " "
+            cells[(coordinates.x, coordinates.y)] = (
+                before + f"{color}{util.flag_icon}{util.colors['revert']}"
             )
         for wall_coordinate in self.walls_coordinates:
-            field[wall_coordinate.y][wall_coordinate.x] = util.wall_icon
+            cells[(wall_coordinate.x, wall_coordinate.y)] = util.wall_icon
+        return cells
+
+    def image(self) -> str:
+        field = [
+            [empty_cell for _ in range(self.map_size)] for _ in range(self.map_size)
+        ]
+        for (x, y), cell in self.cells().items():
+            field[y][x] = cell
         for row in field:
             row.append("\n")
         # reverse so (0,0) is lower left not upper left
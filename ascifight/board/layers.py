@@ -0,0 +1,103 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, boards work without layers
+    np = None  # type: ignore
+
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+
+
+class BoardLayers:
+    """An array backed view of the board with one plane per object kind and
+    team, indexed [team, y, x]. Actor planes hold the actor ident + 1, all
+    others hold 1 for an occupied field. Kept in sync by BoardData.
+
+    The layers answer questions about the whole board, like the nearest enemy.
+    Single fields are looked up in the field indexes of BoardData."""
+
+    def __init__(self, board: data.BoardData) -> None:
+        if np is None:
+            raise ImportError("Board layers require numpy to be installed.")
+        self.map_size = board.map_size
+        teams = len(board.teams)
+        shape = (teams, self.map_size, self.map_size)
+        self.actors = np.zeros(shape, dtype=np.int16)
+        self.flags = np.zeros(shape, dtype=np.uint8)
+        self.bases = np.zeros(shape, dtype=np.uint8)
+        self.walls = np.zeros(shape[1:], dtype=np.uint8)
+        self._ys, self._xs = np.indices(shape[1:], dtype=np.int32)
+
+        for actor, coordinates in board.actors_coordinates.items():
+            self.place_actor(actor, None, coordinates)
+        for flag, coordinates in board.flags_coordinates.items():
+            self.place_flag(flag, None, coordinates)
+        for base, coordinates in board.bases_coordinates.items():
+            self.place_base(base, None, coordinates)
+        for coordinates in board.walls_coordinates:
+            self.add_wall(coordinates)
+
+    def place_actor(
+        self,
+        actor: data.Actor,
+        old: data.Coordinates | None,
+        new: data.Coordinates,
+    ) -> None:
+        plane = self.actors[actor.team.number]
+        if old is not None:
+            plane[old.y, old.x] = 0
+        plane[new.y, new.x] = actor.ident + 1
+
+    def place_flag(
+        self,
+        flag: data.Flag,
+        old: data.Coordinates | None,
+        new: data.Coordinates,
+    ) -> None:
+        plane = self.flags[flag.team.number]
+        if old is not None:
+            plane[old.y, old.x] = 0
+        plane[new.y, new.x] = 1
+
+    def place_base(
+        self,
+        base: data.Base,
+        old: data.Coordinates | None,
+        new: data.Coordinates,
+    ) -> None:
+        plane = self.bases[base.team.number]
+        if old is not None:
+            plane[old.y, old.x] = 0
+        plane[new.y, new.x] = 1
+
+    def add_wall(self, coordinates: data.Coordinates) -> None:
+        self.walls[coordinates.y, coordinates.x] = 1
+
+    def remove_wall(self, coordinates: data.Coordinates) -> None:
+        self.walls[coordinates.y, coordinates.x] = 0
+
+    def enemy_actors(self, team: data.Team) -> "np.ndarray":
+        return np.delete(self.actors, team.number, axis=0).any(axis=0)
+
+    def enemy_flags(self, team: data.Team) -> "np.ndarray":
+        return np.delete(self.flags, team.number, axis=0).any(axis=0)
+
+    def distances(self, origin: data.Coordinates) -> "np.ndarray":
+        return np.abs(self._xs - origin.x) + np.abs(self._ys - origin.y)
+
+    def nearest(
+        self, origin: data.Coordinates, mask: "np.ndarray"
+    ) -> data.Coordinates | None:
+        """The coordinates of the field in mask closest to origin. Of fields at
+        the same distance the one with the lowest y and then x is taken, like
+        the lookups without layers do."""
+        if not mask.any():
+            return None
+        distances = np.where(mask, self.distances(origin), np.iinfo(np.int32).max)
+        y, x = np.unravel_index(np.argmin(distances), distances.shape)
+        return computations.get_grid(self.map_size).get(int(x), int(y))
+
+
+def attach(board: data.BoardData) -> BoardLayers:
+    """Create layers for the current state of the board and keep them in sync."""
+    board.layers = BoardLayers(board)
+    return board.layers
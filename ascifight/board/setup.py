@@ -1,10 +1,9 @@
-from pydantic import ValidationError
 import structlog
 
 import random
-import itertools
 
 import ascifight.board.data as data
+import ascifight.board.computations as computations
 
 
 class BoardSetup:
@@ -15,8 +14,10 @@ class BoardSetup:
         actors: list[str],
         map_size: int,
         walls: int,
+        rng: random.Random,
     ):
         self._logger = structlog.get_logger()
+        self.rng = rng
 
         self.map_size = map_size
         self.board_data = game_board_data
@@ -57,61 +58,54 @@ class BoardSetup:
 
     def _place_bases_and_flags(self) -> None:
         minimum_distance = int((self.map_size**2 / len(self.teams)) ** 0.5 / 1.2) - 1
-        available_places = [
-            data.Coordinates(x=i, y=j)
-            for i in range(2, self.map_size - 2)
-            for j in range(2, self.map_size - 2)
-        ]
+        grid = computations.get_grid(self.map_size)
+        available_places = grid.window(
+            range(2, self.map_size - 2), range(2, self.map_size - 2)
+        )
         i = 0
         while i < len(self.teams):
             team = self.teams[i]
             if not available_places:
                 i = 0
-                available_places = [
-                    data.Coordinates(x=i, y=j)
-                    for i in range(2, self.map_size - 2)
-                    for j in range(2, self.map_size - 2)
-                ]
+                available_places = grid.window(
+                    range(2, self.map_size - 2), range(2, self.map_size - 2)
+                )
             else:
-                place_chosen = random.choice(available_places)
-                available_places = [
-                    i
-                    for i in available_places
-                    if i not in self._get_area_positions(place_chosen, minimum_distance)
-                ]
-                self.board_data.bases_coordinates[data.Base(team=team)] = place_chosen
-                self.board_data.flags_coordinates[data.Flag(team=team)] = place_chosen
+                place_chosen = self.rng.choice(available_places)
+                too_close = set(
+                    self._get_area_positions(place_chosen, minimum_distance)
+                )
+                available_places = [i for i in available_places if i not in too_close]
+                self.board_data.place_base(data.Base(team=team), place_chosen)
+                self.board_data.place_flag(data.Flag(team=team), place_chosen)
                 i += 1
 
     def _get_area_positions(
         self, center: data.Coordinates, distance: int
     ) -> list[data.Coordinates]:
-        positions: list[data.Coordinates] = []
-        for x in range(center.x - distance, center.x + distance):
-            for y in range(center.y - distance, center.y + distance):
-                try:
-                    positions.append(data.Coordinates(x=x, y=y))
-                    # ignore forbidden space out of bounds
-                except ValidationError:
-                    pass
-        return positions
+        return computations.get_grid(self.map_size).window(
+            range(center.x - distance, center.x + distance),
+            range(center.y - distance, center.y + distance),
+        )
 
     def _place_actors(self, actors: list[data.Actor], base: data.Coordinates) -> None:
         starting_places = self._get_area_positions(base, 2)
         starting_places.remove(base)
-        random.shuffle(starting_places)
+        self.rng.shuffle(starting_places)
         starting_places = starting_places[: len(actors)]
         for actor, coordinates in zip(actors, starting_places):
-            self.board_data.actors_coordinates[actor] = coordinates
+            self.board_data.place_actor(actor, coordinates)
 
     def _place_walls(self) -> None:
         forbidden_positions = set()
         for base_coordinates in self.board_data.bases_coordinates.values():
             forbidden_positions.update(self._get_area_positions(base_coordinates, 3))
-        all_combinations = itertools.product(
-            *[range(self.map_size), range(self.map_size)]
-        )
-        all_positions = {data.Coordinates(x=i[0], y=i[1]) for i in all_combinations}
-        possible_coordinates = list(all_positions - forbidden_positions)
-        random.shuffle(possible_coordinates)
-        self.board_data.walls_coordinates = set(possible_coordinates[: self.walls])
+        all_positions = computations.get_grid(self.map_size).coordinates
+        possible_coordinates = [
+            coordinates
+            for coordinates in all_positions
+            if coordinates not in forbidden_positions
+        ]
+        self.rng.shuffle(possible_coordinates)
+        for coordinates in possible_coordinates[: self.walls]:
+            self.board_data.add_wall(coordinates)
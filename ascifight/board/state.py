@@ -0,0 +1,124 @@
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+
+# (team number, actor ident) -> (x, y, team number of the carried flag or None)
+ActorPositions = dict[tuple[int, int], tuple[int, int, int | None]]
+# team number -> (x, y)
+Positions = dict[int, tuple[int, int]]
+# team number -> (x, y, place of the flag in the stack of flags on its field)
+FlagPositions = dict[int, tuple[int, int, int]]
+
+
+class BoardDelta:
+    """What changed on a board between two states."""
+
+    def __init__(
+        self,
+        actors: ActorPositions,
+        flags: FlagPositions,
+        walls_added: set[tuple[int, int]],
+        walls_removed: set[tuple[int, int]],
+    ) -> None:
+        self.actors = actors
+        self.flags = flags
+        self.walls_added = walls_added
+        self.walls_removed = walls_removed
+
+    def __bool__(self) -> bool:
+        return bool(self.actors or self.flags or self.walls_added or self.walls_removed)
+
+
+class BoardState:
+    """A compact copy of all positions on a board. Bases never move, so they are
+    part of the state but not of deltas."""
+
+    def __init__(
+        self,
+        actors: ActorPositions,
+        flags: FlagPositions,
+        bases: Positions,
+        walls: set[tuple[int, int]],
+    ) -> None:
+        self.actors = actors
+        self.flags = flags
+        self.bases = bases
+        self.walls = walls
+
+    @classmethod
+    def capture(cls, board: data.BoardData) -> "BoardState":
+        return cls(
+            actors={
+                (actor.team.number, actor.ident): (
+                    coordinates.x,
+                    coordinates.y,
+                    actor.flag.team.number if actor.flag else None,
+                )
+                for actor, coordinates in board.actors_coordinates.items()
+            },
+            flags={
+                flag.team.number: (coordinates.x, coordinates.y, place)
+                for coordinates, flags in board.coordinates_flags.items()
+                for place, flag in enumerate(flags)
+            },
+            bases={
+                base.team.number: (coordinates.x, coordinates.y)
+                for base, coordinates in board.bases_coordinates.items()
+            },
+            walls={
+                (coordinates.x, coordinates.y)
+                for coordinates in board.walls_coordinates
+            },
+        )
+
+    def diff(self, newer: "BoardState") -> BoardDelta:
+        return BoardDelta(
+            actors={
+                key: value
+                for key, value in newer.actors.items()
+                if self.actors.get(key) != value
+            },
+            flags={
+                key: value
+                for key, value in newer.flags.items()
+                if self.flags.get(key) != value
+            },
+            walls_added=newer.walls - self.walls,
+            walls_removed=self.walls - newer.walls,
+        )
+
+    def apply(self, delta: BoardDelta) -> "BoardState":
+        return BoardState(
+            actors=self.actors | delta.actors,
+            flags=self.flags | delta.flags,
+            bases=self.bases,
+            walls=(self.walls - delta.walls_removed) | delta.walls_added,
+        )
+
+    def to_board(
+        self, teams: list[str], actors: list[str], map_size: int
+    ) -> data.BoardData:
+        """Build a board with the given teams and actors in this state."""
+        board = data.BoardData(
+            teams=[{"name": team, "password": ""} for team in teams],
+            actors=actors,
+            map_size=map_size,
+            walls=0,
+        )
+        grid = computations.get_grid(map_size)
+        for number, (x, y) in self.bases.items():
+            board.place_base(data.Base(team=board.teams[number]), grid.at(x, y))
+        # grabbing takes the first flag of a field, stacked flags keep their order
+        for number, (x, y, _) in sorted(
+            self.flags.items(), key=lambda item: item[1][2]
+        ):
+            board.place_flag(data.Flag(team=board.teams[number]), grid.at(x, y))
+        for (number, ident), (x, y, flag) in self.actors.items():
+            team = board.teams[number]
+            actor = board.actor_classes[ident](ident=ident, team=team)
+            if flag is not None:
+                actor.flag = data.Flag(team=board.teams[flag])
+            board.teams_actors[(team, ident)] = actor
+            board.place_actor(actor, grid.at(x, y))
+        for x, y in self.walls:
+            board.add_wall(grid.at(x, y))
+        return board
@@ -19,9 +19,8 @@ client = None
 proxy = None
 
 
-def execute():
+def execute(state):
     # put your execution code here
-    state = get_information("game_state")
     rules = get_information("game_rules")
     #teams = state["teams"].copy()
 
@@ -89,24 +88,26 @@ def get_information(info_type: str):
 
 
 
+def wait_for_next_tick(tick: int):
+    url = SERVER + "states/next_tick"
+    # the server answers at the latest after its timeout with the current state
+    response = client.get(url, params={"after": tick, "timeout": 30}, timeout=40)
+    return response.json()
+
+
 def game_loop():
     current_tick = -1
     while True:
         try:
-            timing = get_information("timing")
-            # if the game tarted a new tick we need to issue orders
-            if timing["tick"] != current_tick:
-                if timing["tick"] < current_tick:
-                    # the game may have restarted, reset tick
-                    current_tick = timing["tick"]
-                execute()
-                current_tick = timing["tick"]
+            if current_tick < 0:
+                state = get_information("game_state")
+            else:
+                # returns as soon as the next tick was executed or a new game started
+                state = wait_for_next_tick(current_tick)
+            if state["tick"] != current_tick:
+                execute(state)
+                current_tick = state["tick"]
                 logger.info(f"Issued orders for tick {current_tick}.")
-            # sleep the time the server says it will take till next tick
-            sleep_duration_time = timing["time_to_next_execution"]
-            logger.info(f"sleeping for {sleep_duration_time} seconds.")
-            if sleep_duration_time >= 0:
-                time.sleep(sleep_duration_time)
         except httpx.ConnectError:
             logger.info("Server not started. Sleeping 5 seconds.")
             current_tick = -1
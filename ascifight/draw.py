@@ -1,4 +1,7 @@
+import enum
+import functools
 import io
+import os
 
 import pydantic
 from PIL import Image, ImageDraw, ImageFont
@@ -8,8 +11,37 @@ import ascifight.board.data as data
 import ascifight.util as util
 
 
-factor = int(config.config["image"]["size"] / config.config["game"]["map_size"])
-map_size: int = config.config["game"]["map_size"]
+font_path = os.path.join(os.path.dirname(__file__), "FreeMonoBold.ttf")
+
+
+# x_min, y_min, x_max, y_max of fields, all included
+Region = tuple[int, int, int, int]
+
+# longest side of any image drawn, bounds the memory of a request
+max_image_side = 4096
+# full map backgrounds up to this many pixels are kept by their renderer
+max_cached_background = 1024 * 1024
+
+
+class ImageFormat(str, enum.Enum):
+    png = "png"
+    fast_png = "fast_png"
+    webp = "webp"
+
+
+image_format_options: dict[ImageFormat, dict] = {
+    ImageFormat.png: {"format": "png"},
+    # bigger, but encoded in half the time
+    ImageFormat.fast_png: {"format": "png", "compress_level": 1},
+    # smaller than png
+    ImageFormat.webp: {"format": "webp", "quality": 80},
+}
+
+media_types: dict[ImageFormat, str] = {
+    ImageFormat.png: "image/png",
+    ImageFormat.fast_png: "image/png",
+    ImageFormat.webp: "image/webp",
+}
 
 
 class Icon(pydantic.BaseModel):
@@ -18,76 +50,140 @@ class Icon(pydantic.BaseModel):
     color: str
 
 
-def draw_objects(
-    image_draw,
-    icon: Icon,
-    fnt=ImageFont.truetype("FreeMonoBold.ttf", int(factor / 2)),
-):
-    image_draw.text(
-        (
-            3 + icon.coordinates.x * factor,
-            factor * map_size - int(factor * 3 / 4) - icon.coordinates.y * factor,
-        ),
-        icon.name,
-        font=fnt,
-        fill=util.color_rgb_mapping[icon.color],
-    )
+class MapRenderer:
+    """Draws maps of one size. A sprite per glyph and color is made once, drawing
+    a map only pastes the sprites of its icons on a checkerboard background.
+    The background of the whole map is kept if it is small, regions get a
+    background of their own size."""
+
+    def __init__(self, map_size: int, image_size: int) -> None:
+        self.map_size = map_size
+        self.factor = int(image_size / map_size)
+        self.font = ImageFont.truetype(font_path, max(1, int(self.factor / 2)))
+        self._full_background: Image.Image | None = None
+        self.glyphs: dict[str, Image.Image] = {}
+        self.sprites: dict[tuple[str, str], tuple[Image.Image, Image.Image]] = {}
+
+    def draw(
+        self,
+        icons: list[Icon],
+        annotations: list[Icon],
+        region: Region | None = None,
+    ) -> Image.Image:
+        """Draw the whole map or only the fields in region."""
+        x_min, y_min, x_max, y_max = region or (
+            0,
+            0,
+            self.map_size - 1,
+            self.map_size - 1,
+        )
+        if region is None:
+            image = self.background.copy()
+        else:
+            image = self._background(region)
+        for x_offset, drawn in [
+            (3, icons),
+            # annotations are drawn on the right side of the field
+            (int(self.factor * 2 / 3), annotations),
+        ]:
+            for icon in drawn:
+                x, y = icon.coordinates.x, icon.coordinates.y
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    colored, mask = self.sprite(icon.name, icon.color)
+                    image.paste(
+                        colored,
+                        (
+                            x_offset + (x - x_min) * self.factor,
+                            self.factor * (y_max + 1)
+                            - int(self.factor * 3 / 4)
+                            - y * self.factor,
+                        ),
+                        mask,
+                    )
+        return image
+
+    def glyph(self, name: str) -> Image.Image:
+        """The mask of the text, it starts at the top left corner."""
+        if name not in self.glyphs:
+            _, _, width, height = self.font.getbbox(name)
+            mask = Image.new("L", (int(width), int(height)), 0)
+            ImageDraw.Draw(mask).text((0, 0), name, font=self.font, fill=255)
+            self.glyphs[name] = mask
+        return self.glyphs[name]
+
+    def sprite(self, name: str, color: str) -> tuple[Image.Image, Image.Image]:
+        """The colored text and its mask."""
+        if (name, color) not in self.sprites:
+            mask = self.glyph(name)
+            colored = Image.new("RGB", mask.size, util.color_rgb_mapping[color])
+            self.sprites[(name, color)] = (colored, mask)
+        return self.sprites[(name, color)]
+
+    @property
+    def background(self) -> Image.Image:
+        """The background of the whole map."""
+        if self._full_background is not None:
+            return self._full_background
+        background = self._background((0, 0, self.map_size - 1, self.map_size - 1))
+        if (self.factor * self.map_size) ** 2 <= max_cached_background:
+            self._full_background = background
+        return background
+
+    def _background(self, region: Region) -> Image.Image:
+        # dark grey fields, black where row + column is odd, counted from the
+        # upper left
+        x_min, y_min, x_max, y_max = region
+        width, height = x_max - x_min + 1, y_max - y_min + 1
+        image = Image.new("RGB", (width, height))
+        image.putdata(
+            [
+                (0, 0, 0) if (x + self.map_size - 1 - y) % 2 else (55, 55, 55)
+                for y in range(y_max, y_min - 1, -1)
+                for x in range(x_min, x_max + 1)
+            ]
+        )
+        return image.resize((self.factor * width, self.factor * height), Image.NEAREST)
 
 
-def draw_annotations(
-    image_draw,
-    icon: Icon,
-    fnt=ImageFont.truetype("FreeMonoBold.ttf", int(factor / 2)),
-):
-    image_draw.text(
-        (
-            int(factor * 2 / 3) + icon.coordinates.x * factor,
-            factor * map_size - int(factor * 3 / 4) - icon.coordinates.y * factor,
-        ),
-        icon.name,
-        font=fnt,
-        fill=util.color_rgb_mapping[icon.color],
-    )
+@functools.lru_cache(maxsize=16)
+def get_renderer(map_size: int, image_size: int) -> MapRenderer:
+    return MapRenderer(map_size, image_size)
 
 
 def draw_map(
     icons: list[Icon],
     annotations: list[Icon],
+    map_size: int = config.config["game"]["map_size"],
+    size: int | None = None,
+    region: Region | None = None,
+    image_format: ImageFormat = ImageFormat.png,
 ) -> bytes:
-    # Create new black image of entire board
-    w, h = config.config["game"]["map_size"], config.config["game"]["map_size"]
-    img = Image.new("RGB", (w, h), (55, 55, 55))
-    pixels = img.load()
-
-    # Make pixels "black" where (row+col) is odd
-    for i in range(w):
-        for j in range(h):
-            if (i + j) % 2:
-                # ignore wrong PIL type here
-                pixels[i, j] = (0, 0, 0)  # type: ignore
-
-    img = img.resize((factor * w, factor * h), Image.NEAREST)
-
-    # get a font
-    fnt = ImageFont.truetype("FreeMonoBold.ttf", int(factor / 2))
-
-    # get a drawing context
-    d = ImageDraw.Draw(img)
-
-    # draw multiline text
-    for icon in icons:
-        draw_objects(d, icon, fnt)
-    for annotation in annotations:
-        draw_annotations(d, annotation, fnt)
-    # img.save("test.png")
+    """Draw the map or a region of it, the longer side 'size' pixels or as big as
+    configured."""
+    x_min, y_min, x_max, y_max = region or (0, 0, map_size - 1, map_size - 1)
+    fields = max(x_max - x_min, y_max - y_min) + 1
+    if size is None:
+        factor = int(config.config["image"]["size"] / map_size)
+    else:
+        factor = size // fields
+    factor = max(1, min(factor, max_image_side // fields))
+    # small images are drawn small, not drawn big and scaled down
+    renderer = get_renderer(map_size, factor * map_size)
     buf = io.BytesIO()
-    img.save(buf, format="png")
+    renderer.draw(icons, annotations, region).save(
+        buf, **image_format_options[image_format]
+    )
     return buf.getvalue()
 
 
 def draw_game_map(board: data.BoardData) -> bytes:
+    return draw_map(*game_map_icons(board), map_size=board.map_size)
+
+
+def game_map_icons(board: data.BoardData) -> tuple[list[Icon], list[Icon]]:
+    """The icons and annotations of the board, draw them with draw_map."""
     actors = [
-        Icon(
+        Icon.model_construct(
             name=actor.__class__.__name__[0] + str(actor.ident),
             coordinates=coordinates,
             color=util.color_names[actor.team.number],
@@ -95,7 +191,7 @@ def draw_game_map(board: data.BoardData) -> bytes:
         for actor, coordinates in board.actors_coordinates.items()
     ]
     bases = [
-        Icon(
+        Icon.model_construct(
             name=util.base_icon,
             coordinates=coordinates,
             color=util.color_names[base.team.number],
@@ -103,7 +199,7 @@ def draw_game_map(board: data.BoardData) -> bytes:
         for base, coordinates in board.bases_coordinates.items()
     ]
     walls = [
-        Icon(
+        Icon.model_construct(
             name=util.wall_icon,
             coordinates=coordinates,
             color="white",
@@ -111,14 +207,14 @@ def draw_game_map(board: data.BoardData) -> bytes:
         for coordinates in board.walls_coordinates
     ]
     flags = [
-        Icon(
+        Icon.model_construct(
             name=util.flag_icon,
             coordinates=coordinates,
             color=util.color_names[flag.team.number],
         )
         for flag, coordinates in board.flags_coordinates.items()
     ]
-    return draw_map(actors + bases + walls, flags)
+    return actors + bases + walls, flags
 
 
 if __name__ == "__main__":
@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import TypeVar
+from typing import Sequence, TypeVar
+import random
+import secrets
 import structlog
 from structlog.contextvars import bind_contextvars, unbind_contextvars
 
 
 import ascifight.config as config
 import ascifight.util as util
+import ascifight.scores as scores
 import ascifight.board.data as data
 import ascifight.board.setup as setup
 import ascifight.board.actions as actions
@@ -103,6 +106,32 @@ class DestroyOrder(Order):
         return f"DestroyOrder by Actor {self.team}-{self.actor} -> {self.direction}"
 
 
+ActorOrder = AttackOrder | MoveOrder | GrabPutOrder | BuildOrder | DestroyOrder
+
+
+class OrderBook:
+    """The orders for the next tick. Only the latest order of each type per actor
+    is kept, it replaces earlier ones in place."""
+
+    def __init__(self) -> None:
+        self._orders: dict[tuple[str, int, type[Order]], ActorOrder] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def add(self, order: ActorOrder) -> bool:
+        """Add an order, returns if it replaced an earlier order."""
+        key = (order.team, order.actor, type(order))
+        replaced = key in self._orders
+        self._orders[key] = order
+        return replaced
+
+    def pop_all(self) -> list[ActorOrder]:
+        orders = list(self._orders.values())
+        self._orders = {}
+        return orders
+
+
 class Game:
     def __init__(
         self,
@@ -113,15 +142,25 @@ class Game:
         winning_bonus: int = config.config["game"]["winning_bonus"],
         max_ticks: int = config.config["game"]["max_ticks"],
         max_score: int = config.config["game"]["max_score"],
+        seed: int | None = None,
+        score_store: scores.ScoreStore | None = None,
     ) -> None:
+        """The scores are kept in score_store if given, else in score_file."""
         self.logger = structlog.get_logger()
+        # all randomness of a game comes from here, same seed and orders give the
+        # same game
+        self.seed: int = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        # tells the games apart for clients, seeds can repeat
+        self.ident: str = secrets.token_hex(8)
         self.score_file: str = score_file
+        self.score_store = score_store
         self.capture_score: int = capture_score
         self.kill_score: int = kill_score
         self.winning_bonus: int = winning_bonus
 
         self.board = game_board
-        self.board_actions = actions.BoardActions(self.board)
+        self.board_actions = actions.BoardActions(self.board, self.rng)
         self.scores: dict[data.Team, int] = {}
         self.overall_scores: dict[data.Team, int] = {}
         self.tick = 0
@@ -131,20 +170,32 @@ class Game:
     def initiate_game(self) -> None:
         game_board_setup = setup.BoardSetup(
             game_board_data=self.board,
-            teams=config.config["teams"],
-            actors=config.config["game"]["actors"],
-            map_size=config.config["game"]["map_size"],
-            walls=config.config["game"]["walls"],
+            teams=[
+                {"name": team.name, "password": team.password}
+                for team in self.board.teams
+            ],
+            actors=[actor.__name__ for actor in self.board.actor_classes],
+            map_size=self.board.map_size,
+            walls=self.board.walls,
+            rng=self.rng,
         )
         game_board_setup.initialize_map()
         self._set_scores()
         self._read_scores()
 
+    def resume_game(self, tick: int, scores: dict[str, int]) -> None:
+        """Continue a game at a tick on a board that is already set up."""
+        self._set_scores()
+        self._read_scores()
+        for team in self.board.teams:
+            self.scores[team] = scores[team.name]
+        self.tick = tick
+
     def end_game(self) -> None:
         self._write_scores()
         self.logger.info("Game ended.")
 
-    def execute_game_step(self, orders: list[Order]) -> None:
+    def execute_game_step(self, orders: Sequence[Order]) -> None:
         self.tick += 1
 
         move_orders: list[MoveOrder] = []
@@ -152,18 +203,16 @@ class Game:
         grabput_orders: list[GrabPutOrder] = []
         destroy_orders: list[DestroyOrder] = []
         build_orders: list[BuildOrder] = []
+        orders_of_type: dict[type[Order], list] = {
+            MoveOrder: move_orders,
+            AttackOrder: attack_orders,
+            GrabPutOrder: grabput_orders,
+            DestroyOrder: destroy_orders,
+            BuildOrder: build_orders,
+        }
 
         for order in orders:
-            if isinstance(order, MoveOrder):
-                move_orders.append(order)
-            elif isinstance(order, AttackOrder):
-                attack_orders.append(order)
-            elif isinstance(order, GrabPutOrder):
-                grabput_orders.append(order)
-            elif isinstance(order, DestroyOrder):
-                destroy_orders.append(order)
-            elif isinstance(order, BuildOrder):
-                build_orders.append(order)
+            orders_of_type[type(order)].append(order)
 
         self.logger.info("Executing move orders.")
         self._execute_move_orders(move_orders)
@@ -205,7 +254,8 @@ class Game:
             self.scores[team] = 0
             self.overall_scores[team] = 0
 
-    def _write_scores(self):
+    def final_scores(self) -> list[tuple[data.Team, int]]:
+        """The scores of the game as they count for the overall scores."""
         game_scores = []
         scores = sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
 
@@ -216,12 +266,27 @@ class Game:
             # leading team gets the winning bonus
             game_scores = [(scores[0][0], scores[0][1] + self.winning_bonus)]
             game_scores.extend([(team, score) for team, score in scores[1:]])
+        return game_scores
 
+    def _write_scores(self):
+        if self.score_store is not None:
+            self.score_store.add_game(
+                [(team.name, score) for team, score in self.final_scores()],
+                seed=self.seed,
+                ticks=self.tick,
+            )
+            return
         with open(self.score_file, "a") as score_file:
-            for score in game_scores:
+            for score in self.final_scores():
                 score_file.write(f"{score[0].name}: {score[1]}\n")
 
     def _read_scores(self):
+        if self.score_store is not None:
+            for team, score in self.score_store.totals().items():
+                # ignore score if team is not in current teams
+                if team in self.board.names_teams:
+                    self.overall_scores[self.board.names_teams[team]] += score
+            return
         try:
             with open(self.score_file, "r") as score_file:
                 for line in score_file:
@@ -247,13 +312,13 @@ class Game:
         already_moved = self._actor_dict(False)
         for order in move_orders:
             bind_contextvars(team=order.team)
-            self.logger.info(f"Executing {order}")
+            self.logger.info("Executing %s", order)
             actor = self.board.teams_actors[
                 (self.board.names_teams[order.team], order.actor)
             ]
             direction = order.direction
             if already_moved[actor]:
-                self.logger.warning(f"{actor} already moved this tick.")
+                self.logger.warning("%s already moved this tick.", actor, sample=True)
             else:
                 # if the actor can move
                 already_moved[actor], team_that_captured = self.board_actions.move(
@@ -268,13 +333,15 @@ class Game:
         already_attacked = self._actor_dict(False)
         for order in attack_orders:
             bind_contextvars(team=order.team)
-            self.logger.info(f"Executing {order}")
+            self.logger.info("Executing %s", order)
             actor = self.board.teams_actors[
                 (self.board.names_teams[order.team], order.actor)
             ]
 
             if already_attacked[actor]:
-                self.logger.warning(f"{actor} already attacked this tick.")
+                self.logger.warning(
+                    "%s already attacked this tick.", actor, sample=True
+                )
             else:
                 already_attacked[actor], team_that_killed = self.board_actions.attack(
                     actor, order.direction
@@ -288,7 +355,7 @@ class Game:
         already_grabbed = self._actor_dict(False)
         for order in grabput_orders:
             bind_contextvars(team=order.team)
-            self.logger.info(f"Executing {order}")
+            self.logger.info("Executing %s", order)
             actor = self.board.teams_actors[
                 (self.board.names_teams[order.team], order.actor)
             ]
@@ -300,20 +367,22 @@ class Game:
                 if team_that_captured:
                     self.scores[team_that_captured] += self.capture_score
             else:
-                self.logger.warning(f"{actor} already grabbed this tick.")
+                self.logger.warning("%s already grabbed this tick.", actor, sample=True)
         unbind_contextvars("team")
 
     def _execute_destroy_orders(self, destroy_orders: list[DestroyOrder]) -> None:
         already_destroyed = self._actor_dict(False)
         for order in destroy_orders:
             bind_contextvars(team=order.team)
-            self.logger.info(f"Executing {order}")
+            self.logger.info("Executing %s", order)
             actor = self.board.teams_actors[
                 (self.board.names_teams[order.team], order.actor)
             ]
 
             if already_destroyed[actor]:
-                self.logger.warning(f"{actor} already destroyed this tick.")
+                self.logger.warning(
+                    "%s already destroyed this tick.", actor, sample=True
+                )
             else:
                 already_destroyed[actor] = self.board_actions.destroy(
                     actor, order.direction
@@ -325,13 +394,13 @@ class Game:
         already_built = self._actor_dict(False)
         for order in build_orders:
             bind_contextvars(team=order.team)
-            self.logger.info(f"Executing {order}")
+            self.logger.info("Executing %s", order)
             actor = self.board.teams_actors[
                 (self.board.names_teams[order.team], order.actor)
             ]
 
             if already_built[actor]:
-                self.logger.warning(f"{actor} already built this tick.")
+                self.logger.warning("%s already built this tick.", actor, sample=True)
             else:
                 already_built[actor] = self.board_actions.build(actor, order.direction)
 
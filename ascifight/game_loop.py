@@ -2,93 +2,225 @@ import asyncio
 import importlib
 import datetime
 import os
-import logging
-import logging.handlers
+import time
 
 import structlog
 from structlog.contextvars import bind_contextvars
 
 import ascifight.config as config
 import ascifight.globals as globals
+import ascifight.logs as logs
 import ascifight.game as game
+import ascifight.replay as replay
+import ascifight.scores as scores
+import ascifight.snapshot as snapshot
+import ascifight.terminal as terminal
+import ascifight.board.data as data
+import ascifight.board.state as state
+import ascifight.board.layers as layers
 
-root_logger = logging.getLogger()
 logger = structlog.get_logger()
-SENTINEL = object()
 
 
-async def routine():
+async def routine(room: globals.Room):
+    bind_contextvars(room=room.name)
     while True:
-        await single_game()
+        await single_game(room)
+
+
+def new_game() -> game.Game:
+    """A game with the current config, which may have changed since import."""
+    game_config = config.config["game"]
+    return game.Game(
+        game_board=data.BoardData(
+            teams=config.config["teams"],
+            actors=game_config["actors"],
+            map_size=game_config["map_size"],
+            walls=game_config["walls"],
+        ),
+        score_file=config.config["server"]["scores_file"],
+        score_store=score_store(),
+        capture_score=game_config["capture_score"],
+        kill_score=game_config["kill_score"],
+        winning_bonus=game_config["winning_bonus"],
+        max_ticks=game_config["max_ticks"],
+        max_score=game_config["max_score"],
+        seed=game_config.get("seed"),
+    )
 
 
-async def single_game() -> None:
+async def single_game(room: globals.Room) -> None:
     importlib.reload(config)
-    importlib.reload(game)
 
     pre_game_wait = config.config["server"]["pre_game_wait"]
-    for handler in root_logger.handlers:
-        if isinstance(handler, logging.handlers.RotatingFileHandler):
-            handler.doRollover()
-    globals.my_game = game.Game()
-
-    logger.info("Initiating game.")
-    globals.my_game.initiate_game()
-
-    logger.info("Starting pre-game.")
-    globals.time_to_next_execution = pre_game_wait
-    globals.time_of_next_execution = datetime.datetime.now() + datetime.timedelta(
-        seconds=pre_game_wait
+    logs.rollover(room=room.name)
+    snapshot_dir = config.config["server"]["snapshot_dir"]
+    snapshot_interval = config.config["server"]["snapshot_interval"]
+    os.makedirs(snapshot_dir, exist_ok=True)
+    resumed = resume_game(room, snapshot_dir)
+    if resumed:
+        room.my_game, room.order_book, resumed_replay_file = resumed
+        logger.info("Resuming interrupted game at tick %s.", room.my_game.tick)
+        # the bots only need to reconnect, not to prepare for a new game
+        pre_game_wait = config.config["server"]["tick_wait_time"]
+        replay_file = resumed_replay_file or new_replay_file(room)
+    else:
+        room.my_game = new_game()
+        # orders do not carry over from the last game
+        room.order_book = game.OrderBook()
+
+        logger.info("Initiating game with seed %s.", room.my_game.seed)
+        room.my_game.initiate_game()
+        replay_file = new_replay_file(room)
+        snapshot.Snapshot.capture(room.my_game, replay_file).save(
+            snapshot.snapshot_path(snapshot_dir, room.name)
+        )
+    room.journal = snapshot.OrderJournal(
+        snapshot.journal_path(snapshot_dir, room.name), truncate=not resumed
     )
-    await asyncio.sleep(pre_game_wait)
+    if config.config["server"]["board_layers"]:
+        try:
+            layers.attach(room.my_game.board)
+        except ImportError:
+            logger.warning("Numpy is not installed, running without board layers.")
+    bind_contextvars(tick=room.my_game.tick)
+    logger.info("Recording replay to %s.", replay_file)
+    recorder = replay.ReplayWriter(replay_file, room.my_game, append=bool(resumed))
+    state_history = config.config["server"]["state_history"]
+    room.states = {}
+    room.remember_state(state_history)
+    room.tick_done()
+    console = new_console(room)
 
-    while not globals.my_game.check_game_end():
-        await globals.command_queue.put(SENTINEL)
-
-        commands = await get_all_queue_items(globals.command_queue)
-
-        bind_contextvars(tick=globals.my_game.tick)
-        os.system("cls" if os.name == "nt" else "clear")
-
-        print(globals.my_game.scoreboard())
-        print(globals.my_game.board.image())
+    logger.info("Starting pre-game.")
+    tick_wait_time = config.config["server"]["tick_wait_time"]
+    # absolute deadlines on the monotonic clock, work done in a tick is
+    # subtracted from the wait so ticks do not drift
+    deadline = time.monotonic() + pre_game_wait
+    room.time_to_next_execution = pre_game_wait
+    room.time_of_next_execution = wall_clock_time(deadline)
+    await asyncio.sleep(deadline - time.monotonic())
+
+    while not room.my_game.check_game_end():
+        tick_start = time.monotonic()
+        deadline += tick_wait_time
+        room.time_of_next_execution = wall_clock_time(deadline)
+
+        commands = room.order_book.pop_all()
+        room.journal.mark_tick(room.my_game.tick + 1)
+
+        bind_contextvars(tick=room.my_game.tick)
+        if console:
+            console.draw(room.my_game)
 
         logger.info("Starting tick execution.")
-        globals.my_game.execute_game_step(commands)
+        room.my_game.execute_game_step(commands)
+        # captured once, the replay and the state deltas share it
+        board_state = state.BoardState.capture(room.my_game.board)
+        recorder.record(commands, board_state)
+        room.remember_state(state_history, board_state)
+        room.tick_done()
+        if room.my_game.tick % snapshot_interval == 0:
+            snapshot.Snapshot.capture(room.my_game, replay_file).save(
+                snapshot.snapshot_path(snapshot_dir, room.name)
+            )
+
+        now = time.monotonic()
+        room.tick_duration = now - tick_start
+        room.tick_slack = deadline - now
+        logger.info(
+            "Tick took %.4f seconds, %.4f seconds left.",
+            room.tick_duration,
+            room.tick_slack,
+        )
+        if room.tick_slack < 0:
+            logger.warning("Tick took longer than the tick wait time.")
+            # start over from now instead of executing the missed ticks at once,
+            # the bots get a full tick wait time for the next orders
+            deadline = now + tick_wait_time
+            room.time_of_next_execution = wall_clock_time(deadline)
 
         logger.info("Waiting for game commands.")
-        globals.time_of_next_execution = datetime.datetime.now() + datetime.timedelta(
-            0, config.config["server"]["tick_wait_time"]
+        logger.info("Time of next execution: %s", room.time_of_next_execution)
+
+        await asyncio.sleep(max(0, deadline - time.monotonic()))
+    room.my_game.end_game()
+    recorder.close()
+    room.journal.close()
+    room.journal = None
+    snapshot.remove(snapshot_dir, room.name)
+    if console:
+        console.draw(room.my_game)
+
+
+def new_console(room: globals.Room) -> terminal.TerminalRenderer | None:
+    """Only the default room is shown on the console, the frames of several
+    rooms would overwrite each other."""
+    if not config.config["server"]["console_output"]:
+        return None
+    if room.name != config.config["server"]["rooms"][0]:
+        return None
+    return terminal.TerminalRenderer()
+
+
+def score_store() -> scores.ScoreStore:
+    """The store of the configured database, the scores file of earlier versions
+    is imported into it the first time."""
+    store = scores.get_store(config.config["server"]["scores_db"])
+    store.import_log(config.config["server"]["scores_file"])
+    return store
+
+
+def resume_game(
+    room: globals.Room, snapshot_dir: str
+) -> tuple[game.Game, game.OrderBook, str | None] | None:
+    """The interrupted game of the room. A game that can not be restored or was
+    played with other teams, actors or map size than configured now is not
+    resumed, a new game starts instead."""
+    game_config = config.config["game"]
+    board_config = (
+        [team["name"] for team in config.config["teams"]],
+        game_config["actors"],
+        game_config["map_size"],
+    )
+    try:
+        return snapshot.resume(
+            snapshot_dir,
+            room.name,
+            config.config["server"]["scores_file"],
+            score_store(),
+            board_config,
         )
-        logger.info(f"Time of next execution: {globals.time_of_next_execution}")
+    except Exception:
+        logger.warning(
+            "Could not resume the interrupted game, starting a new one.",
+            exc_info=True,
+        )
+        return None
+
 
-        await asyncio.sleep(config.config["server"]["tick_wait_time"])
-    globals.my_game.end_game()
-    os.system("cls" if os.name == "nt" else "clear")
-    print(globals.my_game.scoreboard())
-    print(globals.my_game.board.image())
+def new_replay_file(room: globals.Room) -> str:
+    replay_dir = config.config["server"]["replay_dir"]
+    os.makedirs(replay_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return os.path.join(
+        replay_dir, f"{room.name}-{timestamp}-{room.my_game.seed}.replay"
+    )
 
 
-async def get_all_queue_items(
-    queue: asyncio.Queue[game.Order | object],
-) -> list[game.Order]:
-    items: list[game.Order] = []
-    item = await queue.get()
-    while item is not SENTINEL:
-        items.append(item)  # type: ignore
-        queue.task_done()
-        item = await queue.get()
-    queue.task_done()
-    return items
+def wall_clock_time(monotonic_time: float) -> datetime.datetime:
+    return datetime.datetime.now() + datetime.timedelta(
+        seconds=monotonic_time - time.monotonic()
+    )
 
 
-async def ai_generator():
+async def ai_generator(room: globals.Room):
     import ascifight.board.computations
 
     await asyncio.sleep(1)
     while True:
         await asyncio.sleep(5)
-        await globals.command_queue.put(
+        room.order_book.add(
             game.MoveOrder(
                 team="Team 1",
                 actor=0,
@@ -96,7 +228,7 @@ async def ai_generator():
             )
         )
         await asyncio.sleep(5)
-        await globals.command_queue.put(
+        room.order_book.add(
             game.MoveOrder(
                 team="Team 2",
                 actor=0,
@@ -1,11 +1,47 @@
-import datetime
 import asyncio
-
+import datetime
 
 import ascifight.game as game
+import ascifight.snapshot as snapshot
+import ascifight.board.state as state
+
+
+class Room:
+    """A game room running its own games with its own orders and timing."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # TODO: fix times if game has not yet started
+        self.time_to_next_execution: float
+        self.time_of_next_execution: datetime.datetime
+        # how long the last tick took to execute and how much of the wait was left
+        self.tick_duration: float = 0.0
+        self.tick_slack: float = 0.0
+        self.my_game: game.Game
+        self.order_book: game.OrderBook = game.OrderBook()
+        self.journal: snapshot.OrderJournal | None = None
+        self.task: asyncio.Task | None = None
+        # the board states of the last ticks, for sending only what changed
+        self.states: dict[int, state.BoardState] = {}
+        # set and replaced after every tick, waiters get the event of the next tick
+        self.tick_event = asyncio.Event()
+
+    def remember_state(
+        self, history: int, board_state: state.BoardState | None = None
+    ) -> None:
+        """Keep the board state of the current tick and forget old ones. Pass the
+        state if it was already captured this tick."""
+        tick = self.my_game.tick
+        if board_state is None:
+            board_state = state.BoardState.capture(self.my_game.board)
+        self.states[tick] = board_state
+        self.states.pop(tick - history, None)
+
+    def tick_done(self) -> None:
+        """Wake up everyone waiting for the next tick."""
+        event = self.tick_event
+        self.tick_event = asyncio.Event()
+        event.set()
+
 
-# TODO: fix times if game has not yet started
-time_to_next_execution: datetime.timedelta
-time_of_next_execution: datetime.datetime
-my_game: game.Game
-command_queue: asyncio.Queue[game.Order | object] = asyncio.Queue()
+rooms: dict[str, Room] = {}
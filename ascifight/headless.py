@@ -0,0 +1,236 @@
+import argparse
+import logging
+import os
+import random
+import time
+from typing import Callable
+
+from pydantic import BaseModel, Field
+import structlog
+
+import ascifight.config as config
+import ascifight.game as game
+import ascifight.replay as replay
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+import ascifight.board.layers as layers
+
+# gets the running game and the team to give orders for
+OrderProvider = Callable[[game.Game, data.Team], list[game.ActorOrder]]
+
+
+class GameResult(BaseModel):
+    """The outcome of a single headless game."""
+
+    scores: dict[str, int] = Field(description="The scores of the game per team.")
+    final_scores: dict[str, int] = Field(
+        description="The scores including the winning bonus, as they are added to "
+        "the overall scores."
+    )
+    ticks: int = Field(description="The number of ticks the game lasted.")
+    seed: int = Field(description="The seed the game was played with.")
+    duration: float = Field(description="The wall clock time of the game in seconds.")
+
+
+class BenchmarkResult(BaseModel):
+    """The outcome of a series of headless games."""
+
+    results: list[GameResult] = Field(description="The results of all games.")
+    duration: float = Field(description="The wall clock time of all games.")
+
+    @property
+    def games_per_second(self) -> float:
+        return len(self.results) / self.duration
+
+    @property
+    def ticks_per_second(self) -> float:
+        return sum(result.ticks for result in self.results) / self.duration
+
+
+def idle(current_game: game.Game, team: data.Team) -> list[game.ActorOrder]:
+    return []
+
+
+def random_orders(current_game: game.Game, team: data.Team) -> list[game.ActorOrder]:
+    order_types: list[type[game.ActorOrder]] = [
+        game.MoveOrder,
+        game.MoveOrder,
+        game.AttackOrder,
+        game.GrabPutOrder,
+    ]
+    return [
+        random.choice(order_types)(
+            team=team.name,
+            actor=actor.ident,
+            direction=random.choice(list(computations.Directions)),
+        )
+        for actor in current_game.board.actors_of_team[team.name]
+    ]
+
+
+def flag_runner(current_game: game.Game, team: data.Team) -> list[game.ActorOrder]:
+    """Walk straight to the nearest enemy flag, grab it and bring it home."""
+    board = current_game.board
+    home = board.bases_coordinates[data.Base(team=team)]
+    orders: list[game.ActorOrder] = []
+    for actor in board.actors_of_team[team.name]:
+        if not actor.grab:
+            continue
+        coordinates = board.actors_coordinates[actor]
+        target = (
+            home
+            if actor.flag is not None
+            else computations.nearest_enemy_flag_coordinates(board, actor)
+        )
+        if coordinates == target:
+            continue
+        direction = random.choice(
+            computations.calc_target_coordinate_direction(coordinates, target)
+        )
+        order_type: type[game.ActorOrder] = (
+            game.GrabPutOrder
+            if computations.distance(coordinates, target) == 1
+            else game.MoveOrder
+        )
+        orders.append(
+            order_type(team=team.name, actor=actor.ident, direction=direction)
+        )
+    return orders
+
+
+strategies: dict[str, OrderProvider] = {
+    "idle": idle,
+    "random": random_orders,
+    "flag_runner": flag_runner,
+}
+
+
+def run_game(
+    order_providers: dict[str, OrderProvider],
+    actors: list[str] = config.config["game"]["actors"],
+    map_size: int = config.config["game"]["map_size"],
+    walls: int = config.config["game"]["walls"],
+    max_ticks: int = config.config["game"]["max_ticks"],
+    max_score: int = config.config["game"]["max_score"],
+    score_file: str = os.devnull,
+    board_layers: bool = False,
+    seed: int | None = None,
+    replay_file: str | None = None,
+) -> GameResult:
+    """Run a complete game without waiting between ticks. Every team is named
+    after the key of its order provider. The game is recorded to 'replay_file'
+    if given."""
+    start = time.perf_counter()
+    board = data.BoardData(
+        teams=[{"name": name, "password": ""} for name in order_providers],
+        actors=actors,
+        map_size=map_size,
+        walls=walls,
+    )
+    current_game = game.Game(
+        game_board=board,
+        score_file=score_file,
+        max_ticks=max_ticks,
+        max_score=max_score,
+        seed=seed,
+    )
+    current_game.initiate_game()
+    if board_layers:
+        layers.attach(board)
+    recorder = replay.ReplayWriter(replay_file, current_game) if replay_file else None
+    while not current_game.check_game_end():
+        orders: list[game.ActorOrder] = []
+        for team in board.teams:
+            orders.extend(order_providers[team.name](current_game, team))
+        current_game.execute_game_step(orders)
+        if recorder:
+            recorder.record(orders)
+    current_game.end_game()
+    if recorder:
+        recorder.close()
+    return GameResult(
+        scores={team.name: score for team, score in current_game.scores.items()},
+        final_scores={team.name: score for team, score in current_game.final_scores()},
+        ticks=current_game.tick,
+        seed=current_game.seed,
+        duration=time.perf_counter() - start,
+    )
+
+
+def run_games(
+    games: int,
+    order_providers: dict[str, OrderProvider],
+    seed: int | None = None,
+    **game_options,
+) -> BenchmarkResult:
+    seeds = random.Random(seed)
+    start = time.perf_counter()
+    results = [
+        run_game(order_providers, seed=seeds.randrange(2**32), **game_options)
+        for _ in range(games)
+    ]
+    return BenchmarkResult(results=results, duration=time.perf_counter() - start)
+
+
+def configure_logging(level: str) -> None:
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(level.upper())
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run games as fast as possible without a server."
+    )
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument(
+        "--teams",
+        nargs="+",
+        choices=list(strategies),
+        default=["flag_runner", "random"],
+        help="The strategy of each team, one team per entry.",
+    )
+    parser.add_argument(
+        "--map-size", type=int, default=config.config["game"]["map_size"]
+    )
+    parser.add_argument("--walls", type=int, default=config.config["game"]["walls"])
+    parser.add_argument(
+        "--max-ticks", type=int, default=config.config["game"]["max_ticks"]
+    )
+    parser.add_argument("--board-layers", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="error")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+    # the strategies use the global random module
+    random.seed(args.seed)
+    order_providers = {
+        f"{i + 1}-{strategy}": strategies[strategy]
+        for i, strategy in enumerate(args.teams)
+    }
+    benchmark = run_games(
+        args.games,
+        order_providers,
+        seed=args.seed,
+        map_size=args.map_size,
+        walls=args.walls,
+        max_ticks=args.max_ticks,
+        board_layers=args.board_layers,
+    )
+    totals = {name: 0 for name in order_providers}
+    for result in benchmark.results:
+        for name, score in result.scores.items():
+            totals[name] += score
+    print(f"Scores: {totals}")
+    print(
+        f"{len(benchmark.results)} games in {benchmark.duration:.2f} s: "
+        f"{benchmark.games_per_second:.2f} games/s, "
+        f"{benchmark.ticks_per_second:.0f} ticks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
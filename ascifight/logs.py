@@ -0,0 +1,414 @@
+import enum
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+from typing import Any, BinaryIO, Iterable, Iterator, cast
+
+import structlog
+
+# byte ranges [start, end) of the records of each room and tick in a log file
+Index = dict[tuple[str | None, int | None], list[list[int]]]
+
+
+class LogLevel(str, enum.Enum):
+    debug = "debug"
+    info = "info"
+    warning = "warning"
+    error = "error"
+    critical = "critical"
+
+
+# the file handlers by absolute path of their log file
+indexed_handlers: dict[str, "IndexedFileHandler"] = {}
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread as they are. The default prepare
+    formats them first, that would render every message twice in the thread
+    that logs it."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class Rollover:
+    """Put into the log queue to start new log files for the room."""
+
+    def __init__(self, room: str | None) -> None:
+        self.room = room
+
+
+class LogListener(logging.handlers.QueueListener):
+    """Formats and writes the records of the queue in its own thread. Rolling
+    over the log files goes through the queue as well, so records logged
+    before the rollover still end up in the old file."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        if isinstance(record, Rollover):
+            roll_over_handlers(self.handlers, record.room)
+        else:
+            super().handle(record)
+
+
+def start(logger: logging.Logger | None = None) -> LogListener:
+    """Move the handlers of the logger, root by default, behind a queue."""
+    logger = logger or logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = LogListener(log_queue, *logger.handlers, respect_handler_level=True)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(RecordQueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def rollover(logger: logging.Logger | None = None, room: str | None = None) -> None:
+    """Start new log files, through the queue if the handlers are behind one.
+    With a room only the log file of the room is rolled over."""
+    logger = logger or logging.getLogger()
+    for handler in logger.handlers:
+        if isinstance(handler, RecordQueueHandler):
+            handler.enqueue(Rollover(room))  # type: ignore
+    roll_over_handlers(
+        [
+            handler
+            for handler in logger.handlers
+            if not isinstance(handler, RecordQueueHandler)
+        ],
+        room,
+    )
+
+
+def roll_over_handlers(handlers: Iterable[logging.Handler], room: str | None) -> None:
+    for handler in handlers:
+        if isinstance(handler, RoomFileHandler):
+            handler.doRollover(room)
+        elif isinstance(handler, logging.handlers.RotatingFileHandler):
+            handler.doRollover()
+
+
+class TickSampler:
+    """A structlog processor that lets only the first messages of a kind pass
+    each tick. Only messages logged with sample=True are counted, meant for
+    high-volume messages that tell nothing new after a few. Messages are of a
+    kind if they have the same level and unformatted event, log them with
+    %-style arguments."""
+
+    def __init__(self, per_tick: int) -> None:
+        self.per_tick = per_tick
+        # per room the tick and the messages of each kind logged in it
+        self._counts: dict[object, tuple[object, dict[tuple[str, str], int]]] = {}
+
+    def __call__(
+        self, logger: object, method_name: str, event_dict: structlog.types.EventDict
+    ) -> structlog.types.EventDict:
+        sample = event_dict.pop("sample", False)
+        tick = event_dict.get("tick")
+        if not sample or not self.per_tick or tick is None:
+            return event_dict
+        room = event_dict.get("room")
+        counted_tick, counts = self._counts.get(room, (None, {}))
+        if counted_tick != tick:
+            counts = {}
+            self._counts[room] = (tick, counts)
+        kind = (method_name, str(event_dict.get("event")))
+        count = counts.get(kind, 0) + 1
+        counts[kind] = count
+        if count > self.per_tick:
+            raise structlog.DropEvent
+        if count == self.per_tick:
+            event_dict["sampled"] = "more messages like this are dropped this tick"
+        return event_dict
+
+
+class IndexedFileHandler(logging.handlers.RotatingFileHandler):
+    """Writes the records like a RotatingFileHandler and remembers where the
+    records of each room and tick are. The index of a file is saved next to it
+    when it is rotated, it follows the file in the rotation.
+
+    With compress the backups are gzipped in a background thread, the file
+    stays uncompressed under its backup name until it is done."""
+
+    def __init__(self, filename: str, *args, compress: bool = False, **kwargs) -> None:
+        super().__init__(filename, *args, **kwargs)
+        self.compress = compress
+        self._compressing: threading.Thread | None = None
+        # a file left over from the last run has to be read once
+        self.index = build_index(self.baseFilename)
+        indexed_handlers[self.baseFilename] = self
+
+    def rotation_filename(self, default_name: str) -> str:
+        return default_name + ".gz" if self.compress else default_name
+
+    def rotate(self, source: str, dest: str) -> None:
+        if not self.compress:
+            super().rotate(source, dest)
+            return
+        uncompressed = dest.removesuffix(".gz")
+        os.replace(source, uncompressed)
+        self._compressing = threading.Thread(
+            target=compress_file,
+            args=(uncompressed, dest),
+            name="log-compression",
+            daemon=True,
+        )
+        self._compressing.start()
+
+    def wait_for_compression(self) -> None:
+        """Finish the last compression, the backups can only be rotated after.
+        A backup left uncompressed, by an error or the last run, is compressed
+        now."""
+        if self._compressing is not None:
+            self._compressing.join()
+            self._compressing = None
+        first_backup = self.baseFilename + ".1"
+        if self.compress and os.path.exists(first_backup):
+            compress_file(first_backup, first_backup + ".gz")
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            start = self.stream.tell()
+            logging.FileHandler.emit(self, record)
+            end = self.stream.tell()
+        except Exception:
+            self.handleError(record)
+            return
+        event = record.msg if isinstance(record.msg, dict) else {}
+        add_span(self.index, (event.get("room"), event.get("tick")), start, end)
+
+    def doRollover(self) -> None:
+        self.wait_for_compression()
+        super().doRollover()
+        if self.backupCount > 0:
+            for number in range(self.backupCount - 1, 0, -1):
+                source = index_path(self.baseFilename, number)
+                if os.path.exists(source):
+                    os.replace(source, index_path(self.baseFilename, number + 1))
+            save_index(self.index, index_path(self.baseFilename, 1))
+        self.index = {}
+
+    def close(self) -> None:
+        indexed_handlers.pop(self.baseFilename, None)
+        if self._compressing is not None:
+            self._compressing.join()
+        super().close()
+
+    def current_index(self) -> Index:
+        # logging.Handler creates the lock when the handler is created
+        assert self.lock is not None
+        with self.lock:
+            return {
+                key: [span[:] for span in spans] for key, spans in self.index.items()
+            }
+
+
+class RoomFileHandler(logging.Handler):
+    """Writes the records of each room to a log file of its own, so a room
+    starting a new game does not split the games of the other rooms. Records
+    of no room go to the given file. The files are written by
+    IndexedFileHandlers, created with the other arguments when a room logs
+    the first time."""
+
+    def __init__(self, filename: str, *args, **kwargs) -> None:
+        super().__init__()
+        self.filename = filename
+        self._args = args
+        self._kwargs = kwargs
+        self.handlers: dict[str | None, IndexedFileHandler] = {}
+        self.handler_of(None)
+
+    def handler_of(self, room: str | None) -> "IndexedFileHandler":
+        handler = self.handlers.get(room)
+        if handler is None:
+            handler = IndexedFileHandler(
+                room_log_file(self.filename, room), *self._args, **self._kwargs
+            )
+            handler.setFormatter(self.formatter)
+            self.handlers[room] = handler
+        return handler
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        super().setFormatter(fmt)
+        for handler in self.handlers.values():
+            handler.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        event = record.msg if isinstance(record.msg, dict) else {}
+        self.handler_of(event.get("room")).handle(record)
+
+    def doRollover(self, room: str | None = None) -> None:
+        self.handler_of(room).doRollover()
+
+    def close(self) -> None:
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+def room_log_file(log_file: str, room: str | None) -> str:
+    """The log file of the room, 'game.log' becomes 'game-room.log'."""
+    if room is None:
+        return log_file
+    root, extension = os.path.splitext(log_file)
+    return f"{root}-{room}{extension}"
+
+
+def add_span(index: Index, key: tuple[str | None, int | None], start: int, end: int):
+    spans = index.setdefault(key, [])
+    if spans and spans[-1][1] == start:
+        spans[-1][1] = end
+    else:
+        spans.append([start, end])
+
+
+def compress_file(source: str, destination: str) -> None:
+    """Gzip the file and remove it, the compressed file appears when it is
+    complete."""
+    partial = destination + ".partial"
+    with open(source, "rb") as source_fp, gzip.open(
+        partial, "wb", compresslevel=6
+    ) as destination_fp:
+        shutil.copyfileobj(source_fp, destination_fp, 1024 * 1024)
+    os.replace(partial, destination)
+    os.remove(source)
+
+
+def backup_path(log_file: str, number: int) -> str:
+    """The number-th backup of the log file, compressed or not yet."""
+    path = f"{log_file}.{number}"
+    return path if os.path.exists(path) else path + ".gz"
+
+
+def open_log(path: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        # a GzipFile reads like any binary file
+        return cast(BinaryIO, gzip.open(path, "rb"))
+    return open(path, "rb")
+
+
+def read_chunks(
+    path: str, start: int, end: int, decompress: bool = False
+) -> Iterator[bytes]:
+    """The bytes from start to end of the file, decompressed from a gzip file
+    if asked to."""
+    with gzip.open(path, "rb") if decompress else open(path, "rb") as fp:
+        fp.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = fp.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def gzip_size(path: str) -> int:
+    """The uncompressed size of a gzip file, it is the last 4 bytes of the
+    file for files below 4 GiB."""
+    with open(path, "rb") as fp:
+        fp.seek(-4, os.SEEK_END)
+        return int.from_bytes(fp.read(4), "little")
+
+
+def index_path(log_file: str, number: int) -> str:
+    directory, name = os.path.split(log_file)
+    return os.path.join(directory, "index", f"{name}.{number}.json")
+
+
+def save_index(index: Index, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fp:
+        json.dump([[room, tick, spans] for (room, tick), spans in index.items()], fp)
+
+
+def build_index(path: str) -> Index:
+    """Index a log file by reading it, for files written without an index."""
+    index: Index = {}
+    if not os.path.exists(path):
+        return index
+    offset = 0
+    with open_log(path) as fp:
+        for line in fp:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = {}
+            if not isinstance(event, dict):
+                event = {}
+            add_span(
+                index,
+                (event.get("room"), event.get("tick")),
+                offset,
+                offset + len(line),
+            )
+            offset += len(line)
+    return index
+
+
+def log_index(log_file: str, number: int) -> Index:
+    """The index of the log file, or of its number-th backup."""
+    if number == 0:
+        handler = indexed_handlers.get(os.path.abspath(log_file))
+        if handler is not None:
+            return handler.current_index()
+        return build_index(log_file)
+    path = index_path(log_file, number)
+    if os.path.exists(path):
+        with open(path) as fp:
+            return {(room, tick): spans for room, tick, spans in json.load(fp)}
+    return build_index(backup_path(log_file, number))
+
+
+def read_entries(
+    path: str,
+    index: Index,
+    room: str,
+    tick_min: int | None = None,
+    tick_max: int | None = None,
+    team: str | None = None,
+    level: LogLevel | None = None,
+    limit: int = 1000,
+) -> list[dict[str, Any]]:
+    """The records of the room in the ticks, only the indexed parts of the file
+    are read. Without ticks all records of the room are returned."""
+    by_tick = tick_min is not None or tick_max is not None
+    spans = sorted(
+        span
+        for (span_room, tick), room_spans in index.items()
+        if span_room == room
+        and (
+            not by_tick
+            or (
+                tick is not None
+                and (tick_min is None or tick >= tick_min)
+                and (tick_max is None or tick <= tick_max)
+            )
+        )
+        for span in room_spans
+    )
+    min_level = logging.getLevelName(level.upper()) if level else logging.NOTSET
+    entries: list[dict[str, Any]] = []
+    # gzip files seek by decompressing, the spans are read front to back
+    with open_log(path) as fp:
+        for start, end in spans:
+            fp.seek(start)
+            for line in fp.read(end - start).splitlines():
+                entry = json.loads(line)
+                if team is not None and entry.get("team") != team:
+                    continue
+                entry_level = logging.getLevelName(str(entry.get("level")).upper())
+                if isinstance(entry_level, int) and entry_level < min_level:
+                    continue
+                entries.append(entry)
+                if len(entries) == limit:
+                    return entries
+    return entries
@@ -7,17 +7,21 @@ import os
 import uvicorn
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
 import structlog
 
 
 import ascifight.config as config
+import ascifight.globals as globals
+import ascifight.logs as logs
+import ascifight.scores as scores
 import ascifight.routers.orders as orders
 import ascifight.routers.states as states
 import ascifight.routers.other as other
 import ascifight.routers.router_utils as router_utils
 import ascifight.routers.computations as computations
+import ascifight.routers.bots as bots
+import ascifight.routers.spectators as spectators
 
 import ascifight.util as util
 import ascifight.game_loop as game_loop
@@ -29,11 +33,17 @@ except FileExistsError:
     pass
 
 logging.config.dictConfig(util.log_config_dict)
+# formatting and writing happens in the listener thread, not in the event loop
+log_listener = logs.start()
 
 
 structlog.configure(
     processors=[
+        # the context is only known in the thread that logs
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.filter_by_level,
         structlog.stdlib.add_log_level,
+        logs.TickSampler(config.config["server"]["log_sample_per_tick"]),
         structlog.stdlib.PositionalArgumentsFormatter(),
         util.time_stamper,
         structlog.processors.StackInfoRenderer(),
@@ -65,15 +75,24 @@ app.include_router(orders.router)
 app.include_router(states.router)
 app.include_router(other.router)
 app.include_router(computations.router)
-app.mount(
-    "/logs", StaticFiles(directory=config.config["server"]["log_dir"]), name="logs"
-)
+app.include_router(bots.router)
+app.include_router(spectators.router)
 
 
 @app.on_event("startup")
 async def startup():
     logger.info("Starting server.")
-    asyncio.create_task(game_loop.routine())
+    for name in config.config["server"]["rooms"]:
+        room = globals.Room(name)
+        globals.rooms[name] = room
+        room.task = asyncio.create_task(game_loop.routine(room))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    scores.close_stores()
+    # write what is left in the queue
+    log_listener.stop()
 
 
 if __name__ == "__main__":
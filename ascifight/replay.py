@@ -0,0 +1,359 @@
+"""Compact binary replays of games.
+
+A replay file starts with a header holding the seed, map size, teams and actors of
+the game. Records follow, each a keyframe with the full board state or a delta with
+the orders of a tick and what changed on the board. Keyframes are written every
+'keyframe_interval' ticks, so a board at any tick is rebuilt from the last keyframe
+before it and a few deltas.
+"""
+import struct
+import zlib
+from typing import BinaryIO, Sequence
+
+import ascifight.game as game
+import ascifight.board.data as data
+import ascifight.board.state as state
+import ascifight.board.computations as computations
+
+MAGIC = b"ASCR"
+VERSION = 2
+KEYFRAME = ord("K")
+DELTA = ord("D")
+NO_FLAG = 255
+
+ORDER_TYPES: list[type[game.ActorOrder]] = [
+    game.MoveOrder,
+    game.AttackOrder,
+    game.GrabPutOrder,
+    game.DestroyOrder,
+    game.BuildOrder,
+]
+DIRECTIONS = list(computations.Directions)
+
+_header = struct.Struct("<4sBHQHBB")
+_record = struct.Struct("<BII")
+_position = struct.Struct("<HH")
+_actor = struct.Struct("<HHB")
+_changed_actor = struct.Struct("<BBHHB")
+_flag = struct.Struct("<HHB")
+_changed_flag = struct.Struct("<BHHB")
+_order = struct.Struct("<BBBB")
+_score = struct.Struct("<i")
+_changed_score = struct.Struct("<Bi")
+_count = struct.Struct("<I")
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode("utf8")
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def _unpack_string(buffer: bytes, offset: int) -> tuple[str, int]:
+    (length,) = struct.unpack_from("<H", buffer, offset)
+    offset += 2
+    return buffer[offset : offset + length].decode("utf8"), offset + length
+
+
+def _pack_positions(positions: set[tuple[int, int]]) -> bytes:
+    return _count.pack(len(positions)) + b"".join(
+        _position.pack(x, y) for x, y in sorted(positions)
+    )
+
+
+def _unpack_positions(buffer: bytes, offset: int) -> tuple[set[tuple[int, int]], int]:
+    (count,) = _count.unpack_from(buffer, offset)
+    offset += _count.size
+    positions = set()
+    for _ in range(count):
+        x, y = _position.unpack_from(buffer, offset)
+        positions.add((x, y))
+        offset += _position.size
+    return positions, offset
+
+
+class ReplayWriter:
+    """Writes the replay of a game, create it after the game was initiated and
+    record every tick after it was executed.
+
+    With append a resumed game is recorded on in the replay file it was
+    recorded to before, if it is the replay of the game. A cut off record at
+    the end is dropped."""
+
+    def __init__(
+        self,
+        path: str,
+        current_game: game.Game,
+        keyframe_interval: int = 20,
+        append: bool = False,
+    ) -> None:
+        self.game = current_game
+        self.keyframe_interval = keyframe_interval
+        self.teams = [team.name for team in current_game.board.teams]
+        self.actors = [actor.__name__ for actor in current_game.board.actor_classes]
+        recorded = self._recorded(path) if append else None
+        if recorded is not None:
+            self.keyframe_interval = recorded.keyframe_interval
+            self._file: BinaryIO = open(path, "r+b")
+            self._file.truncate(recorded.end)
+            self._file.seek(recorded.end)
+        else:
+            self._file = open(path, "wb")
+            self._write_header()
+        self._state = state.BoardState.capture(current_game.board)
+        self._scores = self._current_scores()
+        # the board of the first tick, or of the tick the game was resumed at
+        self._write_keyframe()
+        self._file.flush()
+
+    def _recorded(self, path: str) -> "Replay | None":
+        try:
+            recorded = Replay(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if (
+            recorded.seed,
+            recorded.map_size,
+            recorded.teams,
+            recorded.actors,
+        ) != (self.game.seed, self.game.board.map_size, self.teams, self.actors):
+            return None
+        return recorded
+
+    def _write_header(self) -> None:
+        self._file.write(
+            _header.pack(
+                MAGIC,
+                VERSION,
+                self.keyframe_interval,
+                self.game.seed,
+                self.game.board.map_size,
+                len(self.teams),
+                len(self.actors),
+            )
+            + b"".join(_pack_string(name) for name in self.teams + self.actors)
+        )
+
+    def record(
+        self,
+        orders: Sequence[game.ActorOrder],
+        new_state: state.BoardState | None = None,
+    ) -> None:
+        """Record the orders of the tick just executed, pass the board state if
+        it was already captured after the tick."""
+        if new_state is None:
+            new_state = state.BoardState.capture(self.game.board)
+        delta = self._state.diff(new_state)
+        scores = self._current_scores()
+        self._write_delta(orders, delta, scores)
+        self._state = new_state
+        self._scores = scores
+        if self.game.tick % self.keyframe_interval == 0:
+            self._write_keyframe()
+        # a crashed server loses at most the tick it was executing
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _current_scores(self) -> list[int]:
+        return [self.game.scores.get(team, 0) for team in self.game.board.teams]
+
+    def _write(self, kind: int, payload: bytes) -> None:
+        self._file.write(_record.pack(kind, self.game.tick, len(payload)))
+        self._file.write(payload)
+
+    def _write_keyframe(self) -> None:
+        payload = [_score.pack(score) for score in self._scores]
+        for team in range(len(self.teams)):
+            for ident in range(len(self.actors)):
+                x, y, flag = self._state.actors[(team, ident)]
+                payload.append(_actor.pack(x, y, NO_FLAG if flag is None else flag))
+        for team in range(len(self.teams)):
+            payload.append(_flag.pack(*self._state.flags[team]))
+        for team in range(len(self.teams)):
+            payload.append(_position.pack(*self._state.bases[team]))
+        payload.append(_pack_positions(self._state.walls))
+        self._write(KEYFRAME, zlib.compress(b"".join(payload)))
+
+    def _write_delta(
+        self,
+        orders: Sequence[game.ActorOrder],
+        delta: state.BoardDelta,
+        scores: list[int],
+    ) -> None:
+        team_numbers = {team.name: team.number for team in self.game.board.teams}
+        payload = [_count.pack(len(orders))]
+        for order in orders:
+            payload.append(
+                _order.pack(
+                    ORDER_TYPES.index(type(order)),
+                    team_numbers[order.team],
+                    order.actor,
+                    DIRECTIONS.index(order.direction),
+                )
+            )
+        payload.append(_count.pack(len(delta.actors)))
+        for (team, ident), (x, y, flag) in delta.actors.items():
+            payload.append(
+                _changed_actor.pack(
+                    team, ident, x, y, NO_FLAG if flag is None else flag
+                )
+            )
+        payload.append(_count.pack(len(delta.flags)))
+        for team, (x, y, place) in delta.flags.items():
+            payload.append(_changed_flag.pack(team, x, y, place))
+        payload.append(_pack_positions(delta.walls_added))
+        payload.append(_pack_positions(delta.walls_removed))
+        changed_scores = [
+            (team, score)
+            for team, (score, old_score) in enumerate(zip(scores, self._scores))
+            if score != old_score
+        ]
+        payload.append(_count.pack(len(changed_scores)))
+        for team, score in changed_scores:
+            payload.append(_changed_score.pack(team, score))
+        self._write(DELTA, b"".join(payload))
+
+
+class Replay:
+    """Reads a replay file and rebuilds the board at any tick."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as replay_file:
+            self._buffer = replay_file.read()
+        (
+            magic,
+            version,
+            self.keyframe_interval,
+            self.seed,
+            self.map_size,
+            teams,
+            actors,
+        ) = _header.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay file of version {VERSION}.")
+        offset = _header.size
+        names = []
+        for _ in range(teams + actors):
+            name, offset = _unpack_string(self._buffer, offset)
+            names.append(name)
+        self.teams: list[str] = names[:teams]
+        self.actors: list[str] = names[teams:]
+
+        # kind -> tick -> offset and length of the payload
+        self._records: dict[int, dict[int, tuple[int, int]]] = {
+            KEYFRAME: {},
+            DELTA: {},
+        }
+        # the last record is cut off if the server crashed while writing it
+        while offset + _record.size <= len(self._buffer):
+            kind, tick, length = _record.unpack_from(self._buffer, offset)
+            start = offset + _record.size
+            if start + length > len(self._buffer):
+                break
+            self._records[kind][tick] = (start, length)
+            offset = start + length
+        # where the next record goes
+        self.end = offset
+
+    @property
+    def ticks(self) -> int:
+        """The last tick of the replay."""
+        # a resumed game starts with a keyframe, maybe without the delta of its tick
+        return max(self._records[DELTA] | self._records[KEYFRAME])
+
+    def board_at(self, tick: int) -> data.BoardData:
+        board_state, _ = self._state_at(tick)
+        return board_state.to_board(self.teams, self.actors, self.map_size)
+
+    def scores_at(self, tick: int) -> dict[str, int]:
+        _, scores = self._state_at(tick)
+        return dict(zip(self.teams, scores))
+
+    def orders_at(self, tick: int) -> list[game.ActorOrder]:
+        """The orders executed in a tick."""
+        orders, _, _ = self._read_delta(tick)
+        return orders
+
+    def _state_at(self, tick: int) -> tuple[state.BoardState, list[int]]:
+        # a replay of a resumed game starts at the tick it was resumed at
+        if not min(self._records[KEYFRAME]) <= tick <= self.ticks:
+            raise ValueError(f"Tick {tick} is not in the replay.")
+        keyframe_tick = max(t for t in self._records[KEYFRAME] if t <= tick)
+        board_state, scores = self._read_keyframe(keyframe_tick)
+        for delta_tick in range(keyframe_tick + 1, tick + 1):
+            _, delta, changed_scores = self._read_delta(delta_tick)
+            board_state = board_state.apply(delta)
+            for team, score in changed_scores.items():
+                scores[team] = score
+        return board_state, scores
+
+    def _read_keyframe(self, tick: int) -> tuple[state.BoardState, list[int]]:
+        offset, length = self._records[KEYFRAME][tick]
+        payload = zlib.decompress(self._buffer[offset : offset + length])
+        teams = len(self.teams)
+        scores = [_score.unpack_from(payload, i * _score.size)[0] for i in range(teams)]
+        offset = teams * _score.size
+        actors: state.ActorPositions = {}
+        for team in range(teams):
+            for ident in range(len(self.actors)):
+                x, y, flag = _actor.unpack_from(payload, offset)
+                offset += _actor.size
+                actors[(team, ident)] = (x, y, None if flag == NO_FLAG else flag)
+        flags: state.FlagPositions = {}
+        for team in range(teams):
+            x, y, place = _flag.unpack_from(payload, offset)
+            flags[team] = (x, y, place)
+            offset += _flag.size
+        bases: state.Positions = {}
+        for team in range(teams):
+            x, y = _position.unpack_from(payload, offset)
+            bases[team] = (x, y)
+            offset += _position.size
+        walls, offset = _unpack_positions(payload, offset)
+        return state.BoardState(actors, flags, bases, walls), scores
+
+    def _read_delta(
+        self, tick: int
+    ) -> tuple[list[game.ActorOrder], state.BoardDelta, dict[int, int]]:
+        offset, _ = self._records[DELTA][tick]
+        payload = self._buffer
+        (count,) = _count.unpack_from(payload, offset)
+        offset += _count.size
+        orders = []
+        for _ in range(count):
+            order_type, team, actor, direction = _order.unpack_from(payload, offset)
+            offset += _order.size
+            orders.append(
+                ORDER_TYPES[order_type](
+                    team=self.teams[team], actor=actor, direction=DIRECTIONS[direction]
+                )
+            )
+        (count,) = _count.unpack_from(payload, offset)
+        offset += _count.size
+        actors: state.ActorPositions = {}
+        for _ in range(count):
+            team, ident, x, y, flag = _changed_actor.unpack_from(payload, offset)
+            offset += _changed_actor.size
+            actors[(team, ident)] = (x, y, None if flag == NO_FLAG else flag)
+        (count,) = _count.unpack_from(payload, offset)
+        offset += _count.size
+        flags: state.FlagPositions = {}
+        for _ in range(count):
+            team, x, y, place = _changed_flag.unpack_from(payload, offset)
+            offset += _changed_flag.size
+            flags[team] = (x, y, place)
+        walls_added, offset = _unpack_positions(payload, offset)
+        walls_removed, offset = _unpack_positions(payload, offset)
+        (count,) = _count.unpack_from(payload, offset)
+        offset += _count.size
+        scores = {}
+        for _ in range(count):
+            team, score = _changed_score.unpack_from(payload, offset)
+            offset += _changed_score.size
+            scores[team] = score
+        return (
+            orders,
+            state.BoardDelta(actors, flags, walls_added, walls_removed),
+            scores,
+        )
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel, ValidationError
+import structlog
+
+import ascifight.globals as globals
+import ascifight.game as game
+import ascifight.routers.orders as orders
+import ascifight.routers.states as states
+import ascifight.routers.router_utils as router_utils
+import ascifight.board.computations as computations
+
+logger = structlog.get_logger()
+
+order_types: dict[str, type[game.ActorOrder]] = {
+    "move": game.MoveOrder,
+    "attack": game.AttackOrder,
+    "grabput": game.GrabPutOrder,
+    "destroy": game.DestroyOrder,
+    "build": game.BuildOrder,
+}
+
+
+class Credentials(BaseModel):
+    team: str
+    password: str
+
+
+class OrderTarget(BaseModel):
+    actor: int
+    direction: computations.Directions
+
+
+router = APIRouter(
+    prefix="/bots",
+    tags=["bots"],
+)
+
+
+@router.websocket("/ws")
+async def bot_socket(
+    websocket: WebSocket, room: str | None = None, deltas: bool = False
+) -> None:
+    """A connection for a bot to get the state of every tick pushed and to send
+    orders. The protocol is described in the API description."""
+    await websocket.accept()
+    try:
+        current_room = router_utils.get_room(room)
+    except HTTPException as error:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+        return
+    try:
+        credentials = Credentials.model_validate_json(await websocket.receive_text())
+    except (ValidationError, KeyError):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason='Send {"team": ..., "password": ...} first.',
+        )
+        return
+    team = credentials.team
+    if not router_utils.check_password(team, credentials.password):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Incorrect team or password."
+        )
+        return
+    await websocket.send_json({"type": "welcome", "team": team})
+    logger.info("Bot of %s connected.", team)
+
+    tasks = [
+        asyncio.create_task(_push_states(websocket, current_room, deltas)),
+        asyncio.create_task(_receive_orders(websocket, current_room, team)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    # asyncio.wait does not raise the exceptions of the tasks
+    for task in done:
+        exception = task.exception()
+        if exception is not None and not isinstance(exception, WebSocketDisconnect):
+            logger.warning(
+                "Connection to the bot of %s failed.", team, exc_info=exception
+            )
+    logger.info("Bot of %s disconnected.", team)
+
+
+async def _push_states(websocket: WebSocket, room: globals.Room, deltas: bool) -> None:
+    """Send the state whenever a tick was executed, the full state of the first
+    tick of every game and only the changes after if asked for."""
+    current_game: game.Game | None = None
+    tick = -1
+    while True:
+        # get the event before looking at the tick, so no tick is missed
+        tick_event = room.tick_event
+        if room.my_game is not current_game or room.my_game.tick != tick:
+            if deltas and room.my_game is current_game:
+                delta = await states.get_game_state_delta(
+                    room, since=tick, game=current_game.ident
+                )
+                message = '{"type":"delta","delta":' + delta.model_dump_json() + "}"
+            else:
+                body, _ = states.game_state_response.body(
+                    room, states.game_state_key(room)
+                )
+                message = '{"type":"state","state":' + body.decode("utf8") + "}"
+            current_game = room.my_game
+            tick = room.my_game.tick
+            await websocket.send_text(message)
+        await tick_event.wait()
+
+
+async def _receive_orders(websocket: WebSocket, room: globals.Room, team: str) -> None:
+    """Add the orders of the bot and acknowledge each one."""
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (json.JSONDecodeError, KeyError):
+                # not JSON or a binary message
+                await websocket.send_json(
+                    {"type": "error", "id": None, "detail": "Orders are JSON text."}
+                )
+                continue
+            # a single order or a list of them
+            for order in message if isinstance(message, list) else [message]:
+                await websocket.send_json(_add_order(room, team, order))
+    except WebSocketDisconnect:
+        pass
+
+
+def _add_order(room: globals.Room, team: str, message: Any) -> dict:
+    if not isinstance(message, dict):
+        return {"type": "error", "id": None, "detail": "An order is a JSON object."}
+    order_id = message.get("id")
+    order_name = message.get("order")
+    if not isinstance(order_name, str) or order_name not in order_types:
+        return {
+            "type": "error",
+            "id": order_id,
+            "detail": f"Unknown order, use one of {', '.join(order_types)}.",
+        }
+    order_type = order_types[order_name]
+    try:
+        target = OrderTarget.model_validate(message)
+        order = order_type(team=team, actor=target.actor, direction=target.direction)
+        router_utils.check_order_limit(team, room)
+    except ValidationError as error:
+        return {"type": "error", "id": order_id, "detail": str(error)}
+    except HTTPException as error:
+        return {"type": "error", "id": order_id, "detail": error.detail}
+    response = orders.add_order(room, order, order_name.capitalize())
+    return {"type": "ack", "id": order_id, "message": response.message}
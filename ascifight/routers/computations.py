@@ -4,7 +4,6 @@ from typing import Annotated
 import ascifight.routers.router_utils as router_utils
 import ascifight.board.data as data
 import ascifight.board.computations as computations
-import ascifight.globals as globals
 
 router = APIRouter(
     prefix="/computations",
@@ -31,24 +30,26 @@ async def get_distance(
 @router.post("/nearest_enemy/{actor}")
 async def get_nearest_enemy_coordinates(
     team: Annotated[str, Depends(router_utils.get_current_team)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
 ) -> data.Coordinates:
     """Retrieve the coordinates of the nearest enemy of an actor. In case of
     multiple enemies with the same distance, result is chosen by internal order."""
-    full_actor = globals.my_game.board.teams_actors[
-        (globals.my_game.board.names_teams[team], actor)
+    full_actor = room.my_game.board.teams_actors[
+        (room.my_game.board.names_teams[team], actor)
     ]
-    return computations.nearest_enemy_coordinates(full_actor)
+    return computations.nearest_enemy_coordinates(room.my_game.board, full_actor)
 
 
 @router.post("/nearest_enemy_flag/{actor}")
 async def get_nearest_enemy_flag_coordinates(
     team: Annotated[str, Depends(router_utils.get_current_team)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
 ) -> data.Coordinates:
     """Retrieve the coordinates of the nearest enemy flag to an actor. In case of
     multiple enemy flags with the same distance, result is chosen by internal order."""
-    full_actor = globals.my_game.board.teams_actors[
-        (globals.my_game.board.names_teams[team], actor)
+    full_actor = room.my_game.board.teams_actors[
+        (room.my_game.board.names_teams[team], actor)
     ]
-    return computations.nearest_enemy_flag_coordinates(full_actor)
+    return computations.nearest_enemy_flag_coordinates(room.my_game.board, full_actor)
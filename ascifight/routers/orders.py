@@ -18,9 +18,21 @@ router = APIRouter(
 )
 
 
+def add_order(room: globals.Room, order: game.ActorOrder, name: str) -> OrderResponse:
+    if room.journal is not None:
+        room.journal.append(order)
+    if room.order_book.add(order):
+        return OrderResponse(
+            message=f"{name} order replaced the earlier {name.lower()} order of "
+            "this actor."
+        )
+    return OrderResponse(message=f"{name} order added.")
+
+
 @router.post("/move/{actor}", status_code=202)
 async def move_order(
-    team: Annotated[str, Depends(router_utils.get_current_team)],
+    team: Annotated[str, Depends(router_utils.limit_orders)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
     direction: router_utils.direction_annotation,
 ) -> OrderResponse:
@@ -42,15 +54,18 @@ async def move_order(
     * **contain a wall field**
 
     If an _actor_ moves over the flag of its own team, the flag is returned to its base!
+
+    An _actor_ moves once per tick. A later move order in the same tick replaces the
+    earlier one, even if the earlier one would have been blocked.
     """
     order = game.MoveOrder(team=team, actor=actor, direction=direction)
-    globals.command_queue.put_nowait(order)
-    return OrderResponse(message="Move order added.")
+    return add_order(room, order, "Move")
 
 
 @router.post("/grabput/{actor}", status_code=202)
 async def grabput_order(
-    team: Annotated[str, Depends(router_utils.get_current_team)],
+    team: Annotated[str, Depends(router_utils.limit_orders)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
     direction: router_utils.direction_annotation,
 ) -> OrderResponse:
@@ -70,15 +85,17 @@ async def grabput_order(
     of an _actor_ is smaller than 1, grabbing or putting might not always succeed.
 
     Only _actors_ with a non-zero _grab_ property can _grabput_.
+
+    A later grabput order of the _actor_ in the same tick replaces the earlier one.
     """
     order = game.GrabPutOrder(team=team, actor=actor, direction=direction)
-    globals.command_queue.put_nowait(order)
-    return OrderResponse(message="Grabput order added.")
+    return add_order(room, order, "Grabput")
 
 
 @router.post("/attack/{actor}", status_code=202)
 async def attack_order(
-    team: Annotated[str, Depends(router_utils.get_current_team)],
+    team: Annotated[str, Depends(router_utils.limit_orders)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
     direction: router_utils.direction_annotation,
 ) -> OrderResponse:
@@ -91,15 +108,17 @@ async def attack_order(
     succeed always.
     Depending on the rule-set killing other _actors_ will result in scoring points.
 
-    Only _actors_ with a non-zero _attack_ property can _attack_."""
+    Only _actors_ with a non-zero _attack_ property can _attack_.
+
+    A later attack order of the _actor_ in the same tick replaces the earlier one."""
     order = game.AttackOrder(team=team, actor=actor, direction=direction)
-    globals.command_queue.put_nowait(order)
-    return OrderResponse(message="Attack order added.")
+    return add_order(room, order, "Attack")
 
 
 @router.post("/destroy/{actor}", status_code=202)
 async def destroy_order(
-    team: Annotated[str, Depends(router_utils.get_current_team)],
+    team: Annotated[str, Depends(router_utils.limit_orders)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
     direction: router_utils.direction_annotation,
 ) -> OrderResponse:
@@ -110,15 +129,17 @@ async def destroy_order(
     Destroy actions only have a certain probability to work. If the _destroy_
     property of an _actor_ is smaller than 1, destroying might not succeed always.
 
-    Only _actors_ with a non-zero _destroy_ property can _destroy_."""
+    Only _actors_ with a non-zero _destroy_ property can _destroy_.
+
+    A later destroy order of the _actor_ in the same tick replaces the earlier one."""
     order = game.DestroyOrder(team=team, actor=actor, direction=direction)
-    globals.command_queue.put_nowait(order)
-    return OrderResponse(message="Destroy order added.")
+    return add_order(room, order, "Destroy")
 
 
 @router.post("/build/{actor}", status_code=202)
 async def build_order(
-    team: Annotated[str, Depends(router_utils.get_current_team)],
+    team: Annotated[str, Depends(router_utils.limit_orders)],
+    room: router_utils.room_annotation,
     actor: router_utils.actor_annotation,
     direction: router_utils.direction_annotation,
 ) -> OrderResponse:
@@ -129,7 +150,8 @@ async def build_order(
     Build actions only have a certain probability to work. If the _build_ property
     of an _actor_ is smaller than 1, building might not succeed always.
 
-    Only _actors_ with a non-zero _build_ property can _build_."""
+    Only _actors_ with a non-zero _build_ property can _build_.
+
+    A later build order of the _actor_ in the same tick replaces the earlier one."""
     order = game.BuildOrder(team=team, actor=actor, direction=direction)
-    globals.command_queue.put_nowait(order)
-    return OrderResponse(message="Build order added.")
+    return add_order(room, order, "Build")
@@ -1,23 +1,154 @@
+import asyncio
+import datetime
 import os
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Response
-from starlette.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from starlette.responses import FileResponse, StreamingResponse
 
 import ascifight.config as config
 import ascifight.globals as globals
 import ascifight.draw as draw
+import ascifight.logs as logs
+import ascifight.routers.router_utils as router_utils
 
 router = APIRouter()
 
+game_maps = router_utils.RenderCache()
+
 
 @router.get("/log_files", tags=["logistics"])
 async def get_log_files() -> list[str]:
     """This service  fetches a sit of available log files.
-    'game.log' is always the log file of the current game. Others get a number
-    attached.
+    'game-<room>.log' is always the log file of the current game in a room,
+    'game.log' has the messages of no room. Others get a number attached.
 
-    The log files itself can be fetched using the '/logs/[filename]' endpoint."""
-    return os.listdir(config.config["server"]["log_dir"])
+    The log files itself can be fetched using the '/logs/[filename]' endpoint,
+    or queried with '/log_entries'."""
+    log_dir = config.config["server"]["log_dir"]
+    # without the directory of the indexes
+    return [
+        name
+        for name in os.listdir(log_dir)
+        if os.path.isfile(os.path.join(log_dir, name))
+    ]
+
+
+@router.get(
+    "/logs/{filename}",
+    tags=["logistics"],
+    responses={206: {"description": "Part of the log file."}},
+    response_class=Response,
+)
+async def get_log_file(filename: str, request: Request) -> Response:
+    """A log file from '/log_files'. The logs of earlier games are gzipped, they
+    are sent gzip encoded to clients that accept it and decompressed otherwise.
+    'game-default.log.1' gets 'game-default.log.1.gz' as well.
+
+    Parts of the file can be requested with a 'Range' header."""
+    log_dir = config.config["server"]["log_dir"]
+    files = await get_log_files()
+    if filename not in files:
+        filename += ".gz"
+        if filename not in files:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="There is no such log file.",
+            )
+    path = os.path.join(log_dir, filename)
+    compressed = filename.endswith(".gz")
+    encoded = compressed and router_utils.accepts_gzip(request)
+    size = logs.gzip_size(path) if compressed and not encoded else os.path.getsize(path)
+    requested = router_utils.byte_range(request, size)
+    start, end = requested or (0, size)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start),
+        "Vary": "Accept-Encoding",
+    }
+    if encoded:
+        headers["Content-Encoding"] = "gzip"
+    if requested:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(
+        logs.read_chunks(path, start, end, decompress=compressed and not encoded),
+        status_code=(
+            status.HTTP_206_PARTIAL_CONTENT if requested else status.HTTP_200_OK
+        ),
+        media_type="text/plain; charset=utf-8",
+        headers=headers,
+    )
+
+
+@router.get("/log_entries", tags=["logistics"])
+async def get_log_entries(
+    room: router_utils.room_annotation,
+    game: Annotated[
+        int,
+        Query(
+            description="0 for the log of the current game, 1 for the game before "
+            "and so on.",
+            ge=0,
+        ),
+    ] = 0,
+    tick_min: Annotated[int | None, Query(description="First tick.", ge=0)] = None,
+    tick_max: Annotated[int | None, Query(description="Last tick.", ge=0)] = None,
+    team: Annotated[
+        str | None, Query(description="Only the entries of this team.")
+    ] = None,
+    level: Annotated[
+        logs.LogLevel | None, Query(description="Only entries of this level or above.")
+    ] = None,
+    limit: Annotated[
+        int, Query(description="The maximum number of entries.", ge=1, le=10000)
+    ] = 1000,
+) -> list[dict[str, Any]]:
+    """The log entries of a game in the room, in the order they were logged.
+    Give tick_min and/or tick_max to get only the entries of those ticks, the
+    entries between games have no tick.
+
+    Only the parts of the log file with the requested ticks are read."""
+    log_file = logs.room_log_file(
+        os.path.join(config.config["server"]["log_dir"], "game.log"), room.name
+    )
+    path = log_file if game == 0 else logs.backup_path(log_file, game)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"There is no log of game {game}.",
+        )
+
+    def read() -> list[dict[str, Any]]:
+        return logs.read_entries(
+            path,
+            logs.log_index(log_file, game),
+            room.name,
+            tick_min,
+            tick_max,
+            team,
+            level,
+            limit,
+        )
+
+    return await asyncio.to_thread(read)
+
+
+@router.get("/rooms", tags=["logistics"])
+async def get_rooms() -> list[str]:
+    """The game rooms of this server. Each room runs its own games. Give the room
+    as the 'room' query parameter to the other services, the first room is used
+    if none is given."""
+    return list(globals.rooms)
+
+
+@router.get("/order_rejections", tags=["logistics"])
+async def get_order_rejections(
+    room: router_utils.room_annotation,
+) -> dict[str, dict[str, int]]:
+    """The number of orders rejected per team, because the team sent too many
+    orders per second ('rate') or per tick ('tick_budget')."""
+    order_limiter = router_utils.order_limiters.get(room.name)
+    return order_limiter.rejections if order_limiter else {}
 
 
 @router.get(
@@ -26,16 +157,97 @@ async def get_log_files() -> list[str]:
     # Set what the media type will be in the autogenerated OpenAPI specification.
     # fastapi.tiangolo.com/advanced/additional-responses/
     # additional-media-types-for-the-main-response
-    responses={200: {"content": {"image/png": {}}}},
+    responses={200: {"content": {"image/png": {}, "image/webp": {}}}},
     # Prevent FastAPI from adding "application/json" as an additional
     # response media type in the autogenerated OpenAPI specification.
     # https://github.com/tiangolo/fastapi/issues/3258
     response_class=Response,
 )
-def get_game_map() -> Response:
-    """Returns a png image of the current state of the game."""
-    image = draw.draw_game_map(globals.my_game.board)
-    return Response(content=image, media_type="image/png")
+async def get_game_map(
+    room: router_utils.room_annotation,
+    request: Request,
+    size: Annotated[
+        int | None,
+        Query(
+            description="The length of the longer side of the image in pixels, "
+            "rounded down to whole fields. The configured size if not given.",
+            ge=16,
+            le=draw.max_image_side,
+        ),
+    ] = None,
+    x_min: Annotated[int | None, Query(description="Left field to show.", ge=0)] = None,
+    y_min: Annotated[
+        int | None, Query(description="Lower field to show.", ge=0)
+    ] = None,
+    x_max: Annotated[
+        int | None, Query(description="Right field to show.", ge=0)
+    ] = None,
+    y_max: Annotated[
+        int | None, Query(description="Upper field to show.", ge=0)
+    ] = None,
+    image_format: Annotated[
+        draw.ImageFormat,
+        Query(
+            alias="format",
+            description="'png', 'fast_png' that is bigger but faster to make or "
+            "'webp' that is smaller.",
+        ),
+    ] = draw.ImageFormat.png,
+) -> Response:
+    """Returns an image of the current state of the game, the whole map or the
+    fields from x_min/y_min to x_max/y_max.
+
+    Each variant is rendered once per tick and may be cached until the next tick."""
+    board = room.my_game.board
+    last = board.map_size - 1
+    region: draw.Region | None = None
+    if any(bound is not None for bound in [x_min, y_min, x_max, y_max]):
+        region = (
+            x_min or 0,
+            y_min or 0,
+            last if x_max is None else x_max,
+            last if y_max is None else y_max,
+        )
+        if not (region[0] <= region[2] <= last and region[1] <= region[3] <= last):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"The region must be within 0 and {last} with the minimum "
+                "not above the maximum.",
+            )
+
+    # collected with the key, before the next tick can change the board, the
+    # image is drawn in a thread
+    key = (room.my_game, room.my_game.tick)
+    icons, annotations = draw.game_map_icons(board)
+
+    async def render() -> bytes:
+        return await asyncio.to_thread(
+            draw.draw_map,
+            icons,
+            annotations,
+            board.map_size,
+            size,
+            region,
+            image_format,
+        )
+
+    image, etag = await game_maps.get(
+        (room.name, size, region, image_format),
+        key,
+        render,
+    )
+    seconds_to_next_tick = (
+        room.time_of_next_execution - datetime.datetime.now()
+    ).total_seconds()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max(0, int(seconds_to_next_tick))}",
+    }
+    if router_utils.not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=image, media_type=draw.media_types[image_format], headers=headers
+    )
 
 
 @router.get("/status_page", tags=["web-page"])
@@ -1,10 +1,17 @@
+import asyncio
+import datetime
+import hashlib
+import math
 import secrets
-from typing import Annotated
+import time
+from typing import Annotated, Any, Awaitable, Callable, Hashable
 
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi import Depends, HTTPException, status, Query, Path, Body
+from fastapi import Depends, HTTPException, status, Query, Path, Body, Request, Response
+from pydantic import BaseModel
 
 import ascifight.config as config
+import ascifight.globals as globals
 import ascifight.board.data as data
 import ascifight.board.computations as computations
 
@@ -13,7 +20,8 @@ security = HTTPBasic()
 tags_metadata = [
     {
         "name": "orders",
-        "description": "Operations to give orders to your actors.",
+        "description": "Operations to give orders to your actors. Each actor "
+        "carries out one order of each type per tick, the latest one given.",
     },
     {
         "name": "states",
@@ -39,17 +47,18 @@ teams: dict[bytes, bytes] = {
 }
 
 
-def get_current_team(credentials: Annotated[HTTPBasicCredentials, Depends(security)]):
-    current_username_bytes = credentials.username.encode("utf8")
+def check_password(team: str, password: str) -> bool:
+    current_username_bytes = team.encode("utf8")
 
-    current_password_bytes = credentials.password.encode("utf8")
+    current_password_bytes = password.encode("utf8")
     correct_password_bytes = b""
     if current_username_bytes in teams.keys():
         correct_password_bytes = teams[current_username_bytes]
-    is_correct_password = secrets.compare_digest(
-        current_password_bytes, correct_password_bytes
-    )
-    if not is_correct_password:
+    return secrets.compare_digest(current_password_bytes, correct_password_bytes)
+
+
+def get_current_team(credentials: Annotated[HTTPBasicCredentials, Depends(security)]):
+    if not check_password(credentials.username, credentials.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -58,6 +67,220 @@ def get_current_team(credentials: Annotated[HTTPBasicCredentials, Depends(securi
     return credentials.username
 
 
+class TokenBucket:
+    """Allows 'rate' events per second on average and up to 'burst' at once."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens: float = burst
+        self.last = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token, returns 0 on success or else the seconds until a token is
+        available again."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class OrderLimiter:
+    """Limits the orders per team, both per second and per tick, and counts the
+    rejected orders."""
+
+    def __init__(
+        self,
+        rate: float = config.config["server"]["order_rate"],
+        burst: int = config.config["server"]["order_burst"],
+        orders_per_tick: int = config.config["server"]["orders_per_tick"],
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.orders_per_tick = orders_per_tick
+        self.buckets: dict[str, TokenBucket] = {}
+        self.tick = -1
+        self.tick_orders: dict[str, int] = {}
+        self.rejections: dict[str, dict[str, int]] = {}
+
+    def check(self, team: str, tick: int, seconds_to_next_tick: float) -> None:
+        if tick != self.tick:
+            self.tick = tick
+            self.tick_orders = {}
+        # an order rejected for the tick budget does not use up a token
+        if self.tick_orders.get(team, 0) >= self.orders_per_tick:
+            self._reject(
+                team,
+                "tick_budget",
+                seconds_to_next_tick,
+                f"Only {self.orders_per_tick} orders per tick allowed.",
+            )
+        bucket = self.buckets.setdefault(team, TokenBucket(self.rate, self.burst))
+        retry_after = bucket.take()
+        if retry_after:
+            self._reject(team, "rate", retry_after, "Too many orders per second.")
+        self.tick_orders[team] = self.tick_orders.get(team, 0) + 1
+
+    def _reject(self, team: str, reason: str, retry_after: float, message: str):
+        team_rejections = self.rejections.setdefault(team, {})
+        team_rejections[reason] = team_rejections.get(reason, 0) + 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{message} Retry after {retry_after:.2f} seconds.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def get_room(
+    room: Annotated[
+        str | None,
+        Query(description="The game room, the first room if not given."),
+    ] = None
+) -> globals.Room:
+    if room is None:
+        return next(iter(globals.rooms.values()))
+    try:
+        return globals.rooms[room]
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Room {room} does not exist.",
+        )
+
+
+room_annotation = Annotated[globals.Room, Depends(get_room)]
+
+order_limiters: dict[str, OrderLimiter] = {}
+
+
+def check_order_limit(team: str, room: globals.Room) -> None:
+    seconds_to_next_tick = (
+        room.time_of_next_execution - datetime.datetime.now()
+    ).total_seconds()
+    order_limiter = order_limiters.setdefault(room.name, OrderLimiter())
+    order_limiter.check(team, room.my_game.tick, seconds_to_next_tick)
+
+
+def limit_orders(
+    team: Annotated[str, Depends(get_current_team)], room: room_annotation
+) -> str:
+    check_order_limit(team, room)
+    return team
+
+
+class CachedResponse:
+    """A response rendered to bytes once and served to every request of a room
+    until its key changes, e.g. with the next tick. Requests with the ETag of the
+    current bytes get a 304 Not Modified."""
+
+    def __init__(self, render: Callable[[globals.Room], BaseModel]) -> None:
+        self.render = render
+        # room name -> key, body, etag
+        self._entries: dict[str, tuple[Any, bytes, str]] = {}
+
+    def body(self, room: globals.Room, key: Any) -> tuple[bytes, str]:
+        """The rendered bytes and their ETag."""
+        entry = self._entries.get(room.name)
+        if entry is None or entry[0] != key:
+            body = self.render(room).model_dump_json().encode("utf8")
+            etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            entry = (key, body, etag)
+            self._entries[room.name] = entry
+        return entry[1], entry[2]
+
+    def respond(self, room: globals.Room, key: Any, request: Request) -> Response:
+        body, etag = self.body(room, key)
+        if not_modified(request, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return Response(
+            content=body, media_type="application/json", headers={"ETag": etag}
+        )
+
+
+class RenderCache:
+    """Renders that are expensive, like images, made once per key, e.g. a tick.
+    Concurrent requests for the same key wait for the same render."""
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        # name -> key, render task of the body and its etag, oldest first
+        self._entries: dict[Hashable, tuple[Any, asyncio.Task]] = {}
+
+    async def get(
+        self,
+        name: Hashable,
+        key: Any,
+        render: Callable[[], Awaitable[bytes]],
+    ) -> tuple[bytes, str]:
+        """The rendered bytes and their ETag."""
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, asyncio.create_task(self._render(render)))
+            self._entries.pop(name, None)
+            if len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[name] = entry
+        try:
+            return await asyncio.shield(entry[1])
+        except Exception:
+            # render again with the next request
+            if self._entries.get(name) is entry:
+                del self._entries[name]
+            raise
+
+    @staticmethod
+    async def _render(render: Callable[[], Awaitable[bytes]]) -> tuple[bytes, str]:
+        body = await render()
+        return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, parameters = coding.partition(";")
+        if name.strip() in ["gzip", "*"]:
+            quality = parameters.strip().removeprefix("q=")
+            try:
+                return float(quality or 1) > 0
+            except ValueError:
+                return True
+    return False
+
+
+def byte_range(request: Request, size: int) -> tuple[int, int] | None:
+    """The start and end, excluded, of the requested range, None for all of it.
+    Several ranges are not supported, all of the content is sent instead."""
+    header = request.headers.get("range", "")
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        else:
+            # the last bytes
+            start, end = max(0, size - int(last)), size
+    except ValueError:
+        return None
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
 actor_annotation = Annotated[
     int,
     Path(
@@ -0,0 +1,151 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, WebSocket, status
+from pydantic import BaseModel, Field
+
+import ascifight.globals as globals
+import ascifight.routers.states as states
+import ascifight.routers.router_utils as router_utils
+
+
+class SpectatorStatistics(BaseModel):
+    """How the spectators of a room keep up with the game."""
+
+    connected: int = Field(description="The number of connected spectators.")
+    lagging: int = Field(
+        description="The number of spectators that had to skip the last frame "
+        "because they were still receiving an older one."
+    )
+    frames: int = Field(description="The number of frames sent out.")
+    skipped_frames: int = Field(
+        description="The number of frames spectators skipped in total."
+    )
+
+
+class Spectator:
+    """Holds only the newest frame not yet sent to a spectator. A new frame
+    replaces an unsent one, so a slow connection skips frames instead of
+    falling behind."""
+
+    def __init__(self) -> None:
+        self.frame: str | None = None
+        self.ready = asyncio.Event()
+        self.lagging = False
+
+    def offer(self, frame: str) -> bool:
+        """Returns if an unsent frame was skipped."""
+        self.lagging = self.frame is not None
+        self.frame = frame
+        self.ready.set()
+        return self.lagging
+
+    async def next_frame(self) -> str:
+        await self.ready.wait()
+        self.ready.clear()
+        frame, self.frame = self.frame, None
+        return frame  # type: ignore
+
+
+class SpectatorHub:
+    """Encodes the update of every tick of a room once and hands it to all
+    spectators of the room."""
+
+    def __init__(self, room: globals.Room) -> None:
+        self.room = room
+        self.spectators: set[Spectator] = set()
+        self.frame: str | None = None
+        self.frames = 0
+        self.skipped_frames = 0
+        self.task = asyncio.create_task(self._publish_ticks())
+
+    def subscribe(self) -> Spectator:
+        spectator = Spectator()
+        if self.frame is not None:
+            spectator.offer(self.frame)
+        self.spectators.add(spectator)
+        return spectator
+
+    def unsubscribe(self, spectator: Spectator) -> None:
+        self.spectators.discard(spectator)
+
+    def publish(self, frame: str) -> None:
+        self.frame = frame
+        self.frames += 1
+        for spectator in self.spectators:
+            self.skipped_frames += spectator.offer(frame)
+
+    def statistics(self) -> SpectatorStatistics:
+        return SpectatorStatistics(
+            connected=len(self.spectators),
+            lagging=sum(spectator.lagging for spectator in self.spectators),
+            frames=self.frames,
+            skipped_frames=self.skipped_frames,
+        )
+
+    async def _publish_ticks(self) -> None:
+        while True:
+            # get the event before rendering, so no tick is missed
+            tick_event = self.room.tick_event
+            self.publish(self._render())
+            await tick_event.wait()
+
+    def _render(self) -> str:
+        room = self.room
+        state, _ = states.game_state_response.body(room, states.game_state_key(room))
+        scores, _ = states.scores_response.body(room, states.scores_key(room))
+        return (
+            f'{{"type":"tick","tick":{room.my_game.tick},'
+            f'"state":{state.decode("utf8")},"scores":{scores.decode("utf8")}}}'
+        )
+
+
+hubs: dict[str, SpectatorHub] = {}
+
+
+def get_hub(room: globals.Room) -> SpectatorHub:
+    if room.name not in hubs:
+        hubs[room.name] = SpectatorHub(room)
+    return hubs[room.name]
+
+
+router = APIRouter(
+    prefix="/spectators",
+    tags=["web-page"],
+)
+
+
+@router.websocket("/ws")
+async def spectator_socket(websocket: WebSocket, room: str | None = None) -> None:
+    """Pushes the game state and scores of every tick to a spectator."""
+    await websocket.accept()
+    try:
+        current_room = router_utils.get_room(room)
+    except HTTPException as error:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+        return
+    hub = get_hub(current_room)
+    spectator = hub.subscribe()
+    sender = asyncio.create_task(_send_frames(websocket, spectator))
+    try:
+        # spectators send nothing, this only notices when they leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(spectator)
+
+
+async def _send_frames(websocket: WebSocket, spectator: Spectator) -> None:
+    while True:
+        await websocket.send_text(await spectator.next_frame())
+
+
+@router.get("/statistics")
+async def get_spectator_statistics(
+    room: router_utils.room_annotation,
+) -> SpectatorStatistics:
+    """The number of spectators watching the game over the spectator WebSocket
+    _/spectators/ws_ and how many of them can not keep up."""
+    if room.name not in hubs:
+        return SpectatorStatistics(connected=0, lagging=0, frames=0, skipped_frames=0)
+    return hubs[room.name].statistics()
@@ -1,12 +1,17 @@
+import asyncio
 import datetime
+import time
+from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request
 from pydantic import BaseModel, Field
 
 import ascifight.config as config
 import ascifight.globals as globals
 import ascifight.board.data as data
+import ascifight.board.computations as computations
 import ascifight.util as util
+import ascifight.routers.router_utils as router_utils
 
 
 class ActorDescription(BaseModel):
@@ -71,12 +76,39 @@ class StateResponse(BaseModel):
         description="A list of all walls in the game. Actors can not enter wall fields."
     )
     scores: dict[str, int] = Field(description="A dictionary of the current scores.")
+    game: str = Field(description="Identifies the game, every game has another one.")
     tick: int = Field(description="The last game tick.")
     time_of_next_execution: datetime.datetime = Field(
         description="The time of next execution."
     )
 
 
+class StateDeltaResponse(BaseModel):
+    """The entities of a game that changed since a tick."""
+
+    game: str = Field(description="Identifies the game, every game has another one.")
+    since: int = Field(description="The tick the changes are relative to.")
+    tick: int = Field(description="The last game tick.")
+    full_state: StateResponse | None = Field(
+        description="The complete state of the game if the changes since the "
+        "requested tick are not known. All other entity lists are empty then."
+    )
+    actors: list[ActorDescription] = Field(
+        description="The actors that moved or grabbed or lost a flag."
+    )
+    flags: list[FlagDescription] = Field(description="The flags that moved.")
+    walls_added: list[data.Coordinates] = Field(
+        description="The walls that were built."
+    )
+    walls_removed: list[data.Coordinates] = Field(
+        description="The walls that were destroyed."
+    )
+    scores: dict[str, int] = Field(description="A dictionary of the current scores.")
+    time_of_next_execution: datetime.datetime = Field(
+        description="The time of next execution."
+    )
+
+
 class TimingResponse(BaseModel):
     """Various current timing data."""
 
@@ -87,6 +119,13 @@ class TimingResponse(BaseModel):
     time_of_next_execution: datetime.datetime = Field(
         description="The time of next execution."
     )
+    tick_duration: float = Field(
+        description="The time the last tick took to execute in seconds."
+    )
+    tick_slack: float = Field(
+        description="The time left of the tick wait time after executing the last "
+        "tick in seconds. Negative if the tick took longer than the wait time."
+    )
 
 
 class RulesResponse(BaseModel):
@@ -116,6 +155,10 @@ class RulesResponse(BaseModel):
             "scores."
         ),
     )
+    seed: int = Field(
+        description="The seed of the game. The same seed and the same orders "
+        "result in the same game.",
+    )
     actor_properties: list[data.ActorProperty] = Field(
         description=(
             "A list of actors and their properties describing which orders "
@@ -130,58 +173,171 @@ router = APIRouter(
 )
 
 
-@router.get("/game_state")
-async def get_game_state() -> StateResponse:
-    """Get the current state of the game including locations of all actors,
-    flags, bases and walls."""
+def game_state(room: globals.Room) -> StateResponse:
+    board = room.my_game.board
     return StateResponse(
-        teams=[team.name for team in globals.my_game.board.teams],
+        teams=[team.name for team in board.teams],
         actors=[
-            ActorDescription(
-                type=actor.__class__.__name__,
-                team=actor.team.name,
-                ident=actor.ident,
-                flag=actor.flag.team.name if actor.flag else None,
-                coordinates=coordinates,
-            )
-            for actor, coordinates in globals.my_game.board.actors_coordinates.items()
+            actor_description(actor, coordinates)
+            for actor, coordinates in board.actors_coordinates.items()
         ],
         flags=[
             FlagDescription(team=flag.team.name, coordinates=coordinates)
-            for flag, coordinates in globals.my_game.board.flags_coordinates.items()
+            for flag, coordinates in board.flags_coordinates.items()
         ],
         bases=[
             BaseDescription(team=base.team.name, coordinates=coordinates)
-            for base, coordinates in globals.my_game.board.bases_coordinates.items()
+            for base, coordinates in board.bases_coordinates.items()
         ],
-        walls=list(globals.my_game.board.walls_coordinates),
-        scores={team.name: score for team, score in globals.my_game.scores.items()},
-        tick=globals.my_game.tick,
-        time_of_next_execution=globals.time_of_next_execution,
+        walls=list(board.walls_coordinates),
+        scores={team.name: score for team, score in room.my_game.scores.items()},
+        game=room.my_game.ident,
+        tick=room.my_game.tick,
+        time_of_next_execution=room.time_of_next_execution,
     )
 
 
-@router.get("/scores")
-async def get_scores() -> AllScoresResponse:
-    """Get the scores of the current game as well as all games in total."""
+def actor_description(
+    actor: data.Actor, coordinates: data.Coordinates
+) -> ActorDescription:
+    return ActorDescription(
+        type=actor.__class__.__name__,
+        team=actor.team.name,
+        ident=actor.ident,
+        flag=actor.flag.team.name if actor.flag else None,
+        coordinates=coordinates,
+    )
+
+
+game_state_response = router_utils.CachedResponse(game_state)
+
+
+def game_state_key(room: globals.Room) -> tuple:
+    """The game state changes with these."""
+    return (room.my_game, room.my_game.tick, room.time_of_next_execution)
+
+
+@router.get("/game_state")
+async def get_game_state(
+    room: router_utils.room_annotation, request: Request
+) -> StateResponse:
+    """Get the current state of the game including locations of all actors,
+    flags, bases and walls.
+
+    The state only changes with a tick. Send the ETag of the last response in
+    an If-None-Match header to get an empty 304 response until then."""
+    return game_state_response.respond(  # type: ignore
+        room, game_state_key(room), request
+    )
+
+
+@router.get("/next_tick")
+async def get_next_tick(
+    room: router_utils.room_annotation,
+    request: Request,
+    after: Annotated[
+        int, Query(description="The last tick you know the state of.", ge=0)
+    ],
+    timeout: Annotated[
+        float,
+        Query(description="The maximum time to wait in seconds.", gt=0, le=120),
+    ] = 30,
+) -> StateResponse:
+    """Wait until the tick after the given one was executed and get the new
+    _Game State_. Returns at once if the game is already past the given tick or a
+    new game started. After the timeout the current state is returned, check its
+    tick.
+
+    Instead of polling the _Timing_ call this with the tick you got last, you get
+    the new state as soon as the tick was executed and the full time to give
+    orders."""
+    deadline = time.monotonic() + timeout
+    while room.my_game.tick == after:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            await asyncio.wait_for(room.tick_event.wait(), remaining)
+        except asyncio.TimeoutError:
+            break
+    return await get_game_state(room, request)
+
+
+@router.get("/game_state_delta")
+async def get_game_state_delta(
+    room: router_utils.room_annotation,
+    since: Annotated[
+        int, Query(description="The last tick you know the state of.", ge=0)
+    ],
+    game: Annotated[
+        str, Query(description="The game of that tick, as in the state you got.")
+    ],
+) -> StateDeltaResponse:
+    """Get only the actors, flags and walls that changed since the given tick.
+    Ask for the full _Game State_ once, then for the changes since the tick you
+    got last.
+
+    Only the changes of the last ticks of the current game are kept. If the
+    requested tick is too old or of another game, the full state is returned
+    instead."""
+    current_game = room.my_game
+    board = current_game.board
+    scores = {team.name: score for team, score in current_game.scores.items()}
+    old_state = room.states.get(since)
+    new_state = room.states.get(current_game.tick)
+    if game != current_game.ident or old_state is None or new_state is None:
+        return StateDeltaResponse(
+            game=current_game.ident,
+            since=since,
+            tick=current_game.tick,
+            full_state=game_state(room),
+            actors=[],
+            flags=[],
+            walls_added=[],
+            walls_removed=[],
+            scores=scores,
+            time_of_next_execution=room.time_of_next_execution,
+        )
+    delta = old_state.diff(new_state)
+    grid = computations.get_grid(board.map_size)
+    actors = [
+        board.teams_actors[(board.teams[team], ident)] for team, ident in delta.actors
+    ]
+    return StateDeltaResponse(
+        game=current_game.ident,
+        since=since,
+        tick=current_game.tick,
+        full_state=None,
+        actors=[
+            actor_description(actor, board.actors_coordinates[actor])
+            for actor in actors
+        ],
+        flags=[
+            FlagDescription(team=board.teams[team].name, coordinates=grid.at(x, y))
+            for team, (x, y, _) in delta.flags.items()
+        ],
+        walls_added=[grid.at(x, y) for x, y in delta.walls_added],
+        walls_removed=[grid.at(x, y) for x, y in delta.walls_removed],
+        scores=scores,
+        time_of_next_execution=room.time_of_next_execution,
+    )
+
+
+def scores(room: globals.Room) -> AllScoresResponse:
     return AllScoresResponse(
         scores=[
             Scores(team=team.name, score=score, color=util.color_names[team.number])
-            for team, score in globals.my_game.scores.items()
+            for team, score in room.my_game.scores.items()
         ],
         overall_scores=[
             Scores(team=team.name, score=score, color=util.color_names[team.number])
-            for team, score in globals.my_game.overall_scores.items()
+            for team, score in room.my_game.overall_scores.items()
         ],
     )
 
 
-@router.get("/game_rules")
-async def get_game_rules() -> RulesResponse:
-    """This section is static per game and returns what each actor can do,
-    if the flag needs to be at home to score, what the maximum score or
-    tick number is and other static information."""
-    actor_properties = globals.my_game.board.get_actor_properties()
+def game_rules(room: globals.Room) -> RulesResponse:
+    actor_properties = room.my_game.board.get_actor_properties()
     return RulesResponse(
         map_size=config.config["game"]["map_size"],
         max_ticks=config.config["game"]["max_ticks"],
@@ -190,22 +346,61 @@ async def get_game_rules() -> RulesResponse:
         kill_score=config.config["game"]["kill_score"],
         winning_bonus=config.config["game"]["winning_bonus"],
         home_flag_required=config.config["game"]["home_flag_required"],
+        seed=room.my_game.seed,
         actor_properties=actor_properties,
     )
 
 
+scores_response = router_utils.CachedResponse(scores)
+
+
+def scores_key(room: globals.Room) -> tuple:
+    """The scores change with these."""
+    return (room.my_game, room.my_game.tick)
+
+
+game_rules_response = router_utils.CachedResponse(game_rules)
+
+
+@router.get("/scores")
+async def get_scores(
+    room: router_utils.room_annotation, request: Request
+) -> AllScoresResponse:
+    """Get the scores of the current game as well as all games in total.
+
+    Supports ETags like the _Game State_."""
+    return scores_response.respond(room, scores_key(room), request)  # type: ignore
+
+
+@router.get("/game_rules")
+async def get_game_rules(
+    room: router_utils.room_annotation, request: Request
+) -> RulesResponse:
+    """This section is static per game and returns what each actor can do,
+    if the flag needs to be at home to score, what the maximum score or
+    tick number is and other static information.
+
+    Supports ETags like the _Game State_."""
+    return game_rules_response.respond(room, room.my_game, request)  # type: ignore
+
+
 @router.get("/timing")
-async def get_timing() -> TimingResponse:
+async def get_timing(room: router_utils.room_annotation) -> TimingResponse:
     """
     Returns the current tick and when the next tick executes both on absolute time
     and time-deltas. If current tick is 0, game has not yet started.
 
     This is more lightweight than the _Game State_ an can be queried
-    often. Get the current tick and time of next execution."""
+    often. Get the current tick and time of next execution.
+
+    Ticks are executed at fixed times, the time it took to execute the last tick
+    and the time that was left until the next tick are reported as well."""
     return TimingResponse(
-        tick=globals.my_game.tick,
+        tick=room.my_game.tick,
         time_to_next_execution=(
-            globals.time_of_next_execution - datetime.datetime.now()
+            room.time_of_next_execution - datetime.datetime.now()
         ).total_seconds(),
-        time_of_next_execution=globals.time_of_next_execution,
+        time_of_next_execution=room.time_of_next_execution,
+        tick_duration=room.tick_duration,
+        tick_slack=room.tick_slack,
     )
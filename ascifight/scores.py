@@ -0,0 +1,193 @@
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+
+import structlog
+
+logger = structlog.get_logger()
+
+schema = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER,
+    ticks INTEGER,
+    finished TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_scores (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    team TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (game_id, team)
+);
+CREATE TABLE IF NOT EXISTS team_totals (
+    team TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    games INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY
+);
+"""
+
+_close = object()
+
+
+class ScoreStore:
+    """The scores of all finished games in an SQLite database. The overall
+    score of each team is kept up to date in its own table and in memory, it
+    does not have to be summed up for a new game.
+
+    Games are written by a background thread, adding one does not wait for
+    the database."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        connection = self._connect()
+        with connection:
+            connection.executescript(schema)
+        self._totals: dict[str, int] = dict(
+            connection.execute("SELECT team, score FROM team_totals")
+        )
+        connection.close()
+        self._lock = threading.Lock()
+        # the score files checked for an import by this process
+        self._checked_files: set[str] = set()
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._write, name="score-store", daemon=True
+        )
+        self._writer.start()
+
+    def totals(self) -> dict[str, int]:
+        """The overall score of every team that ever played."""
+        with self._lock:
+            return dict(self._totals)
+
+    def add_game(
+        self,
+        scores: list[tuple[str, int]],
+        seed: int | None = None,
+        ticks: int | None = None,
+    ) -> None:
+        """Add the final scores of a game by team name."""
+        with self._lock:
+            for team, score in scores:
+                self._totals[team] = self._totals.get(team, 0) + score
+        finished = datetime.datetime.now().isoformat()
+        self._writes.put((scores, seed, ticks, finished))
+
+    def import_log(self, score_file: str) -> int:
+        """Add the games of a score file as written by earlier versions, once.
+        The file has a 'team: score' line per team and game, highest score
+        first. A game ends before a team appears the second time or a score is
+        higher than the one before it. Consecutive games of different teams
+        where the first score of a game is not higher than the last of the
+        game before can not be told apart and are imported as one. Returns the
+        number of games."""
+        absolute_path = os.path.abspath(score_file)
+        if absolute_path in self._checked_files or not os.path.exists(absolute_path):
+            return 0
+        self._checked_files.add(absolute_path)
+        connection = self._connect()
+        try:
+            imported = connection.execute(
+                "SELECT 1 FROM imported_files WHERE path = ?", (absolute_path,)
+            ).fetchone()
+            if imported:
+                return 0
+            games: list[list[tuple[str, int]]] = [[]]
+            with open(absolute_path) as fp:
+                for line in fp:
+                    team, _, score_text = line.rpartition(":")
+                    try:
+                        team, score = team.strip(), int(score_text)
+                    except ValueError:
+                        continue
+                    if games[-1] and (
+                        team in [name for name, _ in games[-1]]
+                        or score > games[-1][-1][1]
+                    ):
+                        games.append([])
+                    games[-1].append((team, score))
+            games = [game_scores for game_scores in games if game_scores]
+            with connection:
+                for game_scores in games:
+                    self._insert(connection, game_scores, None, None, "imported")
+                connection.execute(
+                    "INSERT INTO imported_files (path) VALUES (?)", (absolute_path,)
+                )
+            with self._lock:
+                for game_scores in games:
+                    for team, score in game_scores:
+                        self._totals[team] = self._totals.get(team, 0) + score
+        finally:
+            connection.close()
+        logger.info("Imported %s games from %s.", len(games), score_file)
+        return len(games)
+
+    def close(self) -> None:
+        """Write the remaining games and stop the writer."""
+        if self._writer.is_alive():
+            self._writes.put(_close)
+            self._writer.join()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        # readers do not block the writer and the other way around
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write(self) -> None:
+        connection = self._connect()
+        while True:
+            write = self._writes.get()
+            if write is _close:
+                break
+            try:
+                with connection:
+                    self._insert(connection, *write)
+            except sqlite3.Error:
+                logger.exception("Could not save the scores of a game.")
+        connection.close()
+
+    @staticmethod
+    def _insert(
+        connection: sqlite3.Connection,
+        scores: list[tuple[str, int]],
+        seed: int | None,
+        ticks: int | None,
+        finished: str,
+    ) -> None:
+        game_id = connection.execute(
+            "INSERT INTO games (seed, ticks, finished) VALUES (?, ?, ?)",
+            (seed, ticks, finished),
+        ).lastrowid
+        connection.executemany(
+            "INSERT INTO game_scores (game_id, team, score) VALUES (?, ?, ?)",
+            [(game_id, team, score) for team, score in scores],
+        )
+        connection.executemany(
+            "INSERT INTO team_totals (team, score, games) VALUES (?, ?, 1) "
+            "ON CONFLICT (team) DO UPDATE SET "
+            "score = score + excluded.score, games = games + 1",
+            scores,
+        )
+
+
+stores: dict[str, ScoreStore] = {}
+
+
+def get_store(path: str) -> ScoreStore:
+    """The store of the database, opened once per process."""
+    if path not in stores:
+        stores[path] = ScoreStore(path)
+    return stores[path]
+
+
+def close_stores() -> None:
+    for store in stores.values():
+        store.close()
+    stores.clear()
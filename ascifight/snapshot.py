@@ -0,0 +1,207 @@
+"""Crash-safe snapshots of running games.
+
+Every few ticks the game of a room is written to a snapshot file, and every order
+the room accepts is appended to its order journal. After a restart the game is
+restored from the snapshot and the ticks played since are executed again from the
+journal. Games are deterministic for a seed, so this gives the same game.
+"""
+import json
+import os
+import pickle
+from typing import Any
+
+import ascifight.game as game
+import ascifight.replay as replay
+import ascifight.scores as scores
+import ascifight.board.state as state
+
+order_types: dict[str, type[game.ActorOrder]] = {
+    order_type.__name__: order_type for order_type in replay.ORDER_TYPES
+}
+
+
+def snapshot_path(directory: str, room_name: str) -> str:
+    return os.path.join(directory, f"{room_name}.snapshot")
+
+
+def journal_path(directory: str, room_name: str) -> str:
+    return os.path.join(directory, f"{room_name}.journal")
+
+
+class Snapshot:
+    """Everything needed to continue a game at a tick."""
+
+    def __init__(
+        self,
+        tick: int,
+        seed: int,
+        rng_state: tuple[Any, ...],
+        scores: dict[str, int],
+        teams: list[str],
+        actors: list[str],
+        map_size: int,
+        board: state.BoardState,
+        rules: dict[str, int],
+        replay_file: str | None = None,
+    ) -> None:
+        self.tick = tick
+        self.seed = seed
+        self.rng_state = rng_state
+        self.scores = scores
+        self.teams = teams
+        self.actors = actors
+        self.map_size = map_size
+        self.board = board
+        self.rules = rules
+        # the replay the game is recorded to, continued after a restart
+        self.replay_file = replay_file
+
+    @classmethod
+    def capture(
+        cls, current_game: game.Game, replay_file: str | None = None
+    ) -> "Snapshot":
+        board = current_game.board
+        return cls(
+            tick=current_game.tick,
+            seed=current_game.seed,
+            rng_state=current_game.rng.getstate(),
+            scores={team.name: score for team, score in current_game.scores.items()},
+            teams=[team.name for team in board.teams],
+            actors=[actor.__name__ for actor in board.actor_classes],
+            map_size=board.map_size,
+            board=state.BoardState.capture(board),
+            rules={
+                "capture_score": current_game.capture_score,
+                "kill_score": current_game.kill_score,
+                "winning_bonus": current_game.winning_bonus,
+                "max_ticks": current_game.max_ticks,
+                "max_score": current_game.max_score,
+            },
+            replay_file=replay_file,
+        )
+
+    def check(self, teams: list[str], actors: list[str], map_size: int) -> None:
+        """Raise a ValueError if the game does not fit the given board config,
+        the config may have changed since the snapshot was written."""
+        if (self.teams, self.actors, self.map_size) != (teams, actors, map_size):
+            raise ValueError(
+                "The teams, actors or map size of the snapshot do not match the "
+                "config."
+            )
+
+    def restore(
+        self, score_file: str, score_store: scores.ScoreStore | None = None
+    ) -> game.Game:
+        restored = game.Game(
+            game_board=self.board.to_board(self.teams, self.actors, self.map_size),
+            score_file=score_file,
+            score_store=score_store,
+            seed=self.seed,
+            **self.rules,
+        )
+        restored.rng.setstate(self.rng_state)
+        restored.resume_game(self.tick, self.scores)
+        return restored
+
+    def save(self, path: str) -> None:
+        """Write the snapshot atomically, a crash leaves the previous one intact."""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as snapshot_file:
+            pickle.dump(self, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path: str) -> "Snapshot | None":
+        try:
+            with open(path, "rb") as snapshot_file:
+                return pickle.load(snapshot_file)
+        except FileNotFoundError:
+            return None
+
+
+class OrderJournal:
+    """An append-only log of the orders accepted in a game, one JSON line each.
+    A tick line marks that the orders before it were executed in that tick.
+
+    Lines are handed to the OS right away, so they survive a crash of the server
+    process. They are synced to disk only once per tick."""
+
+    def __init__(self, path: str, truncate: bool = False) -> None:
+        self._file = open(path, "w" if truncate else "a", encoding="utf8")
+
+    def append(self, order: game.ActorOrder) -> None:
+        line = {"type": type(order).__name__, "order": order.model_dump(mode="json")}
+        self._file.write(json.dumps(line) + "\n")
+        self._file.flush()
+
+    def mark_tick(self, tick: int) -> None:
+        self._file.write(json.dumps({"tick": tick}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_journal(
+    path: str,
+) -> tuple[dict[int, list[game.ActorOrder]], list[game.ActorOrder]]:
+    """The orders executed in each tick and the orders still waiting for the
+    next tick, both as the order book of the game gave them out."""
+    executed: dict[int, list[game.ActorOrder]] = {}
+    order_book = game.OrderBook()
+    try:
+        with open(path, encoding="utf8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                # the last line may be cut off by the crash
+                except json.JSONDecodeError:
+                    break
+                if "tick" in entry:
+                    executed[entry["tick"]] = order_book.pop_all()
+                else:
+                    order_book.add(order_types[entry["type"]](**entry["order"]))
+    except FileNotFoundError:
+        pass
+    return executed, order_book.pop_all()
+
+
+def resume(
+    directory: str,
+    room_name: str,
+    score_file: str,
+    score_store: scores.ScoreStore | None = None,
+    board_config: tuple[list[str], list[str], int] | None = None,
+) -> tuple[game.Game, game.OrderBook, str | None] | None:
+    """The interrupted game of a room, its pending orders and its replay file, if
+    there is one. With the teams, actors and map size of board_config a snapshot
+    of another board raises a ValueError. A snapshot that can not be read raises
+    what unpickling raised."""
+    snapshot = Snapshot.load(snapshot_path(directory, room_name))
+    if snapshot is None:
+        return None
+    if board_config is not None:
+        snapshot.check(*board_config)
+    current_game = snapshot.restore(score_file, score_store)
+    executed, pending = read_journal(journal_path(directory, room_name))
+    while current_game.tick + 1 in executed:
+        current_game.execute_game_step(executed[current_game.tick + 1])
+    order_book = game.OrderBook()
+    for order in pending:
+        order_book.add(order)
+    return current_game, order_book, snapshot.replay_file
+
+
+def remove(directory: str, room_name: str) -> None:
+    """Forget the game of a room once it ended."""
+    for path in [
+        snapshot_path(directory, room_name),
+        journal_path(directory, room_name),
+    ]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
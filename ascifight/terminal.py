@@ -0,0 +1,92 @@
+import sys
+from typing import TextIO
+
+import ascifight.game as game
+import ascifight.board.data as data
+
+CLEAR = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[2K"
+
+
+def move_to(row: int, column: int) -> str:
+    """Move the cursor, both start at 1 in the upper left."""
+    return f"\x1b[{row};{column}H"
+
+
+class ConsoleStream:
+    """The stream of the console log handler. It remembers that something was
+    written, log lines scroll the terminal and the board has to be drawn in
+    full again."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.written = False
+
+    def write(self, text: str) -> int:
+        self.written = True
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+log_stream = ConsoleStream(sys.stderr)
+
+
+class TerminalRenderer:
+    """Shows the scoreboard and the board of a game in an ANSI terminal. The
+    first frame clears the screen and draws everything, later frames only move
+    the cursor to the lines and fields that changed and overwrite them. After
+    anything was logged to the console the frame is drawn in full again."""
+
+    def __init__(
+        self, stream: TextIO = sys.stdout, logs: ConsoleStream = log_stream
+    ) -> None:
+        self.stream = stream
+        self.logs = logs
+        self._scoreboard: list[str] | None = None
+        self._cells: dict[tuple[int, int], str] = {}
+        self._map_size = 0
+
+    def draw(self, current_game: game.Game) -> None:
+        board = current_game.board
+        scoreboard = current_game.scoreboard().split("\n")
+        cells = board.cells()
+        # cleared first, lines logged while drawing are redrawn next time
+        logged, self.logs.written = self.logs.written, False
+        if (
+            self._scoreboard is None
+            or len(scoreboard) != len(self._scoreboard)
+            or board.map_size != self._map_size
+            or logged
+        ):
+            frame = CLEAR + "\n".join(scoreboard) + "\n" + board.image()
+        else:
+            frame = self._changes(scoreboard, cells, board.map_size)
+        self._scoreboard = scoreboard
+        self._cells = cells
+        self._map_size = board.map_size
+        self.stream.write(frame)
+        self.stream.flush()
+
+    def _changes(
+        self,
+        scoreboard: list[str],
+        cells: dict[tuple[int, int], str],
+        map_size: int,
+    ) -> str:
+        assert self._scoreboard is not None
+        changes = []
+        for row, (line, old_line) in enumerate(zip(scoreboard, self._scoreboard)):
+            if line != old_line:
+                changes.append(move_to(row + 1, 1) + CLEAR_LINE + line)
+        # the board starts below the scoreboard, (0,0) is in the lower left
+        top = len(scoreboard) + 1
+        for coordinates in cells.keys() | self._cells.keys():
+            cell = cells.get(coordinates, data.empty_cell)
+            if cell != self._cells.get(coordinates, data.empty_cell):
+                x, y = coordinates
+                changes.append(move_to(top + map_size - 1 - y, 1 + 3 * x) + cell)
+        # leave the cursor below the board
+        changes.append(move_to(top + map_size, 1))
+        return "".join(changes)
@@ -0,0 +1,154 @@
+import argparse
+import concurrent.futures
+import itertools
+import os
+import random
+import time
+from typing import Iterable, Iterator
+
+from pydantic import BaseModel, Field
+
+import ascifight.config as config
+import ascifight.headless as headless
+
+
+class Match(BaseModel):
+    """A single game of a tournament."""
+
+    strategies: list[str] = Field(
+        description="The strategies playing against each other, one team each."
+    )
+    seed: int = Field(description="The seed the game is played with.")
+
+
+class MatchResult(BaseModel):
+    """The outcome of a match."""
+
+    match: Match = Field(description="The match that was played.")
+    result: headless.GameResult = Field(description="The result of the game.")
+
+
+class Standings(BaseModel):
+    """The aggregated scores of all matches played so far."""
+
+    overall_scores: dict[str, int] = Field(
+        default_factory=dict, description="The overall scores per strategy."
+    )
+    games: int = Field(default=0, description="The number of games played.")
+    ticks: int = Field(default=0, description="The number of ticks played.")
+
+    def add(self, match_result: MatchResult) -> None:
+        # the same way the overall scores of the server are aggregated
+        for strategy, score in match_result.result.final_scores.items():
+            self.overall_scores[strategy] = self.overall_scores.get(strategy, 0) + score
+        self.games += 1
+        self.ticks += match_result.result.ticks
+
+    def ranking(self) -> list[tuple[str, int]]:
+        return sorted(self.overall_scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def round_robin(
+    strategies: list[str],
+    teams_per_game: int = 2,
+    rounds: int = 1,
+    seed: int | None = None,
+) -> list[Match]:
+    """Every combination of strategies plays 'rounds' games with different seeds."""
+    seeds = random.Random(seed)
+    return [
+        Match(strategies=list(pairing), seed=seeds.randrange(2**32))
+        for _ in range(rounds)
+        for pairing in itertools.combinations(strategies, teams_per_game)
+    ]
+
+
+def play_match(match: Match, game_options: dict) -> MatchResult:
+    # the strategies use the global random module
+    random.seed(match.seed)
+    order_providers = {
+        strategy: headless.strategies[strategy] for strategy in match.strategies
+    }
+    result = headless.run_game(order_providers, seed=match.seed, **game_options)
+    return MatchResult(match=match, result=result)
+
+
+def run_tournament(
+    matches: Iterable[Match],
+    workers: int | None = None,
+    log_level: str = "error",
+    **game_options,
+) -> Iterator[MatchResult]:
+    """Play all matches on a pool of processes, one per core by default, and yield
+    the results in the order they finish."""
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=headless.configure_logging,
+        initargs=(log_level,),
+    ) as executor:
+        futures = [
+            executor.submit(play_match, match, game_options) for match in matches
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Play a round robin tournament of bot strategies on all cores."
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=list(headless.strategies),
+        default=list(headless.strategies),
+    )
+    parser.add_argument("--teams-per-game", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--map-size", type=int, default=config.config["game"]["map_size"]
+    )
+    parser.add_argument("--walls", type=int, default=config.config["game"]["walls"])
+    parser.add_argument(
+        "--max-ticks", type=int, default=config.config["game"]["max_ticks"]
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="error")
+    args = parser.parse_args()
+
+    matches = round_robin(
+        args.strategies,
+        teams_per_game=args.teams_per_game,
+        rounds=args.rounds,
+        seed=args.seed,
+    )
+    standings = Standings()
+    start = time.perf_counter()
+    for match_result in run_tournament(
+        matches,
+        workers=args.workers,
+        log_level=args.log_level,
+        map_size=args.map_size,
+        walls=args.walls,
+        max_ticks=args.max_ticks,
+    ):
+        standings.add(match_result)
+        print(
+            f"[{standings.games}/{len(matches)}] "
+            f"{' vs '.join(match_result.match.strategies)}: "
+            f"{match_result.result.final_scores}"
+        )
+    duration = time.perf_counter() - start
+    print("Overall scores:")
+    for strategy, score in standings.ranking():
+        print(f"  {strategy}: {score}")
+    print(
+        f"{standings.games} games in {duration:.2f} s: "
+        f"{standings.games / duration:.2f} games/s, "
+        f"{standings.ticks / duration:.0f} ticks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,6 @@ log_config_dict = {
             "()": structlog.stdlib.ProcessorFormatter,
             "processors": [
                 structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-                structlog.contextvars.merge_contextvars,
                 structlog.processors.JSONRenderer(sort_keys=True),
             ],
             "foreign_pre_chain": pre_chain,
@@ -40,7 +39,6 @@ log_config_dict = {
             "()": structlog.stdlib.ProcessorFormatter,
             "processors": [
                 structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-                structlog.contextvars.merge_contextvars,
                 structlog.processors.add_log_level,
                 structlog.processors.StackInfoRenderer(),
                 structlog.dev.set_exc_info,
@@ -53,12 +51,17 @@ log_config_dict = {
         "default": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
+            # the board on the console is redrawn after log lines
+            "stream": "ext://ascifight.terminal.log_stream",
             "formatter": "colored",
         },
         "file": {
             "level": "DEBUG",
-            "class": "logging.handlers.RotatingFileHandler",
+            "class": "ascifight.logs.RoomFileHandler",
             "filename": f"{config['server']['log_dir']}/game.log",
+            # the index holds byte offsets
+            "encoding": "utf-8",
+            "compress": config["server"]["compress_logs"],
             "backupCount": 100,
             "formatter": "plain",
         },
@@ -66,7 +69,7 @@ log_config_dict = {
     "loggers": {
         "": {
             "handlers": ["default", "file"],
-            "level": "DEBUG",
+            "level": config["server"]["log_level"].upper(),
             "propagate": True,
         },
     },
@@ -128,6 +131,12 @@ next orders.
 
 The _game_start_ service tells you when the next game is starting.
 
+Each of your actors carries out at most one order of each type in a tick: one move,
+one attack, one grabput, one destroy and one build. If you send another order of the
+same type before the tick is executed, it replaces the earlier one. Only the latest
+order counts, an earlier one is not tried first even if the latest one turns out to
+be blocked.
+
 
 The game ends after a certain number of points were scored or a certain number of 
 ticks have passed.
@@ -158,6 +167,20 @@ throw it down or capture it in your own base to score!
 You, and your actors, cant walk through these!
 
 
+## Bots over WebSocket
+
+Instead of polling, a bot can connect to the WebSocket _/bots/ws_, optionally with
+the _room_ and _deltas=true_ query parameters. Send your credentials first as
+`{"team": "...", "password": "..."}`. The server then pushes
+`{"type": "state", "state": ...}` with the _Game State_ as soon as a tick was
+executed. With _deltas_ only the first state of a game is complete, afterwards
+`{"type": "delta", "delta": ...}` holds what changed like the _Game State Delta_.
+
+Send orders as `{"id": 1, "order": "move", "actor": 0, "direction": "up"}` or a
+list of them. Every order is answered with `{"type": "ack", "id": 1, ...}` or
+`{"type": "error", "id": 1, "detail": "..."}`, the same limits as for the order
+endpoints apply.
+
 Find a list of endpoints that allow you to play the game below.
 
 
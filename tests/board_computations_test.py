@@ -101,3 +101,25 @@ def test_calc_target_coordinate_direction(origin, target, result):
 )
 def test_distance(origin, target, result):
     assert computations.distance(origin=origin, target=target) == result
+
+
+def test_grid_coordinates_are_interned():
+    grid = computations.get_grid(15)
+    target = computations.calc_target_coordinates(
+        data.Coordinates(x=3, y=3), computations.Directions.up, 15
+    )
+    assert target is grid.get(3, 4)
+    assert target is grid.at(3, 4)
+    assert grid.get(15, 3) is None
+
+
+def test_grid_window_ignores_out_of_bounds():
+    grid = computations.get_grid(15)
+    window = grid.window(range(-2, 2), range(13, 17))
+    assert len(window) == 2 * 2
+    assert set(window) == {
+        data.Coordinates(x=0, y=13),
+        data.Coordinates(x=0, y=14),
+        data.Coordinates(x=1, y=13),
+        data.Coordinates(x=1, y=14),
+    }
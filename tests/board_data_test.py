@@ -0,0 +1,51 @@
+import ascifight.board.data as data
+
+
+def test_place_actor_updates_occupancy(small_board):
+    board = small_board
+    actor = data.Runner(ident=0, team=board.names_teams["A"])
+    board.place_actor(actor, data.Coordinates(x=1, y=1))
+    board.place_actor(actor, data.Coordinates(x=1, y=2))
+    assert board.coordinates_actors == {data.Coordinates(x=1, y=2): actor}
+    assert board.is_empty(data.Coordinates(x=1, y=1))
+    assert not board.is_empty(data.Coordinates(x=1, y=2))
+
+
+def test_multiple_flags_in_one_position(small_board):
+    board = small_board
+    flag_a = data.Flag(team=board.names_teams["A"])
+    flag_b = data.Flag(team=board.names_teams["B"])
+    board.place_flag(flag_a, data.Coordinates(x=3, y=3))
+    board.place_flag(flag_b, data.Coordinates(x=3, y=3))
+    assert board.flags_at(data.Coordinates(x=3, y=3)) == [flag_a, flag_b]
+
+    board.place_flag(flag_a, data.Coordinates(x=5, y=5))
+    assert board.flags_at(data.Coordinates(x=3, y=3)) == [flag_b]
+    assert board.flags_at(data.Coordinates(x=5, y=5)) == [flag_a]
+
+
+def test_walls_are_added_and_removed(small_board):
+    board = small_board
+    board.add_wall(data.Coordinates(x=4, y=4))
+    assert not board.is_empty(data.Coordinates(x=4, y=4))
+    board.remove_wall(data.Coordinates(x=4, y=4))
+    assert board.is_empty(data.Coordinates(x=4, y=4))
+
+
+def test_base_placed_where_another_base_was(small_board):
+    board = small_board
+    base_a = data.Base(team=board.names_teams["A"])
+    base_b = data.Base(team=board.names_teams["B"])
+    board.place_base(base_a, data.Coordinates(x=2, y=2))
+    board.place_base(base_b, data.Coordinates(x=7, y=7))
+    board.place_base(base_a, data.Coordinates(x=7, y=7))
+    board.place_base(base_a, data.Coordinates(x=3, y=3))
+    board.place_base(base_b, data.Coordinates(x=6, y=6))
+    assert board.bases_coordinates == {
+        base_a: data.Coordinates(x=3, y=3),
+        base_b: data.Coordinates(x=6, y=6),
+    }
+    assert board.coordinates_bases == {
+        data.Coordinates(x=3, y=3): base_a,
+        data.Coordinates(x=6, y=6): base_b,
+    }
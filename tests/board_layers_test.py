@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import ascifight.game as game
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+import ascifight.headless as headless
+
+layers = pytest.importorskip("ascifight.board.layers")
+np = pytest.importorskip("numpy")
+
+
+def test_layers_follow_board_changes(small_board):
+    board = small_board
+    layers.attach(board)
+    actor = data.Runner(ident=0, team=board.names_teams["B"])
+    board.place_actor(actor, data.Coordinates(x=1, y=2))
+    board.place_actor(actor, data.Coordinates(x=3, y=4))
+    board.add_wall(data.Coordinates(x=5, y=5))
+    assert board.layers is not None
+    assert board.layers.actors[1, 4, 3] == 1
+    assert board.layers.actors.sum() == 1
+    assert board.layers.walls.sum() == 1
+
+
+def test_nearest_uses_mask(small_board):
+    board = small_board
+    layers.attach(board)
+    assert board.layers is not None
+    for x in (2, 7):
+        board.place_actor(
+            data.Runner(ident=x, team=board.names_teams["B"]),
+            data.Coordinates(x=x, y=0),
+        )
+    nearest = board.layers.nearest(
+        data.Coordinates(x=6, y=1), board.layers.enemy_actors(board.names_teams["A"])
+    )
+    assert nearest == data.Coordinates(x=7, y=0)
+
+
+def test_layers_stay_in_sync_during_a_game():
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        walls=10,
+    )
+    current_game = game.Game(game_board=board, score_file=os.devnull)
+    current_game.initiate_game()
+    layers.attach(board)
+    for _ in range(50):
+        orders = []
+        for team in board.teams:
+            orders.extend(headless.flag_runner(current_game, team))
+            orders.extend(headless.random_orders(current_game, team))
+        current_game.execute_game_step(orders)
+    assert board.layers is not None
+    fresh = layers.BoardLayers(board)
+    assert np.array_equal(board.layers.actors, fresh.actors)
+    assert np.array_equal(board.layers.flags, fresh.flags)
+    assert np.array_equal(board.layers.walls, fresh.walls)
+
+
+def test_lookups_with_and_without_layers_agree():
+    board = data.BoardData(
+        teams=[{"name": name, "password": ""} for name in ["A", "B", "C"]],
+        actors=["Runner", "Runner"],
+        map_size=8,
+        walls=0,
+    )
+    a, b, c = board.teams
+    # the enemies of the first actor are all equally far away
+    positions = [
+        (a, 0, 3, 3),
+        (a, 1, 0, 0),
+        (b, 0, 1, 3),
+        (b, 1, 5, 3),
+        (c, 0, 3, 1),
+        (c, 1, 3, 5),
+    ]
+    for team, ident, x, y in positions:
+        actor = data.Runner(ident=ident, team=team)
+        board.teams_actors[(team, ident)] = actor
+        board.place_actor(actor, data.Coordinates(x=x, y=y))
+    for team, x, y in [(a, 0, 7), (b, 6, 3), (c, 3, 0)]:
+        board.place_flag(data.Flag(team=team), data.Coordinates(x=x, y=y))
+    for lookup in [
+        computations.nearest_enemy_coordinates,
+        computations.nearest_enemy_flag_coordinates,
+    ]:
+        without_layers = [lookup(board, actor) for actor in board.actors_coordinates]
+        layers.attach(board)
+        with_layers = [lookup(board, actor) for actor in board.actors_coordinates]
+        board.layers = None
+        assert with_layers == without_layers
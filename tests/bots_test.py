@@ -0,0 +1,103 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from structlog.testing import capture_logs
+
+import ascifight.globals as globals
+import ascifight.routers.bots as bots
+
+app = FastAPI()
+app.include_router(bots.router)
+
+
+def next_tick(room: globals.Room) -> None:
+    room.my_game.execute_game_step(room.order_book.pop_all())
+    room.remember_state(10)
+    room.tick_done()
+
+
+def test_orders_and_state_push(new_room):
+    room = new_room("bots")
+    with TestClient(app).websocket_connect("/bots/ws?room=bots&deltas=true") as ws:
+        ws.send_json({"team": "Team 1", "password": "1"})
+        assert ws.receive_json() == {"type": "welcome", "team": "Team 1"}
+        state = ws.receive_json()
+        assert state["type"] == "state"
+        assert state["state"]["tick"] == 0
+
+        ws.send_json(
+            [
+                {"id": 1, "order": "move", "actor": 0, "direction": "up"},
+                {"id": 2, "order": "move", "actor": 0, "direction": "down"},
+                {"id": 3, "order": "fly", "actor": 0, "direction": "up"},
+            ]
+        )
+        assert ws.receive_json()["type"] == "ack"
+        second = ws.receive_json()
+        assert second["id"] == 2 and "replaced" in second["message"]
+        assert ws.receive_json()["type"] == "error"
+        assert len(room.order_book) == 1
+
+        ws.portal.call(next_tick, room)
+        delta = ws.receive_json()
+        assert delta["type"] == "delta"
+        assert delta["delta"]["since"] == 0
+        assert delta["delta"]["tick"] == 1
+
+
+def test_wrong_password_closes_connection(new_room):
+    new_room("bots")
+    with TestClient(app).websocket_connect("/bots/ws?room=bots") as ws:
+        ws.send_json({"team": "Team 1", "password": "wrong"})
+        message = ws.receive()
+        assert message["type"] == "websocket.close"
+        assert message["code"] == 1008
+
+
+def test_malformed_messages_are_answered_with_errors(new_room):
+    room = new_room("bots")
+    with TestClient(app).websocket_connect("/bots/ws?room=bots") as ws:
+        ws.send_json({"team": "Team 1", "password": "1"})
+        assert ws.receive_json()["type"] == "welcome"
+        assert ws.receive_json()["type"] == "state"
+
+        ws.send_json([1, "x", {"id": 4, "order": ["move"]}])
+        errors = [ws.receive_json() for _ in range(3)]
+        assert [error["type"] for error in errors] == ["error"] * 3
+        assert errors[2]["id"] == 4
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"id": 6, "order": "move", "actor": "x", "direction": "in"})
+        invalid = ws.receive_json()
+        assert invalid["type"] == "error" and "direction" in invalid["detail"]
+        ws.send_json({"id": 5, "order": "move", "actor": 0, "direction": "up"})
+        assert ws.receive_json()["type"] == "ack"
+        assert len(room.order_book) == 1
+
+
+def test_invalid_credentials_and_rooms_close_connection(new_room):
+    new_room("bots")
+    for url, credentials in [
+        ("/bots/ws?room=bots", "x"),
+        ("/bots/ws?room=bots", {"team": ["Team 1"], "password": "1"}),
+        ("/bots/ws?room=missing", {"team": "Team 1", "password": "1"}),
+    ]:
+        with TestClient(app).websocket_connect(url) as ws:
+            ws.send_json(credentials)
+            message = ws.receive()
+            assert message["type"] == "websocket.close"
+            assert message["code"] == 1008
+
+
+def test_failed_state_push_is_logged(monkeypatch, new_room):
+    async def failing_push(*args) -> None:
+        raise RuntimeError("push failed")
+
+    monkeypatch.setattr(bots, "_push_states", failing_push)
+    new_room("bots")
+    with capture_logs() as logs:
+        with TestClient(app).websocket_connect("/bots/ws?room=bots") as ws:
+            ws.send_json({"team": "Team 1", "password": "1"})
+            assert ws.receive_json()["type"] == "welcome"
+    failed = [log for log in logs if log["log_level"] == "warning"]
+    assert len(failed) == 1
+    assert isinstance(failed[0]["exc_info"], RuntimeError)
@@ -0,0 +1,49 @@
+import datetime
+import os
+from typing import Callable
+
+import pytest
+
+import ascifight.game as game
+import ascifight.globals as globals
+import ascifight.board.data as data
+
+
+@pytest.fixture
+def new_room(monkeypatch) -> Callable[..., globals.Room]:
+    """Creates rooms with an initiated game, the rooms are known to the routers
+    during the test."""
+    monkeypatch.setattr(globals, "rooms", {})
+
+    def new_room(
+        name: str = "test",
+        board: data.BoardData | None = None,
+        seed: int | None = None,
+        history: int = 10,
+    ) -> globals.Room:
+        room = globals.Room(name)
+        room.my_game = game.Game(
+            game_board=board if board is not None else data.BoardData(),
+            score_file=os.devnull,
+            seed=seed,
+        )
+        room.my_game.initiate_game()
+        room.time_of_next_execution = datetime.datetime.now() + datetime.timedelta(
+            seconds=10
+        )
+        room.remember_state(history)
+        globals.rooms[name] = room
+        return room
+
+    return new_room
+
+
+@pytest.fixture
+def small_board() -> data.BoardData:
+    """An empty board of two teams with a runner each, nothing placed yet."""
+    return data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Runner"],
+        map_size=10,
+        walls=0,
+    )
@@ -0,0 +1,101 @@
+import io
+import os
+
+from PIL import Image, ImageDraw
+
+import ascifight.draw as draw
+import ascifight.game as game
+import ascifight.util as util
+import ascifight.board.data as data
+
+
+def test_pasted_glyphs_look_like_drawn_text():
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Generalist", "Runner", "Builder"],
+        map_size=15,
+        walls=20,
+    )
+    game.Game(game_board=board, score_file=os.devnull, seed=1).initiate_game()
+    # glyphs at the border of the image
+    board.place_actor(
+        board.teams_actors[(board.teams[0], 0)], data.Coordinates(x=14, y=0)
+    )
+    board.place_flag(data.Flag(team=board.teams[1]), data.Coordinates(x=14, y=14))
+    icons, annotations = draw.game_map_icons(board)
+    renderer = draw.MapRenderer(map_size=15, image_size=600)
+
+    image = renderer.draw(icons, annotations)
+
+    expected = renderer.background.copy()
+    image_draw = ImageDraw.Draw(expected)
+    factor = renderer.factor
+    for x_offset, drawn in [(3, icons), (int(factor * 2 / 3), annotations)]:
+        for icon in drawn:
+            image_draw.text(
+                (
+                    x_offset + icon.coordinates.x * factor,
+                    factor * 15 - int(factor * 3 / 4) - icon.coordinates.y * factor,
+                ),
+                icon.name,
+                font=renderer.font,
+                fill=util.color_rgb_mapping[icon.color],
+            )
+    assert image.size == (600, 600)
+    assert image.tobytes() == expected.tobytes()
+
+
+def test_background_is_a_checkerboard():
+    renderer = draw.MapRenderer(map_size=4, image_size=40)
+    assert renderer.background.getpixel((5, 5)) == (55, 55, 55)
+    assert renderer.background.getpixel((15, 5)) == (0, 0, 0)
+    assert renderer.background.getpixel((15, 15)) == (55, 55, 55)
+
+
+def test_thumbnails_and_regions():
+    board = data.BoardData(map_size=40, walls=50)
+    game.Game(game_board=board, score_file=os.devnull, seed=2).initiate_game()
+    icons, annotations = draw.game_map_icons(board)
+
+    thumbnail = draw.draw_map(
+        icons, annotations, 40, size=100, image_format=draw.ImageFormat.webp
+    )
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (80, 80)
+
+    region = draw.draw_map(
+        icons, annotations, 40, size=300, region=(10, 0, 19, 4), image_format="fast_png"
+    )
+    with Image.open(io.BytesIO(region)) as image:
+        assert image.size == (300, 150)
+
+    renderer = draw.MapRenderer(map_size=40, image_size=400)
+    whole = renderer.draw(icons, annotations, (0, 0, 39, 39))
+    assert whole.tobytes() == renderer.draw(icons, annotations).tobytes()
+
+
+def test_zoomed_regions_stay_bounded():
+    board = data.BoardData(map_size=200, walls=0)
+    game.Game(game_board=board, score_file=os.devnull, seed=4).initiate_game()
+    icons, annotations = draw.game_map_icons(board)
+
+    one_field = draw.draw_map(
+        icons, annotations, 200, size=draw.max_image_side, region=(5, 5, 5, 5)
+    )
+    with Image.open(io.BytesIO(one_field)) as image:
+        assert image.size == (draw.max_image_side, draw.max_image_side)
+    # no background of the whole map at that zoom
+    renderer = draw.get_renderer(200, draw.max_image_side * 200)
+    assert renderer._full_background is None
+
+    strip = draw.draw_map(
+        icons, annotations, 200, size=draw.max_image_side, region=(0, 0, 0, 199)
+    )
+    with Image.open(io.BytesIO(strip)) as image:
+        assert image.size == (20, 4000)
+
+    # the configured size is capped as well
+    whole = draw.draw_map(icons, annotations, 200, image_format="fast_png")
+    with Image.open(io.BytesIO(whole)) as image:
+        assert max(image.size) <= draw.max_image_side
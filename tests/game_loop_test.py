@@ -0,0 +1,148 @@
+import asyncio
+import importlib
+import os
+import statistics
+import time
+from typing import Iterator
+
+import pytest
+
+import ascifight.config as config
+import ascifight.game as game
+import ascifight.game_loop as game_loop
+import ascifight.globals as globals
+import ascifight.replay as replay
+import ascifight.scores as scores
+import ascifight.snapshot as snapshot
+import ascifight.board.data as data
+import ascifight.routers.states as states
+
+tick_wait_time = 0.05
+
+
+@pytest.fixture
+def quick_games(tmp_path, monkeypatch) -> Iterator[None]:
+    """Games of a few short ticks, with all files in the temporary directory."""
+    # the game loop reloads the config for every game
+    monkeypatch.setattr(importlib, "reload", lambda module: module)
+    server = config.config["server"]
+    for key, value in {
+        "pre_game_wait": 0.01,
+        "tick_wait_time": tick_wait_time,
+        "scores_file": os.devnull,
+        "scores_db": str(tmp_path / "scores.sqlite"),
+        "replay_dir": str(tmp_path / "replays"),
+        "snapshot_dir": str(tmp_path / "snapshots"),
+        "console_output": False,
+        "board_layers": False,
+    }.items():
+        monkeypatch.setitem(server, key, value)
+    monkeypatch.setitem(config.config["game"], "max_ticks", 8)
+    yield
+    scores.close_stores()
+
+
+@pytest.fixture
+def tick_starts(quick_games) -> list[float]:
+    """Gets the start time of every tick played."""
+    return []
+
+
+def play(monkeypatch, starts: list[float], work: dict[int, float]) -> globals.Room:
+    """Play a game in which tick n takes work[n] seconds longer."""
+    execute_game_step = game.Game.execute_game_step
+
+    def slow_step(self: game.Game, orders: list[game.Order]) -> None:
+        starts.append(time.monotonic())
+        time.sleep(work.get(self.tick + 1, 0))
+        execute_game_step(self, orders)
+
+    monkeypatch.setattr(game.Game, "execute_game_step", slow_step)
+    room = globals.Room("game_loop")
+    asyncio.run(game_loop.single_game(room))
+    return room
+
+
+def test_work_of_a_tick_does_not_delay_the_next_ticks(monkeypatch, tick_starts):
+    room = play(monkeypatch, tick_starts, {tick: 0.02 for tick in range(1, 9)})
+
+    intervals = [b - a for a, b in zip(tick_starts, tick_starts[1:])]
+    assert len(intervals) == 7
+    # the ticks would be 0.07 seconds apart if the work added to the wait
+    assert statistics.mean(intervals) < tick_wait_time + 0.01
+    assert room.tick_duration >= 0.02
+    assert 0 < room.tick_slack < tick_wait_time - 0.02
+
+    timing = asyncio.run(states.get_timing(room))
+    assert timing.tick == 8
+    assert timing.tick_duration == room.tick_duration
+    assert timing.tick_slack == room.tick_slack
+
+
+def test_a_late_tick_is_not_caught_up(monkeypatch, tick_starts):
+    room = play(monkeypatch, tick_starts, {3: 2 * tick_wait_time})
+
+    intervals = [b - a for a, b in zip(tick_starts, tick_starts[1:])]
+    # the tick after the late one waits a full tick wait time
+    assert intervals[2] >= 3 * tick_wait_time - 0.005
+    # no tick is executed right after another one to catch up
+    assert min(intervals) > tick_wait_time / 2
+    assert room.tick_slack > 0
+
+
+def test_interrupted_game_is_recorded_on_in_its_replay(quick_games):
+    server = config.config["server"]
+    os.makedirs(server["replay_dir"])
+    os.makedirs(server["snapshot_dir"])
+    path = os.path.join(server["replay_dir"], "interrupted.replay")
+    interrupted = game_loop.new_game()
+    interrupted.initiate_game()
+    writer = replay.ReplayWriter(path, interrupted)
+    snapshot.Snapshot.capture(interrupted, path).save(
+        snapshot.snapshot_path(server["snapshot_dir"], "game_loop")
+    )
+    journal = snapshot.OrderJournal(
+        snapshot.journal_path(server["snapshot_dir"], "game_loop"), truncate=True
+    )
+    for _ in range(3):
+        journal.mark_tick(interrupted.tick + 1)
+        interrupted.execute_game_step([])
+        writer.record([])
+    # the server crashed, neither is closed
+
+    room = globals.Room("game_loop")
+    asyncio.run(game_loop.single_game(room))
+
+    assert os.listdir(server["replay_dir"]) == ["interrupted.replay"]
+    recorded = replay.Replay(path)
+    assert recorded.ticks == room.my_game.tick
+    for tick in range(recorded.ticks + 1):
+        recorded.board_at(tick)
+
+
+def save_snapshot_of_another_board(path: str) -> None:
+    other_game = game.Game(
+        game_board=data.BoardData(map_size=10), score_file=os.devnull
+    )
+    other_game.initiate_game()
+    snapshot.Snapshot.capture(other_game).save(path)
+
+
+def save_broken_snapshot(path: str) -> None:
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(b"not a snapshot")
+
+
+@pytest.mark.parametrize(
+    "save_snapshot", [save_snapshot_of_another_board, save_broken_snapshot]
+)
+def test_snapshots_that_do_not_fit_are_not_resumed(quick_games, save_snapshot):
+    snapshot_dir = config.config["server"]["snapshot_dir"]
+    os.makedirs(snapshot_dir)
+    save_snapshot(snapshot.snapshot_path(snapshot_dir, "game_loop"))
+
+    room = globals.Room("game_loop")
+    asyncio.run(game_loop.single_game(room))
+
+    assert room.my_game.board.map_size == config.config["game"]["map_size"]
+    assert room.my_game.tick == config.config["game"]["max_ticks"]
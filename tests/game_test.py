@@ -0,0 +1,40 @@
+import os
+import random
+
+import ascifight.game as game
+import ascifight.board.data as data
+import ascifight.headless as headless
+
+
+def play(seed: int, ticks: int) -> game.Game:
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Generalist", "Runner", "Builder"],
+        walls=30,
+    )
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=seed)
+    current_game.initiate_game()
+    # the orders only depend on the global random module, seeded identically
+    random.seed(1)
+    for _ in range(ticks):
+        orders = []
+        for team in board.teams:
+            orders.extend(headless.flag_runner(current_game, team))
+            orders.extend(headless.random_orders(current_game, team))
+        current_game.execute_game_step(orders)
+    return current_game
+
+
+def test_same_seed_and_orders_give_same_game():
+    first = play(seed=5, ticks=100)
+    second = play(seed=5, ticks=100)
+    assert first.board.actors_coordinates == second.board.actors_coordinates
+    assert first.board.flags_coordinates == second.board.flags_coordinates
+    assert first.board.walls_coordinates == second.board.walls_coordinates
+    assert first.scores == second.scores
+
+
+def test_different_seeds_give_different_boards():
+    first = play(seed=5, ticks=0)
+    second = play(seed=6, ticks=0)
+    assert first.board.bases_coordinates != second.board.bases_coordinates
@@ -0,0 +1,17 @@
+import ascifight.headless as headless
+
+
+def test_run_game_runs_until_max_ticks():
+    result = headless.run_game(
+        {"A": headless.idle, "B": headless.random_orders}, max_ticks=5
+    )
+    assert result.ticks == 5
+    assert set(result.scores) == {"A", "B"}
+
+
+def test_run_games_reports_rates():
+    benchmark = headless.run_games(
+        2, {"A": headless.idle, "B": headless.idle}, max_ticks=3
+    )
+    assert len(benchmark.results) == 2
+    assert benchmark.ticks_per_second > 0
@@ -0,0 +1,57 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import ascifight.config as config
+import ascifight.routers.other as other
+
+app = FastAPI()
+app.include_router(other.router)
+
+content = b"".join(b'{"event": "Moved", "tick": %d}\n' % tick for tick in range(100))
+
+
+def test_compressed_logs_are_served_encoded_or_decompressed(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.config["server"], "log_dir", str(tmp_path))
+    (tmp_path / "game.log").write_bytes(content)
+    with gzip.open(tmp_path / "game.log.1.gz", "wb") as fp:
+        fp.write(content)
+    client = TestClient(app)
+
+    assert sorted(client.get("/log_files").json()) == ["game.log", "game.log.1.gz"]
+
+    encoded = client.get("/logs/game.log.1", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.content == content
+
+    decompressed = client.get(
+        "/logs/game.log.1.gz", headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in decompressed.headers
+    assert decompressed.headers["content-length"] == str(len(content))
+    assert decompressed.content == content
+
+    assert client.get("/logs/game.log.7").status_code == 404
+
+
+def test_ranges(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.config["server"], "log_dir", str(tmp_path))
+    with gzip.open(tmp_path / "game.log.1.gz", "wb") as fp:
+        fp.write(content)
+    client = TestClient(app)
+    identity = {"Accept-Encoding": "identity"}
+
+    part = client.get("/logs/game.log.1", headers={**identity, "Range": "bytes=10-19"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 10-19/{len(content)}"
+    assert part.content == content[10:20]
+
+    end = client.get("/logs/game.log.1", headers={**identity, "Range": "bytes=-5"})
+    assert end.content == content[-5:]
+
+    beyond = client.get(
+        "/logs/game.log.1", headers={**identity, "Range": f"bytes={len(content)}-"}
+    )
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == f"bytes */{len(content)}"
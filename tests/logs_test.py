@@ -0,0 +1,191 @@
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import threading
+
+import pytest
+import structlog
+
+import ascifight.logs as logs
+
+
+class ThreadRecorder(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: list[str] = []
+
+    def format(self, record: logging.LogRecord) -> str:
+        self.threads.append(threading.current_thread().name)
+        return super().format(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def test_records_are_written_by_the_listener(tmp_path):
+    logger = logging.getLogger("logs_test")
+    logger.propagate = False
+    recorder = ThreadRecorder()
+    file_handler = logging.handlers.RotatingFileHandler(
+        tmp_path / "game.log", backupCount=2
+    )
+    logger.addHandler(recorder)
+    logger.addHandler(file_handler)
+
+    listener = logs.start(logger)
+    try:
+        logger.warning("old game")
+        logs.rollover(logger)
+        logger.warning("new game")
+    finally:
+        listener.stop()
+        file_handler.close()
+        logger.handlers.clear()
+
+    assert recorder.threads
+    assert threading.current_thread().name not in recorder.threads
+    assert (tmp_path / "game.log.1").read_text() == "old game\n"
+    assert (tmp_path / "game.log").read_text() == "new game\n"
+
+
+def test_rooms_roll_over_their_own_log_files(tmp_path):
+    logger = logging.getLogger("rooms_test")
+    logger.propagate = False
+    handler = logs.RoomFileHandler(str(tmp_path / "game.log"), backupCount=2)
+    handler.setFormatter(JSONFormatter())
+    logger.addHandler(handler)
+
+    def log(**event) -> None:
+        logger.warning(event)
+
+    listener = logs.start(logger)
+    try:
+        log(event="Starting server.")
+        log(event="Initiating game.", room="a")
+        log(event="Initiating game.", room="b")
+        logs.rollover(logger, room="a")
+        log(event="Moved", room="a", tick=1)
+        log(event="Moved", room="b", tick=1)
+    finally:
+        listener.stop()
+        handler.close()
+        logger.handlers.clear()
+
+    def events(name: str) -> list[str]:
+        lines = (tmp_path / name).read_text().splitlines()
+        return [json.loads(line)["event"] for line in lines]
+
+    assert events("game.log") == ["Starting server."]
+    assert events("game-a.log.1") == ["Initiating game."]
+    assert events("game-a.log") == ["Moved"]
+    # the game in room b goes on in the same file
+    assert events("game-b.log") == ["Initiating game.", "Moved"]
+    assert not (tmp_path / "game-b.log.1").exists()
+
+
+def test_sampler_drops_repeated_messages_of_a_tick():
+    sampler = logs.TickSampler(per_tick=2)
+
+    def log(tick: int, event: str, sample: bool = True) -> dict | None:
+        event_dict = {"event": event, "tick": tick, "room": "default"}
+        if sample:
+            event_dict["sample"] = True
+        try:
+            return sampler(None, "warning", event_dict)
+        except structlog.DropEvent:
+            return None
+
+    moved = "%s already moved this tick."
+    assert log(1, moved) == {"event": moved, "tick": 1, "room": "default"}
+    assert "sampled" in log(1, moved)
+    assert log(1, moved) is None
+    # other kinds of messages are counted on their own
+    assert log(1, "%s already built this tick.") is not None
+    # the next tick starts over
+    assert log(2, moved) is not None
+
+
+@pytest.mark.parametrize("per_tick", [0, 1])
+def test_game_events_are_never_dropped(per_tick):
+    sampler = logs.TickSampler(per_tick=per_tick)
+    for _ in range(3):
+        assert sampler(None, "info", {"event": "%s moved", "tick": 1})
+        assert sampler(None, "info", {"event": "Starting server.", "sample": True})
+    if per_tick:
+        sampler(None, "warning", {"event": "moved", "tick": 1, "sample": True})
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "warning", {"event": "moved", "tick": 1, "sample": True})
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg)
+
+
+def test_entries_are_read_by_index(tmp_path):
+    log_file = str(tmp_path / "game.log")
+    handler = logs.IndexedFileHandler(log_file, backupCount=3, encoding="utf-8")
+    handler.setFormatter(JSONFormatter())
+
+    def log(**event) -> None:
+        handler.handle(logging.makeLogRecord({"msg": event, "levelname": "INFO"}))
+
+    log(event="Initiating game.", room="a")
+    for tick in range(1, 6):
+        for room in ["a", "b"]:
+            log(event="Moved", room=room, tick=tick, team="x", level="info")
+            log(event="Blocked ✓", room=room, tick=tick, team="y", level="warning")
+    handler.doRollover()
+    log(event="Initiating game.", room="a", tick=0)
+    handler.close()
+
+    index = logs.log_index(log_file, 1)
+    assert index == logs.build_index(log_file + ".1")
+    entries = logs.read_entries(log_file + ".1", index, "a", tick_min=2, tick_max=3)
+    assert [(entry["tick"], entry["team"]) for entry in entries] == [
+        (2, "x"),
+        (2, "y"),
+        (3, "x"),
+        (3, "y"),
+    ]
+    warnings = logs.read_entries(
+        log_file + ".1", index, "b", level=logs.LogLevel.warning, limit=2
+    )
+    assert [entry["event"] for entry in warnings] == ["Blocked ✓", "Blocked ✓"]
+    assert len(logs.read_entries(log_file + ".1", index, "a", team="x")) == 5
+    # without ticks the entries between the ticks are included
+    assert len(logs.read_entries(log_file + ".1", index, "a")) == 11
+
+    current = logs.log_index(log_file, 0)
+    assert logs.read_entries(log_file, current, "a", tick_max=0)[0]["tick"] == 0
+
+
+def test_backups_are_compressed_in_the_background(tmp_path):
+    log_file = str(tmp_path / "game.log")
+    handler = logs.IndexedFileHandler(
+        log_file, backupCount=3, encoding="utf-8", compress=True
+    )
+    handler.setFormatter(JSONFormatter())
+    for game_number in range(3):
+        for tick in range(10):
+            record = {"event": "Moved", "room": "a", "tick": tick, "game": game_number}
+            handler.handle(logging.makeLogRecord({"msg": record}))
+        handler.doRollover()
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "game.log",
+        "game.log.1.gz",
+        "game.log.2.gz",
+        "game.log.3.gz",
+        "index",
+    ]
+    path = logs.backup_path(log_file, 2)
+    entries = logs.read_entries(path, logs.log_index(log_file, 2), "a", 4, 5)
+    assert [(entry["game"], entry["tick"]) for entry in entries] == [(1, 4), (1, 5)]
+    with gzip.open(path) as fp:
+        content = fp.read()
+    assert logs.gzip_size(path) == len(content)
+    assert b"".join(logs.read_chunks(path, 5, 40, decompress=True)) == content[5:40]
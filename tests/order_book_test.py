@@ -0,0 +1,74 @@
+import os
+
+import ascifight.game as game
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+
+
+def test_later_orders_replace_earlier_ones():
+    order_book = game.OrderBook()
+    first = game.MoveOrder(team="A", actor=0, direction=computations.Directions.up)
+    other = game.MoveOrder(team="A", actor=1, direction=computations.Directions.up)
+    second = game.MoveOrder(team="A", actor=0, direction=computations.Directions.down)
+    attack = game.AttackOrder(team="A", actor=0, direction=computations.Directions.up)
+
+    assert not order_book.add(first)
+    assert not order_book.add(other)
+    assert order_book.add(second)
+    assert not order_book.add(attack)
+
+    assert len(order_book) == 3
+    assert order_book.pop_all() == [second, other, attack]
+    assert len(order_book) == 0
+
+
+def test_only_the_latest_move_of_an_actor_is_executed():
+    board = data.BoardData(walls=0)
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=1)
+    current_game.initiate_game()
+    actor = board.teams_actors[(board.teams[0], 0)]
+    start = board.actors_coordinates[actor]
+    directions = [
+        direction
+        for direction in computations.Directions
+        if board.is_empty(
+            computations.calc_target_coordinates(start, direction, board.map_size)
+        )
+    ]
+    assert len(directions) > 1
+    order_book = game.OrderBook()
+    for direction in directions:
+        order_book.add(
+            game.MoveOrder(team=board.teams[0].name, actor=0, direction=direction)
+        )
+
+    current_game.execute_game_step(order_book.pop_all())
+
+    assert board.actors_coordinates[actor] == (
+        computations.calc_target_coordinates(start, directions[-1], board.map_size)
+    )
+
+
+def test_a_blocked_move_does_not_fall_back_to_an_earlier_one():
+    board = data.BoardData(walls=0)
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=1)
+    current_game.initiate_game()
+    actor = board.teams_actors[(board.teams[0], 0)]
+    start = board.actors_coordinates[actor]
+    free, blocked = [
+        direction
+        for direction in computations.Directions
+        if board.is_empty(
+            computations.calc_target_coordinates(start, direction, board.map_size)
+        )
+    ][:2]
+    board.add_wall(computations.calc_target_coordinates(start, blocked, board.map_size))
+    order_book = game.OrderBook()
+    for direction in [free, blocked]:
+        order_book.add(
+            game.MoveOrder(team=board.teams[0].name, actor=0, direction=direction)
+        )
+
+    current_game.execute_game_step(order_book.pop_all())
+
+    assert board.actors_coordinates[actor] == start
@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+
+import ascifight.routers.router_utils as router_utils
+
+
+def test_rate_limit_rejects_after_burst():
+    limiter = router_utils.OrderLimiter(rate=1, burst=2, orders_per_tick=100)
+    limiter.check("A", tick=1, seconds_to_next_tick=5)
+    limiter.check("A", tick=1, seconds_to_next_tick=5)
+    with pytest.raises(HTTPException) as error:
+        limiter.check("A", tick=1, seconds_to_next_tick=5)
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "1"}
+    # other teams have their own bucket
+    limiter.check("B", tick=1, seconds_to_next_tick=5)
+    assert limiter.rejections == {"A": {"rate": 1}}
+
+
+def test_tick_budget_resets_with_tick():
+    limiter = router_utils.OrderLimiter(rate=100, burst=100, orders_per_tick=1)
+    limiter.check("A", tick=1, seconds_to_next_tick=2.5)
+    with pytest.raises(HTTPException) as error:
+        limiter.check("A", tick=1, seconds_to_next_tick=2.5)
+    assert error.value.headers == {"Retry-After": "3"}
+    limiter.check("A", tick=2, seconds_to_next_tick=5)
+    assert limiter.rejections == {"A": {"tick_budget": 1}}
+
+
+def test_orders_over_the_tick_budget_keep_their_token():
+    limiter = router_utils.OrderLimiter(rate=0.001, burst=2, orders_per_tick=1)
+    limiter.check("A", tick=1, seconds_to_next_tick=1)
+    for _ in range(3):
+        with pytest.raises(HTTPException):
+            limiter.check("A", tick=1, seconds_to_next_tick=1)
+    limiter.check("A", tick=2, seconds_to_next_tick=1)
+    assert limiter.rejections == {"A": {"tick_budget": 3}}
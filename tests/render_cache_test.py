@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import Request
+
+import ascifight.draw as draw
+import ascifight.routers.other as other
+import ascifight.routers.router_utils as router_utils
+
+
+def test_concurrent_requests_share_one_render():
+    renders = []
+
+    async def render() -> bytes:
+        renders.append(1)
+        await asyncio.sleep(0.01)
+        return b"image"
+
+    async def requests():
+        cache = router_utils.RenderCache()
+        first = await asyncio.gather(*(cache.get("room", 1, render) for _ in range(5)))
+        second = await cache.get("room", 2, render)
+        return first, second
+
+    first, second = asyncio.run(requests())
+    assert len(renders) == 2
+    assert len(set(first)) == 1
+    assert first[0][0] == b"image"
+    # same bytes give the same etag
+    assert second == first[0]
+
+
+def test_failed_render_is_tried_again():
+    calls = []
+
+    async def render() -> bytes:
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("font missing")
+        return b"image"
+
+    async def requests():
+        cache = router_utils.RenderCache()
+        with pytest.raises(ValueError):
+            await cache.get("room", 1, render)
+        return await cache.get("room", 1, render)
+
+    body, _ = asyncio.run(requests())
+    assert body == b"image"
+    assert len(calls) == 2
+
+
+def test_oldest_entries_are_dropped():
+    async def render() -> bytes:
+        return b"image"
+
+    async def requests():
+        cache = router_utils.RenderCache(max_entries=2)
+        for name in ["a", "b", "c"]:
+            await cache.get(name, 1, render)
+        return list(cache._entries)
+
+    assert asyncio.run(requests()) == ["b", "c"]
+
+
+def test_game_map_shows_the_tick_it_is_cached_for(monkeypatch, new_room):
+    room = new_room("maps")
+    game_map_icons = draw.game_map_icons
+    drawn_ticks = []
+
+    def icons_of_tick(board):
+        drawn_ticks.append(room.my_game.tick)
+        return game_map_icons(board)
+
+    monkeypatch.setattr(draw, "game_map_icons", icons_of_tick)
+
+    async def request_during_tick():
+        request = asyncio.create_task(
+            other.get_game_map(room, Request({"type": "http", "headers": []}))
+        )
+        # the tick is executed before the render task starts
+        asyncio.get_running_loop().call_soon(room.my_game.execute_game_step, [])
+        await request
+
+    asyncio.run(request_during_tick())
+    assert room.my_game.tick == 1
+    assert drawn_ticks == [0]
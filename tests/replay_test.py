@@ -0,0 +1,117 @@
+import os
+import random
+
+import ascifight.game as game
+import ascifight.replay as replay
+import ascifight.board.data as data
+import ascifight.board.state as state
+import ascifight.board.computations as computations
+import ascifight.headless as headless
+
+
+def test_replay_rebuilds_every_tick(tmp_path):
+    path = str(tmp_path / "game.replay")
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Generalist", "Runner", "Builder"],
+        walls=30,
+    )
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=3)
+    current_game.initiate_game()
+    writer = replay.ReplayWriter(path, current_game, keyframe_interval=7)
+    states = [state.BoardState.capture(board)]
+    scores = [{team.name: 0 for team in board.teams}]
+    all_orders = [[]]
+    random.seed(2)
+    for _ in range(50):
+        orders = []
+        for team in board.teams:
+            orders.extend(headless.flag_runner(current_game, team))
+            orders.extend(headless.random_orders(current_game, team))
+            orders.append(
+                random.choice([game.BuildOrder, game.DestroyOrder])(
+                    team=team.name,
+                    actor=2,
+                    direction=random.choice(list(computations.Directions)),
+                )
+            )
+        current_game.execute_game_step(orders)
+        writer.record(orders)
+        states.append(state.BoardState.capture(board))
+        scores.append({team.name: score for team, score in current_game.scores.items()})
+        all_orders.append(orders)
+    writer.close()
+
+    recorded = replay.Replay(path)
+    assert recorded.seed == 3
+    assert recorded.ticks == 50
+    for tick in range(51):
+        rebuilt = state.BoardState.capture(recorded.board_at(tick))
+        assert rebuilt.actors == states[tick].actors
+        assert rebuilt.flags == states[tick].flags
+        assert rebuilt.bases == states[tick].bases
+        assert rebuilt.walls == states[tick].walls
+        assert recorded.scores_at(tick) == scores[tick]
+    assert recorded.orders_at(10) == all_orders[10]
+
+
+def test_replay_is_small(tmp_path):
+    path = str(tmp_path / "game.replay")
+    headless.run_game(
+        {"random": headless.random_orders, "runner": headless.flag_runner},
+        max_ticks=200,
+        seed=1,
+        replay_file=path,
+    )
+    assert os.path.getsize(path) < 64 * 1024
+    assert replay.Replay(path).ticks > 0
+
+
+def test_stacked_flags_round_trip(tmp_path):
+    path = str(tmp_path / "game.replay")
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        walls=0,
+    )
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=5)
+    current_game.initiate_game()
+    writer = replay.ReplayWriter(path, current_game, keyframe_interval=3)
+    flags = {flag.team.number: flag for flag in board.flags_coordinates}
+    stacks = []
+    # the flags end up on one field and swap their places in the stack
+    for bottom, top in [(0, 1), (1, 0), (1, 0), (0, 1), (0, 1)]:
+        board.place_flag(flags[top], board.flags_coordinates[flags[bottom]])
+        current_game.execute_game_step([])
+        writer.record([])
+        coordinates = board.flags_coordinates[flags[top]]
+        stacks.append(
+            (coordinates, [flag.team.number for flag in board.flags_at(coordinates)])
+        )
+    writer.close()
+
+    recorded = replay.Replay(path)
+    for tick, (coordinates, stack) in enumerate(stacks, start=1):
+        rebuilt = recorded.board_at(tick)
+        assert [flag.team.number for flag in rebuilt.flags_at(coordinates)] == stack
+
+
+def test_records_are_flushed_and_a_cut_off_record_is_ignored(tmp_path):
+    path = str(tmp_path / "game.replay")
+    board = data.BoardData(walls=0)
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=6)
+    current_game.initiate_game()
+    writer = replay.ReplayWriter(path, current_game, keyframe_interval=100)
+    for _ in range(5):
+        current_game.execute_game_step([])
+        writer.record([])
+    # the writer is not closed, as if the server crashed
+    assert replay.Replay(path).ticks == 5
+    writer.close()
+
+    with open(path, "rb") as replay_file:
+        content = replay_file.read()
+    with open(path, "wb") as replay_file:
+        replay_file.write(content[:-7])
+    recorded = replay.Replay(path)
+    assert recorded.ticks == 4
+    recorded.board_at(recorded.ticks)
@@ -0,0 +1,58 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import ascifight.game as game
+import ascifight.globals as globals
+import ascifight.routers.orders as orders
+import ascifight.routers.states as states
+
+app = FastAPI()
+app.include_router(orders.router)
+app.include_router(states.router)
+
+team = ("Team 1", "1")
+
+
+def two_rooms(new_room) -> tuple[globals.Room, globals.Room]:
+    return new_room("first", seed=1), new_room("second", seed=2)
+
+
+def test_requests_go_to_their_room(new_room):
+    first, second = two_rooms(new_room)
+    second.my_game.execute_game_step([])
+    client = TestClient(app)
+
+    assert client.get("/states/timing").json()["tick"] == 0
+    assert client.get("/states/timing?room=first").json()["tick"] == 0
+    assert client.get("/states/timing?room=second").json()["tick"] == 1
+
+    response = client.post("/orders/move/0?room=second&direction=up", auth=team)
+    assert response.status_code == 202
+    assert first.order_book.pop_all() == []
+    assert second.order_book.pop_all() == [
+        game.MoveOrder(team="Team 1", actor=0, direction="up")
+    ]
+
+
+def test_unknown_rooms_are_not_found(new_room):
+    first, second = two_rooms(new_room)
+    client = TestClient(app)
+
+    assert client.get("/states/game_state?room=third").status_code == 404
+    response = client.post("/orders/move/0?room=third&direction=up", auth=team)
+    assert response.status_code == 404
+    assert first.order_book.pop_all() == second.order_book.pop_all() == []
+
+
+def test_rooms_play_their_own_games(new_room):
+    first, second = two_rooms(new_room)
+    client = TestClient(app)
+    first_state = client.get("/states/game_state?room=first").json()
+
+    client.post("/orders/move/0?room=second&direction=up", auth=team)
+    second.my_game.execute_game_step(second.order_book.pop_all())
+
+    assert client.get("/states/game_state?room=first").json() == first_state
+    second_state = client.get("/states/game_state?room=second").json()
+    assert second_state["tick"] == 1
+    assert second_state != first_state
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+
+import ascifight.game as game
+import ascifight.scores as scores
+import ascifight.board.data as data
+
+
+def test_totals_are_kept_and_games_saved(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    store = scores.ScoreStore(path)
+    store.add_game([("A", 5), ("B", 2)], seed=1, ticks=100)
+    store.add_game([("B", 4), ("C", 1)], seed=2, ticks=80)
+    assert store.totals() == {"A": 5, "B": 6, "C": 1}
+    store.close()
+
+    assert scores.ScoreStore(path).totals() == {"A": 5, "B": 6, "C": 1}
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT seed, ticks FROM games").fetchall() == [
+            (1, 100),
+            (2, 80),
+        ]
+        assert connection.execute(
+            "SELECT team, games FROM team_totals ORDER BY team"
+        ).fetchall() == [("A", 1), ("B", 2), ("C", 1)]
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_score_files_are_imported_once(tmp_path):
+    score_file = tmp_path / "scores.log"
+    score_file.write_text("A: 3\nB: 1\nnot a score\nB: 7\nA: 2\nB: 1\n")
+    store = scores.ScoreStore(str(tmp_path / "scores.sqlite"))
+
+    assert store.import_log(str(score_file)) == 3
+    assert store.import_log(str(score_file)) == 0
+    assert (
+        scores.ScoreStore(str(tmp_path / "scores.sqlite")).import_log(str(score_file))
+        == 0
+    )
+    assert store.totals() == {"A": 5, "B": 9}
+    assert store.import_log(str(tmp_path / "missing.log")) == 0
+
+
+def test_games_of_other_teams_are_imported_apart(tmp_path):
+    score_file = tmp_path / "scores.log"
+    # the scores of a game are written highest first
+    score_file.write_text("A: 9\nB: 2\nC: 5\nD: 5\nA: 6\nC: 1\n")
+    path = str(tmp_path / "scores.sqlite")
+    store = scores.ScoreStore(path)
+
+    assert store.import_log(str(score_file)) == 3
+    with sqlite3.connect(path) as connection:
+        assert connection.execute(
+            "SELECT COUNT(*) FROM game_scores GROUP BY game_id ORDER BY game_id"
+        ).fetchall() == [(2,), (2,), (2,)]
+
+
+def test_games_read_and_write_overall_scores(tmp_path):
+    store = scores.ScoreStore(str(tmp_path / "scores.sqlite"))
+    store.add_game([("Team 1", 10), ("Old team", 3)])
+    current_game = game.Game(
+        game_board=data.BoardData(), score_file=os.devnull, score_store=store
+    )
+    current_game.initiate_game()
+    assert {team.name: score for team, score in current_game.overall_scores.items()}[
+        "Team 1"
+    ] == 10
+
+    current_game.end_game()
+    final = {team.name: score for team, score in current_game.final_scores()}
+    assert store.totals()["Team 1"] == 10 + final["Team 1"]
+    store.close()
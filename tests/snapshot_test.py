@@ -0,0 +1,98 @@
+import os
+import random
+
+import ascifight.game as game
+import ascifight.snapshot as snapshot
+import ascifight.board.data as data
+import ascifight.board.state as state
+import ascifight.headless as headless
+
+
+def orders_for(current_game: game.Game) -> list[game.ActorOrder]:
+    orders = []
+    for team in current_game.board.teams:
+        orders.extend(headless.flag_runner(current_game, team))
+        orders.extend(headless.random_orders(current_game, team))
+    return orders
+
+
+def assert_same_game(first: game.Game, second: game.Game) -> None:
+    first_state = state.BoardState.capture(first.board)
+    second_state = state.BoardState.capture(second.board)
+    assert first.tick == second.tick
+    assert first_state.actors == second_state.actors
+    assert first_state.flags == second_state.flags
+    assert first_state.walls == second_state.walls
+    assert {team.name: score for team, score in first.scores.items()} == {
+        team.name: score for team, score in second.scores.items()
+    }
+
+
+def test_resume_from_snapshot_and_journal(tmp_path):
+    directory = str(tmp_path)
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Generalist", "Runner", "Builder"],
+        walls=30,
+    )
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=8)
+    current_game.initiate_game()
+    journal = snapshot.OrderJournal(
+        snapshot.journal_path(directory, "room"), truncate=True
+    )
+    order_book = game.OrderBook()
+    random.seed(4)
+    for _ in range(17):
+        for order in orders_for(current_game):
+            journal.append(order)
+            order_book.add(order)
+        journal.mark_tick(current_game.tick + 1)
+        current_game.execute_game_step(order_book.pop_all())
+        if current_game.tick == 10:
+            snapshot.Snapshot.capture(current_game).save(
+                snapshot.snapshot_path(directory, "room")
+            )
+    pending = orders_for(current_game)
+    for order in pending:
+        journal.append(order)
+        order_book.add(order)
+    journal.close()
+
+    resumed = snapshot.resume(directory, "room", os.devnull)
+    assert resumed is not None
+    resumed_game, resumed_order_book, _ = resumed
+    assert_same_game(current_game, resumed_game)
+    assert resumed_order_book.pop_all() == order_book.pop_all()
+
+    # the random state is restored as well, both games go on the same way
+    current_game.execute_game_step(pending)
+    resumed_game.execute_game_step(pending)
+    for _ in range(20):
+        orders = orders_for(current_game)
+        current_game.execute_game_step(orders)
+        resumed_game.execute_game_step(orders)
+    assert_same_game(current_game, resumed_game)
+
+
+def test_nothing_to_resume(tmp_path):
+    assert snapshot.resume(str(tmp_path), "room", os.devnull) is None
+    snapshot.remove(str(tmp_path), "room")
+
+
+def test_stacked_flags_keep_their_order():
+    for bottom, top in [(1, 0), (0, 1)]:
+        board = data.BoardData(
+            teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+            walls=0,
+        )
+        current_game = game.Game(game_board=board, score_file=os.devnull, seed=2)
+        current_game.initiate_game()
+        flags = {flag.team.number: flag for flag in board.flags_coordinates}
+        coordinates = board.flags_coordinates[flags[bottom]]
+        board.place_flag(flags[top], coordinates)
+
+        restored = snapshot.Snapshot.capture(current_game).restore(os.devnull)
+        assert [flag.team.number for flag in restored.board.flags_at(coordinates)] == [
+            bottom,
+            top,
+        ]
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import ascifight.routers.spectators as spectators
+
+
+def test_slow_spectators_skip_to_the_latest_frame(new_room):
+    room = new_room("spectators")
+
+    async def watch():
+        hub = spectators.SpectatorHub(room)
+        fast = hub.subscribe()
+        slow = hub.subscribe()
+        # the hub publishes the current tick right away
+        await asyncio.sleep(0)
+        assert json.loads(await fast.next_frame())["tick"] == 0
+
+        for _ in range(3):
+            room.my_game.execute_game_step([])
+            room.tick_done()
+            await asyncio.sleep(0)
+            assert json.loads(await fast.next_frame())["tick"] == room.my_game.tick
+
+        statistics = hub.statistics()
+        frame = json.loads(await slow.next_frame())
+        hub.task.cancel()
+        return statistics, frame
+
+    statistics, frame = asyncio.run(watch())
+    assert frame["tick"] == 3
+    assert frame["scores"]["scores"][0]["score"] == 0
+    assert statistics.connected == 2
+    assert statistics.lagging == 1
+    assert statistics.frames == 4
+    assert statistics.skipped_frames == 3
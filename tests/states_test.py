@@ -0,0 +1,137 @@
+import asyncio
+import random
+
+from fastapi import Request
+
+import ascifight.globals as globals
+import ascifight.board.data as data
+import ascifight.board.state as state
+import ascifight.headless as headless
+import ascifight.routers.states as states
+import ascifight.routers.router_utils as router_utils
+
+
+def played_room(new_room, history: int) -> globals.Room:
+    """A room after 30 ticks of bots playing."""
+    board = data.BoardData(
+        teams=[{"name": "A", "password": "a"}, {"name": "B", "password": "b"}],
+        actors=["Generalist", "Runner", "Builder"],
+        walls=30,
+    )
+    room = new_room(board=board, seed=2, history=history)
+    random.seed(3)
+    for _ in range(30):
+        orders = []
+        for team in board.teams:
+            orders.extend(headless.flag_runner(room.my_game, team))
+            orders.extend(headless.random_orders(room.my_game, team))
+        room.my_game.execute_game_step(orders)
+        room.remember_state(history)
+    return room
+
+
+def test_delta_applied_to_old_state_gives_current_state(new_room):
+    room = played_room(new_room, history=10)
+    old_state = room.states[25]
+    delta = asyncio.run(
+        states.get_game_state_delta(room, since=25, game=room.my_game.ident)
+    )
+    assert delta.full_state is None
+    assert delta.tick == 30
+    actors = old_state.actors | {
+        (room.my_game.board.names_teams[actor.team].number, actor.ident): (
+            actor.coordinates.x,
+            actor.coordinates.y,
+            room.my_game.board.names_teams[actor.flag].number if actor.flag else None,
+        )
+        for actor in delta.actors
+    }
+    assert actors == state.BoardState.capture(room.my_game.board).actors
+    assert delta.scores == {
+        team.name: score for team, score in room.my_game.scores.items()
+    }
+
+
+def test_full_state_if_tick_is_too_old(new_room):
+    room = played_room(new_room, history=10)
+    delta = asyncio.run(
+        states.get_game_state_delta(room, since=5, game=room.my_game.ident)
+    )
+    assert delta.full_state is not None
+    assert delta.actors == []
+    assert len(delta.full_state.actors) == 6
+
+
+def test_full_state_for_a_tick_of_another_game(new_room):
+    room = played_room(new_room, history=10)
+    old_game = room.my_game
+    room.my_game = played_room(new_room, history=10).my_game
+    delta = asyncio.run(
+        states.get_game_state_delta(room, since=25, game=old_game.ident)
+    )
+    assert delta.game == room.my_game.ident
+    assert delta.full_state is not None
+    assert delta.full_state.game == room.my_game.ident
+
+
+def test_state_is_rendered_once_per_tick(new_room):
+    room = played_room(new_room, history=10)
+    renders = []
+
+    def render(room: globals.Room) -> states.StateResponse:
+        renders.append(room.my_game.tick)
+        return states.game_state(room)
+
+    cached = router_utils.CachedResponse(render)
+    first = cached.respond(
+        room, room.my_game.tick, Request({"type": "http", "headers": []})
+    )
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert states.StateResponse.model_validate_json(first.body).tick == 30
+
+    not_modified = cached.respond(
+        room,
+        room.my_game.tick,
+        Request({"type": "http", "headers": [(b"if-none-match", etag.encode())]}),
+    )
+    assert not_modified.status_code == 304
+    assert renders == [30]
+
+    room.my_game.execute_game_step([])
+    changed = cached.respond(
+        room,
+        room.my_game.tick,
+        Request({"type": "http", "headers": [(b"if-none-match", etag.encode())]}),
+    )
+    assert changed.status_code == 200
+    assert renders == [30, 31]
+
+
+def test_next_tick_waits_for_the_tick(new_room):
+    room = played_room(new_room, history=10)
+
+    async def wait_and_execute():
+        waiter = asyncio.create_task(
+            states.get_next_tick(
+                room, Request({"type": "http", "headers": []}), after=30, timeout=5
+            )
+        )
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        room.my_game.execute_game_step([])
+        room.tick_done()
+        return await waiter
+
+    response = asyncio.run(wait_and_execute())
+    assert states.StateResponse.model_validate_json(response.body).tick == 31
+
+
+def test_next_tick_returns_at_once_if_past_the_tick(new_room):
+    room = played_room(new_room, history=10)
+    response = asyncio.run(
+        states.get_next_tick(
+            room, Request({"type": "http", "headers": []}), after=12, timeout=5
+        )
+    )
+    assert states.StateResponse.model_validate_json(response.body).tick == 30
@@ -0,0 +1,99 @@
+import io
+import logging
+import os
+import re
+
+import ascifight.game as game
+import ascifight.terminal as terminal
+import ascifight.board.data as data
+import ascifight.board.computations as computations
+
+
+class Screen:
+    """Just enough of a terminal to follow the renderer, colors are dropped."""
+
+    def __init__(self) -> None:
+        self.lines: dict[int, list[str]] = {}
+        self.row = 1
+        self.column = 1
+
+    def feed(self, text: str) -> None:
+        for token in re.findall(r"\x1b\[[0-9;]*[A-Za-z]|\n|[^\x1b\n]", text):
+            if token == "\n":
+                self.row, self.column = self.row + 1, 1
+            elif token == terminal.CLEAR_LINE:
+                self.lines.pop(self.row, None)
+            elif token == "\x1b[2J":
+                self.lines = {}
+            elif token.endswith("H"):
+                row, _, column = token[2:-1].partition(";")
+                self.row, self.column = int(row or 1), int(column or 1)
+            elif token.endswith("m"):
+                continue
+            else:
+                line = self.lines.setdefault(self.row, [])
+                line.extend(" " * (self.column - len(line)))
+                line[self.column - 1] = token
+                self.column += 1
+
+    def text(self) -> list[str]:
+        return ["".join(line).rstrip() for _, line in sorted(self.lines.items())]
+
+
+def test_changed_fields_are_redrawn_in_place():
+    board = data.BoardData(map_size=10, walls=5)
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=3)
+    current_game.initiate_game()
+    stream = io.StringIO()
+    renderer = terminal.TerminalRenderer(stream)
+    screen = Screen()
+
+    renderer.draw(current_game)
+    screen.feed(stream.getvalue())
+    for _ in range(5):
+        orders = [
+            game.MoveOrder(
+                team=team.name, actor=0, direction=computations.Directions.up
+            )
+            for team in board.teams
+        ]
+        current_game.execute_game_step(orders)
+        stream.seek(0)
+        stream.truncate()
+        renderer.draw(current_game)
+        frame = stream.getvalue()
+        assert "\x1b[2J" not in frame
+        screen.feed(frame)
+
+        fresh = Screen()
+        fresh.feed(terminal.CLEAR + current_game.scoreboard() + "\n")
+        fresh.feed(board.image())
+        assert screen.text() == fresh.text()
+
+
+def test_frames_are_drawn_in_full_after_log_output():
+    board = data.BoardData(map_size=10, walls=5)
+    current_game = game.Game(game_board=board, score_file=os.devnull, seed=3)
+    current_game.initiate_game()
+    stream = io.StringIO()
+    log_stream = terminal.ConsoleStream(stream)
+    logger = logging.getLogger("terminal_test")
+    logger.propagate = False
+    handler = logging.StreamHandler(log_stream)
+    logger.addHandler(handler)
+    renderer = terminal.TerminalRenderer(stream, log_stream)
+    screen = Screen()
+    try:
+        renderer.draw(current_game)
+        for tick in range(3):
+            logger.warning("Tick %s executed.", tick)
+            current_game.execute_game_step([])
+            renderer.draw(current_game)
+    finally:
+        logger.removeHandler(handler)
+    screen.feed(stream.getvalue())
+
+    fresh = Screen()
+    fresh.feed(terminal.CLEAR + current_game.scoreboard() + "\n")
+    fresh.feed(board.image())
+    assert screen.text() == fresh.text()
@@ -0,0 +1,22 @@
+import ascifight.tournament as tournament
+
+
+def test_round_robin_pairs_every_combination():
+    matches = tournament.round_robin(["a", "b", "c"], rounds=2, seed=1)
+    assert len(matches) == 6
+    assert [match.strategies for match in matches[:3]] == [
+        ["a", "b"],
+        ["a", "c"],
+        ["b", "c"],
+    ]
+    assert matches == tournament.round_robin(["a", "b", "c"], rounds=2, seed=1)
+
+
+def test_run_tournament_aggregates_standings():
+    matches = tournament.round_robin(["idle", "random"], rounds=2, seed=1)
+    standings = tournament.Standings()
+    for match_result in tournament.run_tournament(matches, workers=2, max_ticks=3):
+        standings.add(match_result)
+    assert standings.games == 2
+    assert standings.ticks == 6
+    assert set(standings.overall_scores) == {"idle", "random"}